@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BAW.settings')
 
 application = get_asgi_application()
+
+# Prepare the process before it accepts traffic (WARMUP_ON_STARTUP)
+from zoo_manager.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from importlib.util import find_spec
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,11 +51,19 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'zoo_manager.staticfiles.StaticFilesMiddleware',
+    'zoo_manager.staticfiles.ApiGZipMiddleware',
+    'zoo_manager.query_stats.QueryStatsMiddleware',
+    'zoo_manager.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'zoo_manager.tenants.TenantMiddleware',
+    'zoo_manager.audit.AuditMiddleware',
+    'zoo_manager.idempotency.IdempotencyMiddleware',
+    'zoo_manager.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,17 +87,75 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'BAW.wsgi.application'
 
+# Warm up URL resolvers, serializers, templates and database connections in
+# BAW/wsgi.py and BAW/asgi.py before the process accepts traffic
+# (zoo_manager/warmup.py)
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', 'true').lower() == 'true'
+
 AUTH_USER_MODEL = 'zoo_manager.Employee'
 
+# ModelBackend with permission sets kept in the shared cache (invalidated by
+# signals on group/permission changes) - see zoo_manager/auth_cache.py
+AUTHENTICATION_BACKENDS = ['zoo_manager.auth_backends.CachedPermissionBackend']
+
+# Cache shared by all worker processes when REDIS_URL is set (requires the
+# redis package); otherwise a per-process in-memory cache
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'zoo-manager',
+        },
+    }
+
+# Cache alias and entry lifetime (seconds) for authentication data
+AUTH_CACHE_ALIAS = 'default'
+AUTH_CACHE_TIMEOUT = 3600
+
+# Sessions and session-authenticated users are served from the cache only when
+# it is shared by all processes - with a per-process cache a logout or a
+# deactivated account would not be seen by the other workers
+SHARED_CACHE = bool(os.environ.get('REDIS_URL'))
+# The same applies to permission sets - a revoked permission must be seen by
+# every process, so CachedPermissionBackend falls back to plain ModelBackend
+# lookups without a shared cache
+AUTH_CACHE_PERMISSIONS = os.environ.get('AUTH_CACHE_PERMISSIONS', str(SHARED_CACHE)).lower() == 'true'
+AUTH_CACHE_USERS = os.environ.get('AUTH_CACHE_USERS', str(SHARED_CACHE)).lower() == 'true'
+if os.environ.get('CACHED_SESSIONS', str(SHARED_CACHE)).lower() == 'true':
+    # Cache-first sessions with write-behind to django_session - see zoo_manager/sessions.py
+    SESSION_ENGINE = 'zoo_manager.sessions'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_WRITE_BEHIND_SECONDS = 60
+
 # Django REST framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'zoo_manager.authentication.TenantJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication', # Keep session auth for web
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # orjson-based JSON first; MessagePack (application/msgpack) only when
+    # the optional msgpack package is installed
+    'DEFAULT_RENDERER_CLASSES': (
+        'zoo_manager.renderers.ORJSONRenderer',
+        *(('zoo_manager.renderers.MessagePackRenderer',) if find_spec('msgpack') else ()),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'zoo_manager.renderers.ORJSONParser',
+        *(('zoo_manager.renderers.MessagePackParser',) if find_spec('msgpack') else ()),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Simple JWT settings (optional, defaults are usually fine)
@@ -119,6 +187,9 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+    # Adds the "zoo" claim used to pick the tenant (zoo_manager/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'zoo_manager.authentication.TenantTokenObtainPairSerializer',
 }
 
 # Database
@@ -132,9 +203,50 @@ DATABASES = {
         'PASSWORD': 'B@w_Projekt#',
         'HOST': 'aws-0-eu-central-1.pooler.supabase.com',
         'PORT': '5432',
+        # Persistent connections - a process opens its connection once (at
+        # warm-up, see zoo_manager/warmup.py) instead of on every request
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas - comma-separated hosts in DATABASE_REPLICA_HOSTS, each one
+# using the credentials of the primary. Reads of safe-method requests are
+# routed to them by zoo_manager.db_router.ReplicaRouter.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index + 1}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+# Mirror of the primary for tests (under any runner), so the replica routing
+# tests in zoo_manager/tests.py can tell replica reads from primary ones. It is
+# not in DATABASE_REPLICAS, so nothing routes to it unless a test enables it -
+# and Django only connects to an alias when it is used.
+TEST_REPLICA = 'replica_test'
+DATABASES[TEST_REPLICA] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+# Separate databases for large zoos - comma-separated alias=host[/name] pairs
+# in ZOO_TENANT_DATABASES, each using the credentials of the primary. A zoo is
+# placed on one of them by setting Zoo.database to the alias (and running
+# "migrate --database <alias>" first).
+ZOO_TENANT_DATABASES = []
+for entry in filter(None, os.environ.get('ZOO_TENANT_DATABASES', '').split(',')):
+    alias, _, location = entry.strip().partition('=')
+    host, _, name = location.partition('/')
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'NAME': name or DATABASES['default']['NAME']}
+    ZOO_TENANT_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['zoo_manager.db_router.ReplicaRouter']
+
+# Zoo (tenant) that owns rows created outside of any request, e.g. by manage.py
+DEFAULT_ZOO_ID = 1
+# How long each process keeps its copy of the zoo registry (host/id lookups)
+ZOO_REGISTRY_CACHE_SECONDS = 60
+
+# How long (in seconds) a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -171,12 +283,121 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+# Integrated production mode: Django serves the collected static files and the
+# React build (frontend/dist, built with "npm run build:django") itself, with
+# pre-compressed variants and far-future cache headers for hashed names; the
+# React app is available under /app/. Run "manage.py collectstatic" after each
+# frontend build.
+SERVE_FRONTEND = os.environ.get('SERVE_FRONTEND', 'false').lower() == 'true'
+FRONTEND_DIST_DIR = os.environ.get('FRONTEND_DIST_DIR', os.path.join(BASE_DIR.parent, 'frontend', 'dist'))
+# Files smaller than this (bytes) are not pre-compressed by collectstatic
+STATIC_COMPRESS_MIN_SIZE = 512
+if SERVE_FRONTEND:
+    STATICFILES_DIRS = [('frontend', FRONTEND_DIST_DIR)]
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'zoo_manager.staticfiles.CompressedManifestStaticFilesStorage'},
+    }
+
+# /api/ responses larger than this (bytes) are gzip-compressed on the fly
+API_GZIP_MIN_SIZE = 4096
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Task archive (manage.py archive_tasks)
+TASK_ARCHIVE_DIR = os.environ.get('TASK_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+
+# Rows read per chunk by the lateness/duration analytics (/api/reports/task-times/)
+TASK_ANALYTICS_CHUNK_SIZE = 5000
+
+# Background jobs (manage.py run_jobs)
+# Run jobs inline in the request instead of queueing them - handy without a worker
+JOBS_RUN_EAGERLY = os.environ.get('JOBS_RUN_EAGERLY', 'false').lower() == 'true'
+# Retry delay is JOBS_RETRY_BASE_DELAY * 2 ** (attempt - 1) seconds
+JOBS_RETRY_BASE_DELAY = 5
+# Running jobs older than this (seconds) are considered abandoned by a dead worker
+JOBS_STALE_AFTER = 600
+
+# /api/batch/: max sub-requests per batch
+BATCH_MAX_REQUESTS = 20
+
+# /api/sync/: max new rows per stream in one response, how many sequence
+# numbers before the client's cursor are re-read (writes that committed late)
+# and how long deletion tombstones are kept
+SYNC_PAGE_SIZE = 1000
+SYNC_SEQUENCE_OVERLAP = 10
+SYNC_TOMBSTONE_DAYS = 30
+
+# On-demand request profiling (X-Profile: 1 header or ?_profile=1, managers and
+# staff only): sampling interval in seconds, how many of the slowest reads get
+# an EXPLAIN plan and how many profiles are kept in PROFILING_DIR. When
+# disabled the middleware is not loaded at all.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() == 'true'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_EXPLAIN_QUERIES = 5
+PROFILING_KEEP = 100
+
+# Always-on SQL statistics per query fingerprint and view (zoo_manager/query_stats.py):
+# max rows in the per-process table, slow-query threshold for an automatic
+# EXPLAIN (ms) and how often the snapshot is written to the log (seconds)
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+QUERY_STATS_MAX_ENTRIES = 1000
+QUERY_STATS_SLOW_MS = 200
+QUERY_STATS_FLUSH_SECONDS = 300
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'zoo_manager.query_stats': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# /api/autocomplete/: results per page of select-field suggestions
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+# Idempotency-Key header on API writes (zoo_manager/idempotency.py): how long
+# responses are kept (seconds), how long an unfinished execution holds its key,
+# how long a concurrent duplicate waits for the first result and the largest
+# response body that is stored
+IDEMPOTENCY_ENABLED = os.environ.get('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_TTL = 24 * 3600
+IDEMPOTENCY_LOCK_SECONDS = 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_MAX_BODY_SIZE = 1024 * 1024
+
+# Audit log of mutations (zoo_manager/audit.py): entries are buffered in memory
+# and written in batches by a background thread every AUDIT_FLUSH_SECONDS or
+# once AUDIT_BATCH_SIZE entries are waiting; a full buffer (AUDIT_MAX_BUFFER)
+# is written synchronously by the request that fills it
+AUDIT_ENABLED = os.environ.get('AUDIT_ENABLED', 'true').lower() == 'true'
+AUDIT_FLUSH_SECONDS = 1.0
+AUDIT_BATCH_SIZE = 500
+AUDIT_MAX_BUFFER = 10000
+
+# Overdue-task and sick-animal digests (manage.py send_alerts, see
+# zoo_manager/alerts.py). Each run covers the time since the previous one,
+# minus ALERT_SETTLE_SECONDS so rows from late-committing transactions are
+# not skipped. ALERT_SINK is zoo_manager.alerts.FileSink (JSON lines in
+# ALERT_FILE) or zoo_manager.alerts.MailSink (EMAIL_BACKEND, addresses built
+# from ALERT_MAIL_ADDRESS)
+ALERT_SINK = os.environ.get('ALERT_SINK', 'zoo_manager.alerts.FileSink')
+ALERT_FILE = os.environ.get('ALERT_FILE', os.path.join(BASE_DIR, 'alerts', 'digests.jsonl'))
+ALERT_MAIL_ADDRESS = os.environ.get('ALERT_MAIL_ADDRESS', '{username}@localhost')
+ALERT_SETTLE_SECONDS = 60
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
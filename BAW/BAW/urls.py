@@ -14,8 +14,9 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -28,3 +29,11 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
+
+if settings.SERVE_FRONTEND:
+    from zoo_manager.views import frontend_view
+
+    # Aplikacja React - trasy pod /app/ obsługuje jej router (fallback na index.html)
+    urlpatterns += [
+        re_path(r'^app/(?P<path>.*)$', frontend_view, name='frontend'),
+    ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BAW.settings')
 
 application = get_wsgi_application()
+
+# Prepare the process before it accepts traffic (WARMUP_ON_STARTUP)
+from zoo_manager.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Enclosure, Employee, Animal, Task
+from .models import Enclosure, Employee, Animal, Task, TaskType, Zoo
 from .forms import EmployeeCreationForm, EmployeeChangeForm
+from .audit import AuditedAdminMixin
 
-class EmployeeAdmin(UserAdmin):
+class EmployeeAdmin(AuditedAdminMixin, UserAdmin):
     add_form = EmployeeCreationForm
     form = EmployeeChangeForm
 
@@ -12,9 +13,10 @@ class EmployeeAdmin(UserAdmin):
     # Pola, po których można sortować
     ordering = ('username',)
     # Filtry po prawej stronie
-    list_filter = ('role', 'is_staff', 'is_superuser', 'is_active', 'groups')
-    # Jeśli chcesz umożliwić wyszukiwanie po tych polach
-    search_fields = ('username', 'imie', 'nazwisko')
+    list_filter = ('zoo', 'role', 'is_staff', 'is_superuser', 'is_active', 'groups')
+    # Wyszukiwanie od początku wartości (indeksy z migracji 0014); używane
+    # także przez podpowiedzi pól pracownika w pozostałych modelach
+    search_fields = ('^username', '^imie', '^nazwisko')
 
     # Fieldset dla edycji istniejącego użytkownika
     fieldsets = (
@@ -47,14 +49,40 @@ class EmployeeAdmin(UserAdmin):
 # Zarejestruj swój niestandardowy model Employee z niestandardowym EmployeeAdmin
 admin.site.register(Employee, EmployeeAdmin)
 
-class EnclosureAdmin(admin.ModelAdmin):
+class EnclosureAdmin(AuditedAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'get_responsible_employees')
+    search_fields = ('^name',)
+
+    def get_queryset(self, request):
+        # Pracownicy wszystkich wybiegów na stronie listy jednym zapytaniem
+        return super().get_queryset(request).prefetch_related('responsible_employees')
 
     def get_responsible_employees(self, obj):
         return ", ".join([e.get_full_name() for e in obj.responsible_employees.all()])
     get_responsible_employees.short_description = 'Odpowiedzialni pracownicy'
 
-# Pozostałe modele rejestrujemy jak wcześniej
 admin.site.register(Enclosure, EnclosureAdmin)
-admin.site.register(Animal)
-admin.site.register(Task)
+
+class AnimalAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'species', 'gender', 'enclosure')
+    list_select_related = ('enclosure',)
+    autocomplete_fields = ('enclosure',)
+
+admin.site.register(Animal, AnimalAdmin)
+
+class TaskAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('task_type', 'employee', 'enclosure', 'task_timestamp', 'is_completed')
+    list_select_related = ('task_type', 'employee', 'enclosure')
+    autocomplete_fields = ('task_type', 'employee', 'enclosure')
+
+admin.site.register(Task, TaskAdmin)
+
+class TaskTypeAdmin(admin.ModelAdmin):
+    search_fields = ('^name',)
+
+admin.site.register(TaskType, TaskTypeAdmin)
+
+class ZooAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'hostname', 'database')
+
+admin.site.register(Zoo, ZooAdmin)
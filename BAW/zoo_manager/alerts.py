@@ -0,0 +1,208 @@
+"""
+Powiadomienia o zaległych zadaniach i nowo chorych zwierzętach.
+
+Polecenie ``manage.py send_alerts`` (z harmonogramu albo z ``--interval``)
+przegląda dla każdego zoo przedział czasu od ``AlertWatermark.processed_until``
+do chwili bieżącej i wyszukuje:
+
+- zaległe zadania - nieukończone zadania z ``task_timestamp`` do końca
+  przedziału, jeszcze niezgłoszone (indeks częściowy
+  ``tasks_overdue_unreported_idx`` - przebieg czyta tylko niezgłoszone
+  wiersze swojego zoo, nie całą historię zadań nieukończonych).
+  Zgłoszenie zapisuje koniec przedziału w ``Task.overdue_alerted_at``, więc
+  zadanie dodane z terminem z przeszłości też zostanie zgłoszone, a zadanie
+  przełożone na później - zgłoszone ponownie po nowym terminie,
+- nowo chore zwierzęta - ``sick_since`` w przedziale (indeks
+  ``animals_zoo_sick_since_idx``). ``sick_since`` ustawia zmiana stanu
+  zdrowia na "chore": ``Animal.save()`` i szybka ścieżka API
+  (``sickness_updates()``); powrót do zdrowia je czyści.
+
+Po przebiegu znacznik przesuwa się na koniec przedziału, więc każdy wiersz
+jest przetwarzany raz. Koniec przedziału jest cofnięty o
+``ALERT_SETTLE_SECONDS`` - zmiana z transakcji zatwierdzonej z opóźnieniem
+trafia wtedy jeszcze do kolejnego przedziału. Pierwszy przebieg w zoo tylko
+ustawia znacznik i oznacza istniejące zaległości jako zgłoszone (bez
+powiadomień o zaległościach sprzed wdrożenia).
+
+Alerty są łączone w jedną wiadomość (digest) na odbiorcę: manager dostaje
+wszystkie alerty swojego zoo, a pracownik - alerty wybiegów z
+``Employee.enclosures`` i zaległe zadania przypisane do niego. Odbiorcy są
+ustalani dwoma zapytaniami niezależnie od liczby alertów. Digesty przekazuje
+ujście ``ALERT_SINK`` - plik JSON Lines (``FileSink``) albo poczta przez
+backend e-mail Django (``MailSink``). Znacznik przesuwa się dopiero po udanym
+przekazaniu (razem z oznaczeniem zgłoszonych zadań), więc przy błędzie
+kolejny przebieg powtórzy cały przedział.
+"""
+import json
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from operator import attrgetter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AlertWatermark, Animal, Employee, Task
+from .tenants import current_zoo_id
+
+OVERDUE_TASK = 'overdue_task'
+SICK_ANIMAL = 'sick_animal'
+
+# employee_id - pracownik przypisany do zadania (None dla zwierząt)
+Alert = namedtuple('Alert', ['kind', 'object_id', 'enclosure_id', 'employee_id', 'at', 'text'])
+# recipient - słownik z polami pk, username, imie, nazwisko, role
+Digest = namedtuple('Digest', ['recipient', 'alerts'])
+
+
+def sickness_updates(values, now=None):
+    """Kolumna ``sick_since`` dla zmiany stanu zdrowia przez szybką ścieżkę zapisu"""
+    if 'health' not in values:
+        return {}
+    if values['health']:
+        return {'sick_since': None}
+    # Ponowne oznaczenie chorego zwierzęcia nie zmienia chwili zachorowania
+    return {'sick_since': Coalesce(F('sick_since'), Value(now or timezone.now()))}
+
+
+def pending_overdue(until):
+    """
+    Nieukończone zadania z terminem do ``until`` niezgłoszone od ostatniej
+    zmiany terminu. Warunek odpowiada indeksowi ``tasks_overdue_unreported_idx``.
+    """
+    return Task.objects.filter(  # type: ignore
+        Q(overdue_alerted_at__isnull=True) | Q(overdue_alerted_at__lt=F('task_timestamp')),
+        is_completed=False, task_timestamp__lte=until,
+    )
+
+
+def overdue_tasks(until):
+    rows = pending_overdue(until).values_list(
+        'pk', 'enclosure_id', 'employee_id', 'task_timestamp', 'task_type__name', 'enclosure__name'
+    ).order_by('task_timestamp')
+    return [
+        Alert(OVERDUE_TASK, pk, enclosure_id, employee_id, timestamp,
+              f'Zaległe zadanie: {task_type}' + (f' ({enclosure})' if enclosure else ''))
+        for pk, enclosure_id, employee_id, timestamp, task_type, enclosure in rows
+    ]
+
+
+def newly_sick_animals(since, until):
+    rows = Animal.objects.filter(  # type: ignore
+        health=False, sick_since__gt=since, sick_since__lte=until
+    ).values_list(
+        'pk', 'enclosure_id', 'sick_since', 'name', 'species', 'enclosure__name'
+    ).order_by('sick_since')
+    return [
+        Alert(SICK_ANIMAL, pk, enclosure_id, None, sick_since,
+              f'Chore zwierzę: {name} ({species})' + (f', wybieg {enclosure}' if enclosure else ''))
+        for pk, enclosure_id, sick_since, name, species, enclosure in rows
+    ]
+
+
+def build_digests(alerts):
+    """Jeden digest na odbiorcę (managerowie i pracownicy wybiegów / zadań z alertów)"""
+    if not alerts:
+        return []
+    staff_by_enclosure = defaultdict(set)
+    assignments = Employee.enclosures.through.objects.filter(  # type: ignore
+        enclosure_id__in={alert.enclosure_id for alert in alerts if alert.enclosure_id is not None}
+    ).values_list('employee_id', 'enclosure_id')
+    for employee_id, enclosure_id in assignments:
+        staff_by_enclosure[enclosure_id].add(employee_id)
+    workers = set().union(*staff_by_enclosure.values(), {alert.employee_id for alert in alerts})
+
+    recipients = Employee.objects.filter(  # type: ignore
+        Q(role='manager') | Q(pk__in=workers - {None}), is_active=True
+    ).values('pk', 'username', 'imie', 'nazwisko', 'role').order_by('pk')
+    digests = []
+    for recipient in recipients:
+        pk = recipient['pk']
+        received = [
+            alert for alert in alerts
+            if recipient['role'] == 'manager' or alert.employee_id == pk or pk in staff_by_enclosure[alert.enclosure_id]
+        ]
+        if received:
+            digests.append(Digest(recipient, received))
+    return digests
+
+
+def digest_payload(digest):
+    return {
+        'zoo': current_zoo_id(),
+        'recipient': digest.recipient,
+        'alerts': [alert._asdict() for alert in digest.alerts],
+    }
+
+
+def digest_text(digest):
+    lines = [f"{timezone.localtime(alert.at):%Y-%m-%d %H:%M}  {alert.text}" for alert in digest.alerts]
+    return f"Dzień dobry {digest.recipient['imie']},\n\nnowe powiadomienia:\n\n" + '\n'.join(lines) + '\n'
+
+
+class FileSink:
+    """Digesty jako wiersze JSON dopisywane do pliku ``ALERT_FILE``"""
+
+    def deliver(self, digests):
+        path = Path(settings.ALERT_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('a', encoding='utf-8') as output:
+            for digest in digests:
+                output.write(json.dumps(digest_payload(digest), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+
+class MailSink:
+    """
+    Digesty jako e-maile wysyłane jednym połączeniem przez ``EMAIL_BACKEND``
+    (np. ``filebased`` lub ``console`` zamiast SMTP). Pracownicy nie mają
+    adresu e-mail - adres powstaje z ``ALERT_MAIL_ADDRESS``.
+    """
+
+    def deliver(self, digests):
+        messages = [
+            EmailMessage(
+                subject=f'Powiadomienia: {len(digest.alerts)}',
+                body=digest_text(digest),
+                to=[settings.ALERT_MAIL_ADDRESS.format(**digest.recipient)],
+            )
+            for digest in digests
+        ]
+        get_connection(fail_silently=False).send_messages(messages)
+
+
+def get_sink():
+    return import_string(settings.ALERT_SINK)()
+
+
+def process(now=None, sink=None):
+    """
+    Przebieg dla bieżącego zoo: alerty z przedziału od znacznika, przekazanie
+    digestów i przesunięcie znacznika. Zwraca (liczba alertów, liczba digestów).
+    """
+    until = (now or timezone.now()) - timedelta(seconds=settings.ALERT_SETTLE_SECONDS)
+    with transaction.atomic(using=router.db_for_write(AlertWatermark)):
+        # Blokada znacznika - równoległy przebieg czeka zamiast wysłać to samo drugi raz
+        watermark, created = AlertWatermark.objects.select_for_update().get_or_create(  # type: ignore
+            defaults={'processed_until': until}
+        )
+        if created:
+            pending_overdue(until).update(overdue_alerted_at=until)
+            return 0, 0
+        if watermark.processed_until >= until:
+            return 0, 0
+        since = watermark.processed_until
+        alerts = sorted(overdue_tasks(until) + newly_sick_animals(since, until), key=attrgetter('at'))
+        digests = build_digests(alerts)
+        if digests:
+            (sink or get_sink()).deliver(digests)
+        Task.objects.filter(  # type: ignore
+            pk__in=[alert.object_id for alert in alerts if alert.kind == OVERDUE_TASK]
+        ).update(overdue_alerted_at=until)
+        watermark.processed_until = until
+        watermark.save(update_fields=['processed_until'])
+    return len(alerts), len(digests)
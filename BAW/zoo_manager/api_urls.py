@@ -2,7 +2,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import (
     EmployeeViewSet, EnclosureViewSet, AnimalViewSet, TaskViewSet,
-    LoginAPIView, DashboardAPIView
+    LoginAPIView, DashboardAPIView, TaskArchiveAPIView, ReportsAPIView,
+    ReportsRefreshAPIView, JobViewSet, BatchAPIView, SyncAPIView, AutocompleteAPIView,
+    ProfileListAPIView, ProfileDetailAPIView, QueryStatsAPIView, TaskTimesAPIView,
+    AuditHistoryAPIView, MyFeedAPIView
 )
 
 # Tworzenie routera dla ViewSets
@@ -11,6 +14,7 @@ router.register(r'employees', EmployeeViewSet)
 router.register(r'enclosures', EnclosureViewSet)
 router.register(r'animals', AnimalViewSet)
 router.register(r'tasks', TaskViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
     # Główne API endpoints
@@ -21,5 +25,35 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', DashboardAPIView.as_view(), name='api_dashboard'),
+    
+    # Raporty
+    path('reports/', ReportsAPIView.as_view(), name='api_reports'),
+    path('reports/refresh/', ReportsRefreshAPIView.as_view(), name='api_reports_refresh'),
+    path('reports/task-times/', TaskTimesAPIView.as_view(), name='api_reports_task_times'),
+    
+    # Wiele żądań w jednym (dane startowe stron)
+    path('batch/', BatchAPIView.as_view(), name='api_batch'),
+    
+    # Synchronizacja przyrostowa (tablety)
+    path('sync/', SyncAPIView.as_view(), name='api_sync'),
+    
+    # Podpowiedzi dla pól wyboru (formularze i panel administracyjny)
+    path('autocomplete/<str:source>/', AutocompleteAPIView.as_view(), name='api_autocomplete'),
+    
+    # Profile żądań (X-Profile: 1) - tylko personel
+    path('profiles/', ProfileListAPIView.as_view(), name='api_profiles'),
+    path('profiles/<str:profile_id>/', ProfileDetailAPIView.as_view(), name='api_profile_detail'),
+    
+    # Statystyka zapytań SQL procesu - tylko personel
+    path('query-stats/', QueryStatsAPIView.as_view(), name='api_query_stats'),
+    
+    # Kanał "moja zmiana" zalogowanego pracownika
+    path('me/feed/', MyFeedAPIView.as_view(), name='api_me_feed'),
+    
+    # Dziennik zmian - historia obiektu (tylko kierownik)
+    path('audit/<str:model>/<int:pk>/', AuditHistoryAPIView.as_view(), name='api_audit_history'),
+    
+    # Archiwum zadań (tylko odczyt)
+    path('tasks-archive/', TaskArchiveAPIView.as_view(), name='api_tasks_archive'),
 ]
 
@@ -1,20 +1,93 @@
+from datetime import date, timedelta
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Employee, Enclosure, Animal, Task
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils import timezone
+from .models import Employee, Enclosure, Animal, Task, Job, AuditEntry
 from .serializers import (
     EmployeeSerializer, EnclosureSerializer, AnimalSerializer, 
-    TaskSerializer, TaskCompletionSerializer
+    TaskSerializer, TaskCompletionSerializer, AnimalHealthSerializer, JobSerializer, BulkAssignSerializer,
+    AuditEntrySerializer
 )
 from .permissions import (
-    IsManagerOrReadOnly, IsManagerOnly, IsOwnerOrManager, CanEditOwnTasksOnly, CanEditAnimalHealth
+    IsManagerOrReadOnly, IsManagerOnly, IsManagerOrStaff, IsOwnerOrManager, CanEditOwnTasksOnly,
+    CanEditAnimalHealth
 )
+from .authentication import token_for_user
+from .archive import available_months, is_valid_month, read_month
+from .db_router import is_pinned, mark_read_only, use_replica
+from .reports import summarize
+from .jobs import enqueue
+from .projections import ProjectedListMixin
+from . import fast_updates
+from .task_claims import CLAIM_RETRY_AFTER, ClaimContention, claim_task
+from .task_lifecycle import completion_updates
+from .alerts import sickness_updates
+from . import audit
+from .audit import AuditedViewSetMixin
+from . import autocomplete
+from . import batch
+from . import feed
+from . import profiling
+from . import task_analytics
+from .query_stats import stats as query_stats
+from .sync import changes_since
+from .tenants import current_zoo
+
+
+def fast_update_response(model, pk, request, serializer_class, where=None, toggles=(), derived=None,
+                         forbidden_message='Brak uprawnień do edycji tego obiektu'):
+    """
+    Wąska ścieżka zapisu: waliduje dane serializerem i zmienia tylko podane
+    pola jednym poleceniem UPDATE (zoo_manager/fast_updates.py). Zwraca id,
+    nową wersję i zmienione pola. Opcjonalne pole ``version`` w danych
+    włącza optymistyczną kontrolę wersji. ``derived`` to funkcja zwracająca
+    dla zwalidowanych danych kolumny zapisywane razem z nimi.
+    """
+    if not str(pk).isdigit():
+        return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+    version = request.data.get('version', None)
+    if version is not None and (isinstance(version, bool) or not str(version).isdigit()):
+        return Response(
+            {'error': 'Pole version musi być nieujemną liczbą całkowitą'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    serializer = serializer_class(data=request.data, partial=True)
+    serializer.is_valid(raise_exception=True)
+    values = dict(serializer.validated_data)
+    
+    result = fast_updates.update_fields(
+        model, pk, values,
+        where=where,
+        version=int(version) if version is not None else None,
+        toggles=[field for field in toggles if field in values],
+        derived=derived(values) if derived is not None else None,
+    )
+    if result.status == fast_updates.NOT_FOUND:
+        return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+    if result.status == fast_updates.FORBIDDEN:
+        return Response(
+            {'error': forbidden_message},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if result.status == fast_updates.CONFLICT:
+        return Response(
+            {'error': 'Obiekt został w międzyczasie zmieniony', 'version': result.row['version']},
+            status=status.HTTP_409_CONFLICT
+        )
+    return Response({
+        'id': result.row['id'],
+        'version': result.row['version'],
+        **{field: result.row[field] for field in values},
+    })
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(AuditedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet dla zarządzania pracownikami
     """
@@ -76,6 +149,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         employee.set_password(new_password)
         employee.save()
+        audit.record(employee, audit.UPDATE, {'password': {'old': audit.MASK, 'new': audit.MASK}}, 'api')
         print(f"Password changed successfully for employee {employee.id}")
         
         return Response({'message': 'Hasło zostało zmienione'})
@@ -131,7 +205,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             raise
 
 
-class EnclosureViewSet(viewsets.ModelViewSet):
+class EnclosureViewSet(AuditedViewSetMixin, ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet dla zarządzania wybiegami
     """
@@ -144,7 +218,7 @@ class EnclosureViewSet(viewsets.ModelViewSet):
         return Enclosure.objects.all().order_by('name')  # type: ignore
 
 
-class AnimalViewSet(viewsets.ModelViewSet):
+class AnimalViewSet(AuditedViewSetMixin, ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet dla zarządzania zwierzętami
     """
@@ -165,6 +239,13 @@ class AnimalViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         """Nadpisuje metodę update, aby pracownicy mogli tylko zmieniać stan zdrowia"""
+        # Sama zmiana stanu zdrowia (najczęstsza operacja) - jedno UPDATE bez
+        # pobierania obiektu
+        if request.data.keys() - {'version'} == {'health'}:
+            return fast_update_response(
+                Animal, kwargs['pk'], request, AnimalHealthSerializer, derived=sickness_updates
+            )
+        
         instance = self.get_object()
         
         # Debug: wyświetl dane żądania
@@ -177,7 +258,7 @@ class AnimalViewSet(viewsets.ModelViewSet):
         # Jeśli użytkownik jest pracownikiem
         if request.user.role == 'worker':
             # Sprawdź czy próbuje zmienić tylko stan zdrowia
-            if set(request.data.keys()) != {'health'}:
+            if set(request.data.keys()) - {'version'} != {'health'}:
                 print(f"Worker trying to update fields other than health: {request.data.keys()}")
                 return Response(
                     {'error': 'Możesz edytować tylko stan zdrowia zwierzęcia'},
@@ -197,7 +278,7 @@ class AnimalViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(AuditedViewSetMixin, ProjectedListMixin, viewsets.ModelViewSet):
     """
     ViewSet dla zarządzania zadaniami
     """
@@ -207,7 +288,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Zwraca listę zadań"""
-        queryset = Task.objects.all().order_by('-task_timestamp')  # type: ignore
+        queryset = Task.objects.select_related('task_type').order_by('-task_timestamp')  # type: ignore
         
         # Filtrowanie po pracowniku jeśli podano parametr (tylko dla managera)
         employee_id = self.request.query_params.get('employee', None)
@@ -219,6 +300,12 @@ class TaskViewSet(viewsets.ModelViewSet):
         if is_completed is not None:
             queryset = queryset.filter(is_completed=is_completed.lower() == 'true')  # type: ignore
         
+        # Ograniczenie do ostatnich N dni - na PostgreSQL zapytanie
+        # dotyka wtedy tylko najnowszych partycji tabeli zadań
+        days = self.request.query_params.get('days', None)
+        if days is not None and days.isdigit():
+            queryset = queryset.filter(task_timestamp__gte=timezone.now() - timedelta(days=int(days)))
+        
         return queryset
     
     def get_serializer_class(self):
@@ -231,22 +318,25 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         """Nadpisuje metodę update, aby pracownicy mogli tylko oznaczać swoje zadania jako ukończone"""
-        instance = self.get_object()
-        
-        # Jeśli użytkownik jest pracownikiem
+        # Oznaczanie ukończenia i komentarze - jedno UPDATE bez pobierania
+        # obiektu; uprawnienia pracownika sprawdzane w klauzuli WHERE
+        changed = request.data.keys() - {'version'}
         if request.user.role == 'worker':
-            # Sprawdź czy to jego zadanie
-            if instance.employee_id != request.user.id:
-                return Response(
-                    {'error': 'Możesz edytować tylko swoje zadania'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            # Pracownik może tylko oznaczyć zadanie jako ukończone i dodać komentarz
-            serializer = TaskCompletionSerializer(instance, data=request.data, partial=True)
-        else:
-            # Manager może edytować wszystko
-            serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
+            # Pracownik może tylko oznaczyć swoje zadanie jako ukończone i dodać komentarz
+            return fast_update_response(
+                Task, kwargs['pk'], request, TaskCompletionSerializer,
+                where={'employee_id': request.user.id}, toggles=['is_completed'],
+                derived=completion_updates, forbidden_message='Możesz edytować tylko swoje zadania',
+            )
+        if changed and changed <= set(TaskCompletionSerializer.Meta.fields):
+            return fast_update_response(
+                Task, kwargs['pk'], request, TaskCompletionSerializer, toggles=['is_completed'],
+                derived=completion_updates,
+            )
         
+        # Manager może edytować wszystko
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         return Response(serializer.data)
@@ -256,6 +346,320 @@ class TaskViewSet(viewsets.ModelViewSet):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def claim(self, request):
+        """Przypisuje zalogowanemu pracownikowi następne wolne zadanie z jego wybiegów"""
+        try:
+            task = claim_task(request.user)
+        except ClaimContention:
+            # 503 (a nie 409): odpowiedzi 5xx nie są zapamiętywane dla
+            # Idempotency-Key, więc ponowienie z tym samym kluczem przejmie zadanie
+            return Response(
+                {'detail': 'Wolne zadania przejmują teraz inni pracownicy - spróbuj ponownie'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(CLAIM_RETRY_AFTER)},
+            )
+        if task is None:
+            return Response(
+                {'detail': 'Brak wolnych zadań na Twoich wybiegach'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(TaskSerializer(task).data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsManagerOnly])
+    def bulk_assign(self, request):
+        """Zleca w tle przypisanie wielu zadań do pracownika"""
+        serializer = BulkAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        employee = serializer.validated_data['employee']
+        job = enqueue('bulk_assign_tasks', {
+            'task_ids': serializer.validated_data['task_ids'],
+            'employee_id': employee.id if employee else None,
+        }, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet do sprawdzania statusu zadań w tle
+    """
+    queryset = Job.objects.all()  # type: ignore
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Manager widzi wszystkie zadania w tle, pracownik tylko własne"""
+        queryset = Job.objects.all().order_by('-created_at')  # type: ignore
+        if self.request.user.role != 'manager':
+            queryset = queryset.filter(created_by=self.request.user)
+        
+        status_filter = self.request.query_params.get('status', None)
+        if status_filter is not None:
+            queryset = queryset.filter(status=status_filter)
+        
+        return queryset
+
+
+class TaskArchiveAPIView(APIView):
+    """
+    Endpoint tylko do odczytu dla zarchiwizowanych zadań
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        month = request.query_params.get('month', None)
+        
+        # Bez parametru month zwracamy listę dostępnych miesięcy
+        if month is None:
+            return Response({'months': available_months()})
+        
+        if not is_valid_month(month):
+            return Response(
+                {'error': 'Parametr month musi mieć format YYYY-MM'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        filters = {}
+        for param in ('employee', 'enclosure'):
+            value = request.query_params.get(param, None)
+            if value is not None:
+                if not value.isdigit():
+                    return Response(
+                        {'error': f'Parametr {param} musi być liczbą'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filters[f'{param}_id'] = int(value)
+        
+        return Response(read_month(month, **filters))
+
+
+class MyFeedAPIView(APIView):
+    """
+    Endpoint kanału "moja zmiana" zalogowanego pracownika: nieukończone
+    zadania, wybiegi, zwierzęta z tych wybiegów i chore zwierzęta
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        return Response({'employee': request.user.pk, **feed.read_feed(request.user.pk)})
+
+
+class AuditHistoryAPIView(APIView):
+    """
+    Endpoint historii zmian obiektu z dziennika (najnowsze najpierw)
+    """
+    permission_classes = [IsManagerOnly]
+    default_limit = 100
+    max_limit = 500
+    
+    def get(self, request, model, pk):
+        if model not in {audited._meta.model_name for audited in audit.AUDITED_MODELS}:
+            return Response({'error': f'Nieznany typ obiektu: {model}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        limit = request.query_params.get('limit', str(self.default_limit))
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_limit:
+            return Response(
+                {'error': f'Parametr limit musi być liczbą od 1 do {self.max_limit}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        entries = AuditEntry.objects.filter(  # type: ignore
+            model=model, object_id=pk
+        ).select_related('actor').order_by('-created_at', '-id')[:int(limit)]
+        return Response(AuditEntrySerializer(entries, many=True).data)
+
+
+class ReportsAPIView(APIView):
+    """
+    Endpoint raportów realizacji zadań per pracownik lub per wybieg
+    """
+    permission_classes = [IsManagerOnly]
+    
+    def get(self, request):
+        group = request.query_params.get('group', 'employee')
+        if group not in ('employee', 'enclosure'):
+            return Response(
+                {'error': 'Parametr group musi mieć wartość employee lub enclosure'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start = self.parse_day(request.query_params.get('from', None))
+            end = self.parse_day(request.query_params.get('to', None))
+        except ValueError:
+            return Response(
+                {'error': 'Parametry from i to muszą mieć format YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Opcjonalny podział wyników na dni
+        by_day = request.query_params.get('by_day', 'false').lower() == 'true'
+        
+        return Response({
+            'group': group,
+            'from': start,
+            'to': end,
+            'results': summarize(group, start, end, by_day=by_day),
+        })
+    
+    @staticmethod
+    def parse_day(value):
+        return date.fromisoformat(value) if value else None
+
+
+class ReportsRefreshAPIView(APIView):
+    """
+    Endpoint zlecający w tle przeliczenie podsumowań raportów
+    """
+    permission_classes = [IsManagerOnly]
+    
+    def post(self, request):
+        try:
+            start = ReportsAPIView.parse_day(request.data.get('from', None))
+            end = ReportsAPIView.parse_day(request.data.get('to', None))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Pola from i to muszą mieć format YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        job = enqueue('refresh_task_reports', {
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+        }, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class TaskTimesAPIView(APIView):
+    """
+    Endpoint statystyk spóźnień i czasu wykonania zadań per pracownik,
+    wybieg i typ zadania
+    """
+    permission_classes = [IsManagerOnly]
+    
+    def get(self, request):
+        if not task_analytics.is_available():
+            return Response(
+                {'error': 'Analiza wymaga zainstalowanego pakietu numpy'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        try:
+            start = ReportsAPIView.parse_day(request.query_params.get('from', None))
+            end = ReportsAPIView.parse_day(request.query_params.get('to', None))
+        except ValueError:
+            return Response(
+                {'error': 'Parametry from i to muszą mieć format YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'from': start,
+            'to': end,
+            **task_analytics.analyze(start, end),
+        })
+
+
+class BatchAPIView(APIView):
+    """
+    Endpoint wykonujący kilka żądań API naraz (np. dane startowe strony)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            specs = batch.validate(request.data.get('requests', None) if isinstance(request.data, dict) else None)
+        except batch.BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if batch.is_read_only(specs):
+            mark_read_only(request)
+        # Ścieżki pod-żądań są względne wobec katalogu głównego API (/api/)
+        api_root = reverse('api_batch')[:-len('batch/')]
+        return Response({'responses': batch.run(request, api_root, specs)})
+
+
+class SyncAPIView(APIView):
+    """
+    Endpoint synchronizacji przyrostowej dla tabletów: zmiany i usunięcia
+    po numerze ``since`` (bez parametru - pełna kopia danych)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        since = request.query_params.get('since', None)
+        if since is not None and not since.isdigit():
+            return Response(
+                {'error': 'Parametr since musi być nieujemną liczbą całkowitą'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(changes_since(request.user, int(since) if since is not None else None))
+
+
+class AutocompleteAPIView(APIView):
+    """
+    Podpowiedzi dla pól wyboru w formularzach i panelu administracyjnym:
+    ``?q=`` dopasowuje początki słów, ``?page=`` wybiera stronę wyników
+    """
+    permission_classes = [IsManagerOrStaff]
+    
+    def get(self, request, source):
+        if source not in autocomplete.SOURCES:
+            return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+        page = request.query_params.get('page', '1')
+        if not page.isdigit():
+            return Response(
+                {'error': 'Parametr page musi być dodatnią liczbą całkowitą'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        results, more = autocomplete.search(source, request.query_params.get('q', ''), int(page))
+        return Response({'results': results, 'more': more})
+
+
+class ProfileListAPIView(APIView):
+    """
+    Lista profili żądań bieżącego zoo zapisanych przez ProfilingMiddleware
+    (tylko personel)
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response({'profiles': profiling.list_profiles()})
+
+
+class ProfileDetailAPIView(APIView):
+    """
+    Szczegóły profilu (zapytania SQL z planami EXPLAIN, najdroższe funkcje);
+    ``?download=speedscope`` pobiera wykres płomieniowy dla speedscope.app
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request, profile_id):
+        if not profiling.is_valid_profile_id(profile_id):
+            return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+        # Profil innego zoo wygląda tak samo jak nieistniejący
+        summary = profiling.read_profile(profile_id)
+        if summary is None:
+            return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get('download', None) == 'speedscope':
+            path = profiling.speedscope_path(profile_id)
+            if not path.exists():
+                return Response({'detail': 'Nie znaleziono.'}, status=status.HTTP_404_NOT_FOUND)
+            return FileResponse(
+                path.open('rb'), as_attachment=True, filename=path.name, content_type='application/json'
+            )
+        return Response(summary)
+
+
+class QueryStatsAPIView(APIView):
+    """
+    Statystyka zapytań SQL bieżącego zoo w tym procesie według odcisku
+    i widoku od ostatniego zapisu do logu (tylko personel)
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(query_stats.snapshot(zoo=current_zoo()))
+
 
 class LoginAPIView(APIView):
     """
@@ -276,7 +680,7 @@ class LoginAPIView(APIView):
         user = authenticate(username=username, password=password)
         
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = token_for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -296,6 +700,12 @@ class DashboardAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
+        # Statystyki tolerują opóźnienie replikacji, więc czytamy je z repliki -
+        # chyba że klient jest przypięty do bazy głównej i musi widzieć własne zapisy
+        with use_replica(not is_pinned(request)):
+            return self.get_dashboard(request)
+    
+    def get_dashboard(self, request):
         user = request.user
         
         # Podstawowe statystyki
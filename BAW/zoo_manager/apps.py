@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class ZooManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zoo_manager'
+
+    def ready(self):
+        # Rejestracja odbiorników sygnałów
+        from . import reports  # noqa: F401
+        # Rejestracja funkcji wykonywanych w tle
+        from . import jobs  # noqa: F401
+        # Numery zmian i ślady usunięć dla synchronizacji tabletów
+        from . import sync  # noqa: F401
+        # Unieważnianie uprawnień w pamięci podręcznej
+        from . import auth_cache  # noqa: F401
+        # Statystyka zapytań SQL według odcisków
+        from . import query_stats  # noqa: F401
+        # Dziennik zmian (usunięcia i szybkie aktualizacje pól)
+        from . import audit  # noqa: F401
+        # Kanały "moja zmiana" pracowników
+        from . import feed  # noqa: F401
@@ -0,0 +1,82 @@
+"""
+Archiwum zakończonych zadań w skompresowanych plikach.
+
+Każdy miesiąc (wg ``task_timestamp``) ma osobny plik
+``tasks-YYYY-MM.jsonl.gz`` w katalogu ``settings.TASK_ARCHIVE_DIR``.
+Wiersze zapisywane są w formacie ``TaskSerializer``, więc archiwum
+pozostaje czytelne nawet po usunięciu pracowników lub wybiegów.
+"""
+import gzip
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+FILE_PATTERN = re.compile(r'^tasks-(\d{4}-\d{2})\.jsonl\.gz$')
+MONTH_PATTERN = re.compile(r'\d{4}-(0[1-9]|1[0-2])')
+
+
+def archive_dir():
+    return Path(settings.TASK_ARCHIVE_DIR)
+
+
+def is_valid_month(month):
+    """Sprawdza format YYYY-MM (chroni też przed wskazaniem dowolnej ścieżki)"""
+    return MONTH_PATTERN.fullmatch(month) is not None
+
+
+def archive_path(month):
+    """Ścieżka pliku archiwum dla miesiąca w formacie YYYY-MM"""
+    return archive_dir() / f'tasks-{month}.jsonl.gz'
+
+
+def available_months():
+    """Zwraca posortowaną listę miesięcy, dla których istnieje archiwum"""
+    directory = archive_dir()
+    if not directory.exists():
+        return []
+    months = []
+    for path in directory.iterdir():
+        match = FILE_PATTERN.match(path.name)
+        if match:
+            months.append(match.group(1))
+    return sorted(months)
+
+
+def append_rows(rows_by_month):
+    """
+    Dopisuje wiersze do plików archiwum.
+
+    Każde wywołanie dopisuje nowy człon gzip do pliku miesiąca; czytanie
+    obsługuje pliki złożone z wielu członów.
+    """
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for month, rows in rows_by_month.items():
+        with gzip.open(archive_path(month), 'at', encoding='utf-8') as archive_file:
+            for row in rows:
+                archive_file.write(json.dumps(row, ensure_ascii=False))
+                archive_file.write('\n')
+
+
+def read_month(month, employee_id=None, enclosure_id=None):
+    """
+    Czyta zadania z archiwum danego miesiąca z opcjonalnym filtrowaniem.
+
+    Jeśli archiwizacja została przerwana i powtórzona, to samo zadanie może
+    wystąpić w pliku kilka razy - zwracany jest ostatni zapis.
+    """
+    path = archive_path(month)
+    if not path.exists():
+        return []
+    rows = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            row = json.loads(line)
+            if employee_id is not None and row.get('employee') != employee_id:
+                continue
+            if enclosure_id is not None and row.get('enclosure') != enclosure_id:
+                continue
+            rows[row['id']] = row
+    return sorted(rows.values(), key=lambda row: row['task_timestamp'], reverse=True)
@@ -0,0 +1,347 @@
+"""
+Dziennik zmian (kto, kiedy i które pola zmienił) zwierząt, zadań, wybiegów
+i pracowników - także przypisań pracowników do wybiegów i zadań.
+
+Zmiany są zbierane tam, gdzie stan sprzed zapisu jest już w pamięci, bez
+dodatkowych odczytów:
+
+- widoki API - ``AuditedViewSetMixin`` (zoo_manager/api_views.py),
+- formularze HTML - ``AuditedFormMixin`` (zoo_manager/forms.py),
+- panel administracyjny - ``AuditedAdminMixin`` (zoo_manager/admin.py),
+- szybkie aktualizacje pól i przejmowanie zadań - sygnał ``fields_updated``,
+- usunięcia z dowolnego miejsca - sygnał ``post_delete``.
+
+Autorem jest użytkownik bieżącego żądania (``AuditMiddleware``) albo
+zlecający zadanie w tle (``acting_as``). Zmiana pola to ``{"old": ...,
+"new": ...}``; ``old`` jest pomijane, gdy poprzednia wartość nie jest znana.
+
+Wpisy nie są zapisywane w żądaniu. Po zatwierdzeniu transakcji trafiają do
+bufora w pamięci procesu, a wątek w tle zapisuje je zbiorczo (``bulk_create``)
+co ``AUDIT_FLUSH_SECONDS`` albo po zebraniu ``AUDIT_BATCH_SIZE`` wpisów.
+Bufor mieści najwyżej ``AUDIT_MAX_BUFFER`` wpisów - po jego zapełnieniu
+zapis odbywa się od razu w wątku, który dodaje wpis. Przy zamknięciu procesu
+bufor jest opróżniany, więc awaria procesu może zgubić najwyżej wpisy z
+ostatnich ``AUDIT_FLUSH_SECONDS``.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, MiddlewareNotUsed
+from django.db import DatabaseError, close_old_connections, router, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils import timezone
+
+from .models import Animal, AuditEntry, Employee, Enclosure, Task
+from .signals import fields_updated
+from .tenants import current_zoo_id
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS = (Animal, Task, Enclosure, Employee)
+# Pola, których wartości nie trafiają do dziennika
+MASKED_FIELDS = {'password'}
+MASK = '***'
+# Pola techniczne pomijane w migawce usuwanego obiektu
+BOOKKEEPING_FIELDS = {'zoo', 'change_seq', 'version'}
+
+# Poprzednia wartość nieznana
+MISSING = object()
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+# Żądanie (autor = request.user) albo identyfikator autora
+_actor = ContextVar('zoo_audit_actor', default=None)
+_suspended = ContextVar('zoo_audit_suspended', default=False)
+
+
+def is_audited(model):
+    return settings.AUDIT_ENABLED and model in AUDITED_MODELS and not _suspended.get()
+
+
+@contextmanager
+def acting_as(actor):
+    """Autor zmian w obrębie bloku with (żądanie, pracownik lub jego identyfikator)"""
+    token = _actor.set(actor)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+@contextmanager
+def suspended():
+    """Zmiany w obrębie bloku with nie są zapisywane (np. archiwizacja zadań)"""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def current_actor_id():
+    actor = _actor.get()
+    if isinstance(actor, HttpRequest):
+        # DRF po uwierzytelnieniu podmienia też request.user żądania Django
+        actor = getattr(actor, 'user', None)
+        return actor.pk if actor is not None and actor.is_authenticated else None
+    return getattr(actor, 'pk', actor)
+
+
+# --- Wartości pól ---
+
+def field_value(instance, name):
+    """Wartość pola do zapisu w dzienniku: klucz dla relacji, lista kluczy dla many-to-many"""
+    field = instance._meta.get_field(name)
+    if name in MASKED_FIELDS:
+        return MASK
+    if field.many_to_many:
+        if instance.pk is None:
+            return []
+        return sorted(getattr(instance, name).values_list('pk', flat=True))
+    return getattr(instance, field.attname)
+
+
+def model_fields(instance, names):
+    """Nazwy pól modelu spośród ``names`` (pomija pola formularza / serializera spoza modelu)"""
+    fields = []
+    for name in names:
+        try:
+            field = instance._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete or field.many_to_many:
+            fields.append(name)
+    return fields
+
+
+def snapshot(instance, names):
+    return {name: field_value(instance, name) for name in model_fields(instance, names)}
+
+
+def diff(before, after):
+    """Zmiany między dwoma migawkami (pola maskowane - zawsze, gdy zostały podane)"""
+    return {
+        name: {'old': before.get(name), 'new': value}
+        for name, value in after.items()
+        if name in MASKED_FIELDS or before.get(name) != value
+    }
+
+
+def plain_value(name, value):
+    """Wartość z danych formularza / serializera w postaci zgodnej z ``field_value``"""
+    if name in MASKED_FIELDS:
+        return MASK
+    if isinstance(value, (list, tuple, set, QuerySet)):
+        return sorted(getattr(item, 'pk', item) for item in value)
+    return getattr(value, 'pk', value)
+
+
+def submitted(instance, data):
+    """Nowe wartości pól modelu z ``validated_data`` (bez odczytu z bazy)"""
+    return {name: plain_value(name, data[name]) for name in model_fields(instance, data)}
+
+
+# --- Zapis wpisów ---
+
+def record(instance, action, changes, source):
+    """Dodaje wpis do bufora po zatwierdzeniu bieżącej transakcji"""
+    if not changes and action == UPDATE or not is_audited(type(instance)):
+        return
+    entry = AuditEntry(
+        zoo_id=getattr(instance, 'zoo_id', None) or current_zoo_id(),
+        created_at=timezone.now(),
+        actor_id=current_actor_id(),
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        source=source,
+        changes=changes,
+    )
+    using = router.db_for_write(AuditEntry)
+    transaction.on_commit(partial(buffer.add, using, entry), using=instance._state.db or using)
+
+
+def record_created(instance, values, source):
+    record(instance, CREATE, {name: {'new': value} for name, value in values.items()}, source)
+
+
+def record_form(form, adding, source):
+    """Zmiany zapisanego formularza ModelForm (poprzednie wartości z ``form.initial``)"""
+    instance = form.instance
+    if adding:
+        record_created(instance, submitted(instance, form.cleaned_data), source)
+        return
+    names = model_fields(instance, form.changed_data)
+    before = {name: plain_value(name, form.initial.get(name)) for name in names}
+    after = {name: plain_value(name, form.cleaned_data[name]) for name in names if name in form.cleaned_data}
+    record(instance, UPDATE, diff(before, after), source)
+
+
+class AuditBuffer:
+    """Bufor wpisów procesu zapisywany zbiorczo przez wątek w tle"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._entries = []
+        self._pid = None
+        self.dropped = 0
+
+    def add(self, using, entry):
+        with self._lock:
+            self._ensure_thread()
+            self._entries.append((using, entry))
+            size = len(self._entries)
+        if size >= settings.AUDIT_MAX_BUFFER:
+            # Wątek zapisu nie nadąża - zapis od razu zamiast gubienia wpisów
+            self.flush()
+        elif size >= settings.AUDIT_BATCH_SIZE:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        # Pierwszy wpis w procesie (także po fork() - wątki rodzica nie istnieją)
+        self._pid = os.getpid()
+        self._entries = []
+        threading.Thread(target=self._run, name='audit-writer', daemon=True).start()
+
+    def flush(self):
+        """Zapisuje zebrane wpisy; zwraca liczbę zapisanych"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._entries = self._entries, []
+            by_alias = {}
+            for using, entry in pending:
+                by_alias.setdefault(using, []).append(entry)
+            written = 0
+            for using, entries in by_alias.items():
+                try:
+                    AuditEntry.objects.using(using).bulk_create(entries, batch_size=settings.AUDIT_BATCH_SIZE)  # type: ignore
+                except DatabaseError:
+                    logger.exception('Zapis %s wpisów dziennika zmian do bazy %s nie powiódł się', len(entries), using)
+                    self._requeue(using, entries)
+                else:
+                    written += len(entries)
+            return written
+
+    def _requeue(self, using, entries):
+        """Wpisy wracają do bufora na kolejną próbę; nadmiar ponad limit jest odrzucany"""
+        with self._lock:
+            self._entries[:0] = [(using, entry) for entry in entries]
+            overflow = len(self._entries) - settings.AUDIT_MAX_BUFFER
+            if overflow > 0:
+                del self._entries[:overflow]
+                self.dropped += overflow
+                logger.error('Odrzucono %s najstarszych wpisów dziennika zmian', overflow)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.AUDIT_FLUSH_SECONDS)
+            self._wakeup.clear()
+            if not self._entries:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Błąd wątku zapisu dziennika zmian')
+            finally:
+                # Wątek nie jest obsługiwany przez cykl żądań Django
+                close_old_connections()
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+# --- Punkty zbierania zmian ---
+
+class AuditMiddleware:
+    """Ustala autora zmian wykonywanych w żądaniu"""
+
+    def __init__(self, get_response):
+        if not settings.AUDIT_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with acting_as(request):
+            return self.get_response(request)
+
+
+class AuditedViewSetMixin:
+    """Zapisuje zmiany pól z ``validated_data`` przy tworzeniu i edycji przez API"""
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        record_created(serializer.instance, submitted(serializer.instance, serializer.validated_data), 'api')
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        # Poprzednie wartości - z obiektu wczytanego przez get_object()
+        before = snapshot(instance, serializer.validated_data) if is_audited(type(instance)) else None
+        super().perform_update(serializer)
+        if before is not None:
+            record(instance, UPDATE, diff(before, submitted(instance, serializer.validated_data)), 'api')
+
+
+class AuditedFormMixin:
+    """Zapisuje zmiany formularza ModelForm zapisywanego z ``commit=True``"""
+
+    def save(self, commit=True):
+        adding = self.instance._state.adding
+        instance = super().save(commit)
+        if commit:
+            record_form(self, adding, 'form')
+        return instance
+
+
+class AuditedAdminMixin:
+    """Zapisuje zmiany wprowadzone w panelu administracyjnym (po zapisie relacji many-to-many)"""
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        record_form(form, not change, 'admin')
+
+
+@receiver(fields_updated)
+def record_fields_updated(sender, pk, row, previous, fields=(), **kwargs):
+    if not is_audited(sender):
+        return
+    instance = sender(**{name: value for name, value in row.items()})
+    instance._state.adding = False
+    instance._state.db = kwargs.get('using')
+    changes = {}
+    for name in fields:
+        field = sender._meta.get_field(name)
+        change = {'new': MASK if field.name in MASKED_FIELDS else row[field.attname]}
+        for key in (field.name, field.attname):
+            if key in previous:
+                change['old'] = previous[key]
+        if change.get('old', MISSING) != change['new']:
+            changes[field.name] = change
+    record(instance, UPDATE, changes, 'api')
+
+
+@receiver(post_delete)
+def record_delete(sender, instance, **kwargs):
+    if not is_audited(sender):
+        return
+    names = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in BOOKKEEPING_FIELDS
+    ]
+    values = snapshot(instance, names)
+    record(instance, DELETE, {name: {'old': value} for name, value in values.items()}, 'delete')
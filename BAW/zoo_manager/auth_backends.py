@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import router
+
+from .auth_cache import get_versioned, permission_scopes, permissions_key, set_versioned, user_key, user_scope
+from .tenants import current_zoo
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend z uprawnieniami w pamięci podręcznej współdzielonej przez
+    procesy (zoo_manager/auth_cache.py).
+
+    ModelBackend wczytuje uprawnienia użytkownika i jego grup z tabel auth
+    przy pierwszym sprawdzeniu w każdym żądaniu. Tu zbiór uprawnień jest
+    czytany z cache jednym zapytaniem i przeliczany tylko po zmianie grup lub
+    uprawnień (sygnały podbijają wtedy wersję).
+
+    Przy ``AUTH_CACHE_USERS`` także pracownik zalogowany sesją jest czytany z
+    cache zamiast z tabeli ``employees`` w każdym żądaniu; zapis pracownika
+    (rola, ``is_active``, hasło) unieważnia wpis.
+
+    Bez ``AUTH_CACHE_PERMISSIONS`` (domyślnie wyłączone bez wspólnego cache)
+    backend działa jak ModelBackend - cache w pamięci procesu nie widziałby
+    odebrania uprawnień w innych procesach przez ``AUTH_CACHE_TIMEOUT``.
+    """
+
+    def get_user(self, user_id):
+        if not settings.AUTH_CACHE_USERS:
+            return super().get_user(user_id)
+        using = router.db_for_write(get_user_model())
+        key = user_key(user_id, using)
+        user, versions = get_versioned(key, (user_scope(user_id, using),))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            set_versioned(key, user, versions)
+        zoo = current_zoo()
+        if zoo is not None and user.zoo_id != zoo.pk:
+            # Jak TenantManager przy odczycie z bazy - pracownik innego zoo
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not settings.AUTH_CACHE_PERMISSIONS:
+            return super().get_all_permissions(user_obj, obj)
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            key = permissions_key(user_obj)
+            perms, versions = get_versioned(key, permission_scopes(user_obj))
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                set_versioned(key, perms, versions)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
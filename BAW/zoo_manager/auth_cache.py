@@ -0,0 +1,148 @@
+"""
+Współdzielona pamięć podręczna danych uwierzytelniania.
+
+Wpisy są kluczowane numerem wersji: zamiast szukać i usuwać nieaktualne
+wpisy, zmiana danych podbija wersję (``bump``), a stare wpisy przestają być
+czytane i wygasają same. Wersje i wpisy leżą w cache ``AUTH_CACHE_ALIAS``
+(settings.CACHES), więc unieważnienie w jednym procesie widzą wszystkie.
+Wersja jest podbijana po zatwierdzeniu transakcji zapisu - wcześniej
+równoległe żądanie mogłoby zapamiętać pod nową wersją stan sprzed zmiany.
+
+Tu także mieszka pamięć uprawnień i zalogowanych pracowników
+(``CachedPermissionBackend`` w zoo_manager/auth_backends.py) oraz odbiorniki
+sygnałów, które ją unieważniają.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Employee
+from .signals import fields_updated
+
+# Wersja wspólna dla wszystkich użytkowników - zmiany grup i uprawnień grup
+GLOBAL_SCOPE = 'all'
+
+
+def auth_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def user_scope(user_or_pk, using=None):
+    """
+    Zakres wersji jednego użytkownika. Baza (zapisu - nigdy replika, z której
+    wczytano obiekt) jest częścią klucza, bo zoo na osobnych bazach mają
+    niezależne identyfikatory.
+    """
+    pk = getattr(user_or_pk, 'pk', user_or_pk)
+    if using is None:
+        using = router.db_for_write(Employee)
+    return f'user:{using}:{pk}'
+
+
+def version_key(scope):
+    return f'auth:version:{scope}'
+
+
+def bump(*scopes, using=None):
+    """Unieważnia wpisy zależne od podanych zakresów po zatwierdzeniu bieżącej transakcji"""
+    transaction.on_commit(lambda: _bump_now(*scopes), using=using)
+
+
+def _bump_now(*scopes):
+    cache = auth_cache()
+    for scope in scopes:
+        key = version_key(scope)
+        # Nowy klucz dostaje wartość różną od domyślnej wersji (0)
+        if not cache.add(key, 1, timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Klucz wygasł lub został usunięty między add() a incr()
+                cache.set(key, 1, timeout=None)
+
+
+def get_versioned(key, scopes):
+    """
+    Zwraca (wartość, wersje): wartość jest None, jeśli wpisu nie ma albo
+    któryś z zakresów zmienił wersję. Jedno zapytanie do cache.
+    """
+    keys = [version_key(scope) for scope in scopes]
+    found = auth_cache().get_many([key, *keys])
+    versions = tuple(found.get(version, 0) for version in keys)
+    entry = found.get(key)
+    if entry is None or entry[0] != versions:
+        return None, versions
+    return entry[1], versions
+
+
+def set_versioned(key, value, versions, timeout=None):
+    timeout = settings.AUTH_CACHE_TIMEOUT if timeout is None else timeout
+    auth_cache().set(key, (versions, value), timeout)
+
+
+# --- Uprawnienia ---
+
+def permissions_key(user):
+    return f'auth:perms:{user_scope(user)}'
+
+
+def permission_scopes(user):
+    return (GLOBAL_SCOPE, user_scope(user))
+
+
+# --- Zalogowani użytkownicy ---
+
+def user_key(pk, using):
+    return f'auth:user:{user_scope(pk, using)}'
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_user(sender, instance, using, **kwargs):
+    # Rola, is_active, hasło (change_password), is_superuser i inne pola
+    # wpływające na uprawnienia i zapamiętany obiekt pracownika
+    bump(user_scope(instance, using), using=using)
+
+
+@receiver(fields_updated, sender=Employee)
+def invalidate_user_on_fields_updated(sender, pk, using, **kwargs):
+    # Szybkie aktualizacje (zoo_manager/fast_updates.py) omijają post_save
+    bump(user_scope(pk, using), using=using)
+
+
+def _invalidate_members(instance, reverse, pk_set, using):
+    if not reverse:
+        bump(user_scope(instance, using), using=using)
+    elif pk_set:
+        bump(*(user_scope(pk, using) for pk in pk_set), using=using)
+    else:
+        # clear() po stronie grupy / uprawnienia - członkowie nieznani
+        bump(GLOBAL_SCOPE, using=using)
+
+
+@receiver(m2m_changed, sender=Employee.groups.through)
+def invalidate_on_groups(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_members(instance, reverse, pk_set, using)
+
+
+@receiver(m2m_changed, sender=Employee.user_permissions.through)
+def invalidate_on_user_permissions(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_members(instance, reverse, pk_set, using)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_on_group_permissions(sender, action, using, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump(GLOBAL_SCOPE, using=using)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Permission)
+def invalidate_on_group_or_permission(sender, using, **kwargs):
+    bump(GLOBAL_SCOPE, using=using)
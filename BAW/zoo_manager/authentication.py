@@ -0,0 +1,63 @@
+"""
+Uwierzytelnianie JWT świadome zoo (zoo_manager/tenants.py).
+
+Tokeny zawierają roszczenie ``zoo`` z identyfikatorem zoo pracownika.
+Zoo jest ustawiane przed pobraniem pracownika, więc zapytanie trafia od razu
+do bazy danego zoo.
+"""
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .tenants import activate, current_zoo, get_zoo
+
+ZOO_CLAIM = 'zoo'
+
+
+def token_for_user(user):
+    """Token odświeżający (z tokenem dostępu w ``.access_token``) z roszczeniem zoo"""
+    return TenantTokenObtainPairSerializer.get_token(user)
+
+
+class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Serializer /api/token/ dodający do tokenów roszczenie zoo"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ZOO_CLAIM] = user.zoo_id
+        return token
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        active = current_zoo()
+        zoo_id = validated_token.get(ZOO_CLAIM)
+        if zoo_id is not None:
+            if active is not None and active.pk != zoo_id:
+                raise AuthenticationFailed('Token został wydany dla innego zoo', code='wrong_zoo')
+            zoo = get_zoo(zoo_id)
+            if zoo is None:
+                raise AuthenticationFailed('Nieznane zoo w tokenie', code='unknown_zoo')
+            activate(zoo)
+
+        user = super().get_user(validated_token)
+        if current_zoo() is None:
+            # Tokeny wydane przed wprowadzeniem roszczenia zoo
+            activate(get_zoo(user.zoo_id))
+        return user
+
+
+def request_user(request):
+    """
+    Użytkownik sesji albo tokenu JWT - dla middleware, które działa przed
+    uwierzytelnieniem DRF (w widoku); None dla anonimowych
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = TenantJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return result[0] if result else None
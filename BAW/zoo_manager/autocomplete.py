@@ -0,0 +1,69 @@
+"""
+Wyszukiwanie podpowiedzi dla pól wyboru (``/api/autocomplete/<źródło>/``).
+
+Formularze i panel administracyjny nie renderują już wszystkich pracowników,
+wybiegów, grup i uprawnień jako ``<option>`` - widżety z zoo_manager/widgets.py
+pobierają kolejne strony pasujących wierszy w trakcie pisania.
+
+Pola wyszukiwania zapisuje się jak ``search_fields`` w panelu
+administracyjnym: ``^pole`` dopasowuje początek wartości (``istartswith``,
+na PostgreSQL obsługiwane indeksami ``UPPER(kolumna) text_pattern_ops`` z
+migracji 0014), samo ``pole`` - dowolny fragment (małe tabele słownikowe).
+Każde słowo zapytania musi pasować do któregoś z pól źródła.
+"""
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.db.models import Q
+
+from .models import Employee, Enclosure
+
+# queryset: funkcja zwracająca queryset (wywoływana w żądaniu - bieżące zoo),
+# search: pola wyszukiwania, ordering: kolejność wyników
+Source = namedtuple('Source', ['queryset', 'search', 'ordering'])
+
+SOURCES = {
+    'employees': Source(
+        lambda: Employee.objects.only('id', 'imie', 'nazwisko', 'username'),  # type: ignore
+        ('^nazwisko', '^imie', '^username'),
+        ('nazwisko', 'imie', 'id'),
+    ),
+    'enclosures': Source(
+        lambda: Enclosure.objects.only('id', 'name'),  # type: ignore
+        ('^name',),
+        ('name', 'id'),
+    ),
+    'groups': Source(
+        lambda: Group.objects.all(),  # type: ignore
+        ('name',),
+        ('name',),
+    ),
+    'permissions': Source(
+        lambda: Permission.objects.select_related('content_type'),  # type: ignore
+        ('name', 'codename', 'content_type__app_label'),
+        ('content_type__app_label', 'content_type__model', 'codename'),
+    ),
+}
+
+
+def _lookup(field):
+    if field.startswith('^'):
+        return f'{field[1:]}__istartswith'
+    return f'{field}__icontains'
+
+
+def search(source, term='', page=1):
+    """Zwraca (wyniki, czy_są_kolejne) dla strony ``page`` wyników wyszukiwania"""
+    spec = SOURCES[source]
+    queryset = spec.queryset()
+    for word in term.split():
+        queryset = queryset.filter(reduce(or_, (Q(**{_lookup(field): word}) for field in spec.search)))
+
+    size = settings.AUTOCOMPLETE_PAGE_SIZE
+    offset = (max(page, 1) - 1) * size
+    # Jeden wiersz więcej mówi, czy istnieje kolejna strona
+    rows = list(queryset.order_by(*spec.ordering)[offset:offset + size + 1])
+    return [{'id': obj.pk, 'text': str(obj)} for obj in rows[:size]], len(rows) > size
@@ -0,0 +1,118 @@
+"""
+Wykonywanie wielu żądań API w jednym żądaniu HTTP (``/api/batch/``).
+
+Strony frontendu przy starcie pobierają kilka list naraz. Zamiast kilku
+osobnych żądań - każde z własną weryfikacją JWT i pobraniem użytkownika -
+klient wysyła jedno żądanie z listą pod-żądań. Pod-żądania trafiają do tych
+samych widoków co zwykłe żądania (przez resolver URL), ale z już
+uwierzytelnionym użytkownikiem żądania nadrzędnego.
+
+Pod-żądania wykonywane są kolejno, w podanej kolejności, w wątku żądania -
+na jego trwałym połączeniu z bazą (``CONN_MAX_AGE``). Osobne wątki
+otwierałyby nowe połączenia (z uzgadnianiem TLS) dla każdego pod-żądania,
+co kosztuje więcej niż kilka małych zapytań wykonanych po sobie. Batch samych
+odczytów czyta z replik tak jak zwykłe żądania GET (chyba że klient jest
+przypięty do bazy głównej) i nie przypina klienta, mimo że jest wysyłany
+metodą POST.
+"""
+import io
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework.renderers import JSONRenderer
+
+from .db_router import is_pinned, use_replica
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class BatchError(ValueError):
+    """Nieprawidłowa definicja pod-żądania"""
+
+
+def _build_request(parent, method, path, body):
+    """Tworzy pod-żądanie z uwierzytelnionym użytkownikiem żądania nadrzędnego"""
+    url = urlsplit(path)
+    payload = JSONRenderer().render(body) if body is not None else b''
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': parent.META.get('SERVER_NAME', 'localhost'),
+        'SERVER_PORT': parent.META.get('SERVER_PORT', '80'),
+        'REMOTE_ADDR': parent.META.get('REMOTE_ADDR', ''),
+        'HTTP_HOST': parent.get_host(),
+        'HTTP_ACCEPT': 'application/json',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+        'wsgi.url_scheme': parent.scheme,
+    }
+    request = WSGIRequest(environ)
+    request.COOKIES = parent.COOKIES
+    # DRF pomija wtedy uwierzytelnianie (ponowną weryfikację JWT i odczyt
+    # użytkownika) i używa podanego użytkownika
+    request._force_auth_user = parent.user
+    return request
+
+
+def _dispatch(parent, api_root, spec):
+    method = spec['method']
+    path = api_root + spec['path'].lstrip('/')
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return {'status': 404, 'body': {'detail': 'Nie znaleziono.'}}
+
+    try:
+        response = match.func(_build_request(parent, method, path, spec.get('body')), *match.args, **match.kwargs)
+    except Exception:
+        # Błąd jednego pod-żądania nie przerywa pozostałych
+        logger.exception('Błąd pod-żądania %s %s', method, path)
+        return {'status': 500, 'body': {'detail': 'Błąd serwera.'}}
+    if hasattr(response, 'data'):
+        # Odpowiedź DRF - dane zostaną wyrenderowane raz, razem z całym batchem
+        body = response.data
+    else:
+        body = response.content.decode(response.charset or 'utf-8')
+    return {'status': response.status_code, 'body': body}
+
+
+def validate(specs):
+    """Sprawdza listę pod-żądań i zwraca ją w postaci znormalizowanej"""
+    if not isinstance(specs, list) or not specs:
+        raise BatchError('Pole requests musi być niepustą listą')
+    if len(specs) > settings.BATCH_MAX_REQUESTS:
+        raise BatchError(f'Maksymalna liczba pod-żądań to {settings.BATCH_MAX_REQUESTS}')
+
+    normalized = []
+    for spec in specs:
+        if not isinstance(spec, dict) or not isinstance(spec.get('path'), str):
+            raise BatchError('Każde pod-żądanie musi mieć pole path')
+        method = str(spec.get('method', 'GET')).upper()
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f'Niedozwolona metoda: {method}')
+        if spec['path'].lstrip('/').startswith('batch'):
+            raise BatchError('Pod-żądania nie mogą wywoływać /api/batch/')
+        normalized.append({'method': method, 'path': spec['path'], 'body': spec.get('body')})
+    return normalized
+
+
+def is_read_only(specs):
+    return all(spec['method'] == 'GET' for spec in specs)
+
+
+def run(parent, api_root, specs):
+    """Wykonuje pod-żądania i zwraca listę odpowiedzi w kolejności żądań"""
+    if not is_read_only(specs):
+        return [_dispatch(parent, api_root, spec) for spec in specs]
+    # Żądanie nadrzędne (POST) działa w trybie bazy głównej - odczyty
+    # kierujemy na repliki tak, jak zrobiłby to ReplicaRoutingMiddleware dla GET
+    with use_replica(not is_pinned(parent)):
+        return [_dispatch(parent, api_root, spec) for spec in specs]
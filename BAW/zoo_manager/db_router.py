@@ -0,0 +1,137 @@
+"""
+Kierowanie zapytań tylko do odczytu na repliki bazy danych.
+
+Repliki to aliasy z ``settings.DATABASE_REPLICAS``. Zapytania odczytu trafiają
+na replikę tylko wtedy, gdy w bieżącym kontekście włączono tryb repliki
+(``ReplicaRoutingMiddleware`` robi to dla bezpiecznych metod HTTP albo
+ręcznie przez ``use_replica()``). Zapisy zawsze idą do bazy głównej.
+
+Dane zoo przeniesionego na osobną bazę (``Zoo.database``, zoo_manager/tenants.py)
+są czytane i zapisywane wyłącznie w tej bazie; rejestr zoo pozostaje w bazie
+głównej.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .tenants import current_zoo
+
+PRIMARY_DB = 'default'
+
+# Modele wspólne dla wszystkich zoo - zawsze w bazie głównej
+SHARED_MODELS = {'zoo_manager.zoo'}
+
+# Nazwa ciasteczka przypinającego klienta do bazy głównej po zapisie
+PIN_COOKIE = 'zoo_primary_pin'
+# Atrybut żądania modyfikującego tylko z metody HTTP, które niczego nie zapisało
+READ_ONLY_ATTR = 'zoo_read_only'
+
+_use_replica = ContextVar('zoo_use_replica', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def tenant_aliases():
+    return getattr(settings, 'ZOO_TENANT_DATABASES', [])
+
+
+def tenant_alias(model):
+    """Baza z danymi bieżącego zoo (główna, gdy zoo nie jest ustalone)"""
+    zoo = current_zoo()
+    if zoo is None or model._meta.label_lower in SHARED_MODELS:
+        return PRIMARY_DB
+    return zoo.database
+
+
+def read_alias():
+    """Alias bazy, z której powinny czytać zapytania w bieżącym kontekście"""
+    replicas = replica_aliases()
+    if _use_replica.get() and replicas:
+        return random.choice(replicas)
+    return PRIMARY_DB
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Włącza (lub wyłącza) czytanie z replik w obrębie bloku with"""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def is_pinned(request):
+    """Czy klient jest przypięty do bazy głównej po niedawnym zapisie"""
+    return PIN_COOKIE in request.COOKIES
+
+
+def mark_read_only(request):
+    """
+    Oznacza żądanie POST/PUT/... jako odczyt (np. ``/api/batch/`` z samymi
+    GET) - klient nie zostanie po nim przypięty do bazy głównej
+    """
+    setattr(getattr(request, '_request', request), READ_ONLY_ATTR, True)
+
+
+def use_primary():
+    """Wymusza czytanie z bazy głównej w obrębie bloku with"""
+    return use_replica(False)
+
+
+class ReplicaRouter:
+    """
+    Router bazy danych: odczyty na repliki, zapisy i migracje na bazę główną
+    albo - dla zoo na osobnej bazie - wszystko na bazę tego zoo
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = tenant_alias(model)
+        return read_alias() if alias == PRIMARY_DB else alias
+
+    def db_for_write(self, model, **hints):
+        return tenant_alias(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *replica_aliases(), *tenant_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Kieruje odczyty bezpiecznych żądań (GET/HEAD/OPTIONS) na repliki.
+
+    Po każdym żądaniu modyfikującym klient dostaje na krótko ciasteczko
+    przypinające go do bazy głównej, dzięki czemu widzi własne zapisy mimo
+    opóźnienia replikacji (read-your-writes).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        pinned = is_pinned(request)
+
+        with use_replica(safe and not pinned):
+            response = self.get_response(request)
+
+        if not safe and not getattr(request, READ_ONLY_ATTR, False):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,146 @@
+"""
+Wąska ścieżka zapisu: zmiana kilku pól jednym poleceniem UPDATE.
+
+Zamiast pobierać obiekt, sprawdzać uprawnienia na relacjach i zapisywać
+wszystkie kolumny, warunki autoryzacji trafiają do klauzuli WHERE
+(``WHERE id = ? AND employee_id = ?``), a zmieniony wiersz wraca przez
+``RETURNING``. Opcjonalna kontrola wersji (``AND version = ?``) zastępuje
+blokady wierszy. Dodatkowe zapytanie wykonywane jest tylko wtedy, gdy
+UPDATE nie trafił w żaden wiersz - aby rozróżnić 404, 403 i 409.
+
+UPDATE omija sygnały pre_save/post_save, dlatego po zmianie wysyłany jest
+sygnał ``fields_updated`` (zoo_manager/signals.py).
+
+Wiersze innych zoo niż bieżące (zoo_manager/tenants.py) są traktowane jak
+nieistniejące.
+"""
+from collections import namedtuple
+
+from django.db import connections, router, transaction
+from django.db.models import F, Q
+from django.db.models.sql import UpdateQuery
+
+from .sequences import change_seq_expression
+from .signals import fields_updated
+from .tenants import tenant_q
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+CONFLICT = 'conflict'
+
+# row: stan wiersza po zmianie (UPDATED) lub aktualny stan przy konflikcie wersji
+UpdateResult = namedtuple('UpdateResult', ['status', 'row'])
+
+
+def _execute(model, pk, values, condition, using):
+    """Wykonuje UPDATE ... RETURNING i zwraca zmieniony wiersz jako słownik (lub None)"""
+    query = UpdateQuery(model)
+    query.add_update_values(values)
+    query.add_q(condition)
+    sql, params = query.get_compiler(using).as_sql()
+
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    with connection.cursor() as cursor:
+        if connection.features.can_return_columns_from_insert:
+            columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+            cursor.execute(f'{sql} RETURNING {columns}', params)
+            rows = cursor.fetchall()
+        else:
+            cursor.execute(sql, params)
+            if not cursor.rowcount:
+                return None
+            return model._base_manager.using(using).filter(pk=pk).values().first()
+
+    if not rows:
+        return None
+    # Konwersja surowych wartości tak, jak przy zwykłym odczycie przez ORM
+    compiler = model._base_manager.using(using).all().query.get_compiler(using)
+    converters = compiler.get_converters([field.get_col(model._meta.db_table) for field in fields])
+    if converters:
+        rows = compiler.apply_converters(rows, converters)
+    return dict(zip((field.attname for field in fields), next(iter(rows))))
+
+
+def _with_bookkeeping(model, values, using):
+    """Dokłada do zmian podbicie wersji i nowy numer zmiany (synchronizacja)"""
+    changes = dict(values)
+    names = {field.name for field in model._meta.concrete_fields}
+    if 'version' in names:
+        changes['version'] = F('version') + 1
+    if 'change_seq' in names:
+        changes['change_seq'] = change_seq_expression(using)
+    return changes
+
+
+def _tenant_scope(model):
+    """Ograniczenie do bieżącego zoo dla modeli, które mają klucz zoo"""
+    if any(field.name == 'zoo' for field in model._meta.concrete_fields):
+        return tenant_q()
+    return Q()
+
+
+def _diagnose(model, pk, where, using):
+    """Ustala, dlaczego UPDATE nie zmienił wiersza"""
+    current = model._base_manager.using(using).filter(_tenant_scope(model), pk=pk).values().first()
+    if current is None:
+        return UpdateResult(NOT_FOUND, None)
+    if any(current[field] != value for field, value in where.items()):
+        return UpdateResult(FORBIDDEN, None)
+    return UpdateResult(CONFLICT, current)
+
+
+def update_fields(model, pk, values, where=None, version=None, toggles=(), derived=None, using=None):
+    """
+    Zmienia pola ``values`` wiersza ``pk`` jednym poleceniem UPDATE.
+
+    ``where`` - dodatkowe warunki autoryzacji (np. ``{'employee_id': user.id}``),
+    ``version`` - oczekiwana wersja wiersza (None = bez kontroli),
+    ``toggles`` - pola logiczne z ``values``, których poprzednią wartość
+    trzeba znać (np. dla raportów). Warunek ``pole != nowa wartość`` w WHERE
+    mówi, jaka była poprzednia wartość, bez jej odczytywania,
+    ``derived`` - kolumny wyliczane z ``values`` (np. znaczniki czasu) -
+    zapisywane razem z nimi, ale same nie stanowią zmiany wiersza.
+
+    Pola zmieniane i jednocześnie zawężone w ``where`` (np. przejęcie zadania
+    z ``where={'employee_id': None}``) także mają znaną poprzednią wartość.
+    """
+    using = using or router.db_for_write(model)
+    where = where or {}
+    derived = derived or {}
+    condition = Q(pk=pk, **where) & _tenant_scope(model)
+    if version is not None:
+        condition &= Q(version=version)
+
+    if not values:
+        row = model._base_manager.using(using).filter(condition).values().first()
+        return UpdateResult(UPDATED, row) if row is not None else _diagnose(model, pk, where, using)
+
+    with transaction.atomic(using=using):
+        pinned = Q()
+        for field in toggles:
+            pinned &= ~Q(**{field: values[field]})
+        row = _execute(model, pk, _with_bookkeeping(model, {**values, **derived}, using), condition & pinned, using)
+        known = {field: value for field, value in where.items() if field in values}
+        previous = {**known, **{field: not values[field] for field in toggles}}
+        changed = [*values, *derived]
+
+        if row is None and toggles:
+            # Pola logiczne miały już docelowe wartości - zmieniamy tylko pozostałe
+            condition &= Q(**{field: values[field] for field in toggles})
+            remaining = {field: value for field, value in values.items() if field not in toggles}
+            previous = known
+            changed = [*remaining, *derived]
+            if remaining:
+                row = _execute(model, pk, _with_bookkeeping(model, {**remaining, **derived}, using), condition, using)
+            else:
+                row = model._base_manager.using(using).filter(condition).values().first()
+                if row is not None:
+                    # Nic do zmiany
+                    return UpdateResult(UPDATED, row)
+
+        if row is None:
+            return _diagnose(model, pk, where, using)
+        fields_updated.send(sender=model, pk=pk, row=row, previous=previous, fields=changed, using=using)
+    return UpdateResult(UPDATED, row)
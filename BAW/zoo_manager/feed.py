@@ -0,0 +1,253 @@
+"""
+Kanał "moja zmiana" pracownika (``/api/me/feed/``).
+
+Ekran startowy pracownika potrzebuje jego nieukończonych zadań, wybiegów z
+``Employee.enclosures``, zwierząt z tych wybiegów i informacji, które z nich
+są chore. Zamiast składać to przy odczycie, każdy pracownik ma w tabeli
+``feed_items`` gotowe wpisy (dane w JSON), a odczyt kanału to jedno zapytanie
+po kluczu pracownika - niezależnie od wielkości zoo.
+
+Wpisy są utrzymywane przyrostowo przez odbiorniki sygnałów:
+
+- zadanie - ``post_save``/``post_delete`` i ``fields_updated`` (szybka
+  ścieżka, przejęcie zadania); wpis ma tylko przypisany pracownik, dopóki
+  zadanie nie jest ukończone,
+- zwierzę - ``post_save``/``post_delete`` i ``fields_updated`` (stan
+  zdrowia); wpis mają wszyscy pracownicy jego wybiegu,
+- wybieg - zmiana nazwy i usunięcie,
+- przypisania ``Employee.enclosures`` - ``m2m_changed`` dodaje lub usuwa
+  wpisy wybiegu i jego zwierząt u danego pracownika.
+
+Zmiany z pominięciem sygnałów (surowe SQL, odtworzenie kopii) wymagają
+przebudowania kanałów: ``manage.py rebuild_feeds``.
+"""
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Animal, Employee, Enclosure, FeedItem, Task
+from .signals import fields_updated
+
+TASK = 'task'
+ENCLOSURE = 'enclosure'
+ANIMAL = 'animal'
+
+# Rodzaj wpisu -> klucz listy w odpowiedzi
+SECTIONS = {TASK: 'tasks', ENCLOSURE: 'enclosures', ANIMAL: 'animals'}
+
+Assignment = Employee.enclosures.through
+
+
+# --- Dane wpisów ---
+
+def task_data(task):
+    return {
+        'id': task.pk,
+        'task_type': task.task_type.name,
+        'task_timestamp': task.task_timestamp,
+        'enclosure': task.enclosure_id,
+        'comments': task.comments,
+        'started_at': task.started_at,
+        'version': task.version,
+    }
+
+
+def enclosure_data(enclosure):
+    return {'id': enclosure.pk, 'name': enclosure.name}
+
+
+def animal_data(animal):
+    return {
+        'id': animal.pk,
+        'species': animal.species,
+        'name': animal.name,
+        'gender': animal.gender,
+        'enclosure': animal.enclosure_id,
+        'health': animal.health,
+        'sick_since': animal.sick_since,
+        'version': animal.version,
+    }
+
+
+def _item(employee_id, kind, obj, data, enclosure_id):
+    return FeedItem(
+        zoo_id=obj.zoo_id, employee_id=employee_id, kind=kind, object_id=obj.pk, enclosure_id=enclosure_id, data=data,
+    )
+
+
+def _upsert(items, using):
+    if items:
+        FeedItem.objects.using(using).bulk_create(  # type: ignore
+            items, update_conflicts=True,
+            unique_fields=['employee', 'kind', 'object_id'], update_fields=['enclosure_id', 'data'],
+        )
+
+
+def _staff(enclosure_ids, using):
+    """Pary (pracownik, wybieg) przypisań z ``Employee.enclosures``"""
+    return list(Assignment.objects.using(using).filter(  # type: ignore
+        enclosure_id__in=enclosure_ids
+    ).values_list('employee_id', 'enclosure_id'))
+
+
+# --- Aktualizacja przyrostowa ---
+
+def sync_task(task, using):
+    """Nieukończone zadanie jest w kanale przypisanego pracownika, poza tym - w żadnym"""
+    owner = task.employee_id if not task.is_completed else None
+    FeedItem.objects.using(using).filter(kind=TASK, object_id=task.pk).exclude(employee_id=owner).delete()  # type: ignore
+    if owner is not None:
+        _upsert([_item(owner, TASK, task, task_data(task), task.enclosure_id)], using)
+
+
+def sync_animal(animal, using):
+    """Zwierzę jest w kanałach pracowników swojego wybiegu"""
+    staff = [employee_id for employee_id, _ in _staff([animal.enclosure_id], using)] if animal.enclosure_id else []
+    FeedItem.objects.using(using).filter(kind=ANIMAL, object_id=animal.pk).exclude(employee_id__in=staff).delete()  # type: ignore
+    data = animal_data(animal)
+    _upsert([_item(employee_id, ANIMAL, animal, data, animal.enclosure_id) for employee_id in staff], using)
+
+
+def add_assignments(pairs, using):
+    """Wpisy wybiegów i ich zwierząt dla nowych par (pracownik, wybieg)"""
+    enclosure_ids = {enclosure_id for _, enclosure_id in pairs}
+    enclosures = {enclosure.pk: enclosure for enclosure in Enclosure.objects.using(using).filter(pk__in=enclosure_ids)}  # type: ignore
+    animals = list(Animal.objects.using(using).filter(enclosure_id__in=enclosure_ids))  # type: ignore
+    items = []
+    for employee_id, enclosure_id in pairs:
+        enclosure = enclosures.get(enclosure_id)
+        if enclosure is not None:
+            items.append(_item(employee_id, ENCLOSURE, enclosure, enclosure_data(enclosure), enclosure_id))
+        items.extend(
+            _item(employee_id, ANIMAL, animal, animal_data(animal), enclosure_id)
+            for animal in animals if animal.enclosure_id == enclosure_id
+        )
+    _upsert(items, using)
+
+
+def remove_assignments(employee_ids, enclosure_ids, using):
+    FeedItem.objects.using(using).filter(  # type: ignore
+        employee_id__in=employee_ids, enclosure_id__in=enclosure_ids, kind__in=[ENCLOSURE, ANIMAL]
+    ).delete()
+
+
+# --- Odczyt i przebudowa ---
+
+def read_feed(employee_id):
+    """Kanał pracownika - jedno zapytanie"""
+    feed = {section: [] for section in SECTIONS.values()}
+    for kind, data in FeedItem.objects.filter(employee_id=employee_id).values_list('kind', 'data'):  # type: ignore
+        feed[SECTIONS[kind]].append(data)
+    feed['tasks'].sort(key=lambda task: (task['task_timestamp'], task['id']))
+    feed['enclosures'].sort(key=lambda enclosure: (enclosure['name'], enclosure['id']))
+    feed['animals'].sort(key=lambda animal: (animal['species'], animal['name'], animal['id']))
+    feed['sick_animals'] = [animal['id'] for animal in feed['animals'] if not animal['health']]
+    return feed
+
+
+def rebuild(employee_ids=None):
+    """Buduje od zera kanały pracowników bieżącego zoo (None = wszystkich); zwraca liczbę wpisów"""
+    using = router.db_for_write(FeedItem)
+    employees = Employee.objects.using(using).all()  # type: ignore
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    employees = employees.values('pk')
+    tasks = Task.objects.using(using).select_related('task_type').filter(  # type: ignore
+        is_completed=False, employee_id__in=employees
+    )
+    pairs = list(Assignment.objects.using(using).filter(employee_id__in=employees).values_list(  # type: ignore
+        'employee_id', 'enclosure_id'
+    ))
+    with transaction.atomic(using=using):
+        FeedItem.objects.using(using).filter(employee_id__in=employees).delete()  # type: ignore
+        _upsert([_item(task.employee_id, TASK, task, task_data(task), task.enclosure_id) for task in tasks], using)
+        add_assignments(pairs, using)
+    return FeedItem.objects.using(using).filter(employee_id__in=employees).count()  # type: ignore
+
+
+# --- Odbiorniki sygnałów ---
+
+def _from_row(model, row, using):
+    instance = model(**row)
+    instance._state.adding = False
+    instance._state.db = using
+    return instance
+
+
+@receiver(post_save, sender=Task)
+def update_feed_on_task_save(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        sync_task(instance, using)
+
+
+@receiver(post_delete, sender=Task)
+def update_feed_on_task_delete(sender, instance, using, **kwargs):
+    # Ukończone zadania (np. archiwizowane) nie mają wpisów
+    if instance.employee_id and not instance.is_completed:
+        FeedItem.objects.using(using).filter(kind=TASK, object_id=instance.pk).delete()  # type: ignore
+
+
+@receiver(post_save, sender=Animal)
+def update_feed_on_animal_save(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        sync_animal(instance, using)
+
+
+@receiver(post_delete, sender=Animal)
+def update_feed_on_animal_delete(sender, instance, using, **kwargs):
+    FeedItem.objects.using(using).filter(kind=ANIMAL, object_id=instance.pk).delete()  # type: ignore
+
+
+@receiver(fields_updated, sender=Task)
+@receiver(fields_updated, sender=Animal)
+def update_feed_on_fields_updated(sender, row, using, **kwargs):
+    instance = _from_row(sender, row, using)
+    if sender is Task:
+        sync_task(instance, using)
+    else:
+        sync_animal(instance, using)
+
+
+@receiver(post_save, sender=Enclosure)
+def update_feed_on_enclosure_save(sender, instance, created, raw=False, using=None, **kwargs):
+    # Nowy wybieg nie ma jeszcze przypisanych pracowników
+    if not raw and not created:
+        FeedItem.objects.using(using).filter(  # type: ignore
+            kind=ENCLOSURE, object_id=instance.pk
+        ).update(data=enclosure_data(instance))
+
+
+@receiver(pre_delete, sender=Enclosure)
+def update_feed_before_enclosure_delete(sender, instance, using, **kwargs):
+    remove_assignments(Assignment.objects.using(using).filter(enclosure=instance).values('employee_id'), [instance.pk], using)  # type: ignore
+    # SET_NULL zmienia wybieg zadań z pominięciem save() - wpisy odświeża post_delete
+    instance._feed_tasks = list(
+        Task.objects.using(using).filter(enclosure=instance, is_completed=False, employee__isnull=False)  # type: ignore
+        .values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Enclosure)
+def update_feed_after_enclosure_delete(sender, instance, using, **kwargs):
+    task_ids = getattr(instance, '_feed_tasks', None)
+    if task_ids:
+        for task in Task.objects.using(using).select_related('task_type').filter(pk__in=task_ids):  # type: ignore
+            sync_task(task, using)
+
+
+@receiver(m2m_changed, sender=Assignment)
+def update_feed_on_assignments(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            remove_assignments(Assignment.objects.using(using).filter(enclosure=instance).values('employee_id'), [instance.pk], using)  # type: ignore
+        else:
+            FeedItem.objects.using(using).filter(employee=instance, kind__in=[ENCLOSURE, ANIMAL]).delete()  # type: ignore
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    # instance: pracownik (reverse=False) albo wybieg (reverse=True), pk_set - druga strona
+    pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+    if action == 'post_add':
+        add_assignments(pairs, using)
+    else:
+        remove_assignments({employee for employee, _ in pairs}, {enclosure for _, enclosure in pairs}, using)
@@ -0,0 +1,72 @@
+"""
+Pola modeli o zwartej reprezentacji w bazie.
+
+``CompactChoiceField`` przechowuje pole wyboru jako ``smallint`` (2 bajty
+zamiast tekstu w każdym wierszu i indeksie), ale w Pythonie, szablonach,
+formularzach i API jego wartością nadal jest tekst - ``user.role ==
+'manager'`` i ``filter(role='manager')`` działają jak wcześniej.
+"""
+from django.core import exceptions
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class CompactChoiceField(models.PositiveSmallIntegerField):
+    """
+    Pole wyboru zapisywane jako mała liczba całkowita.
+
+    ``codes`` mapuje wartości tekstowe na kody w bazie, a ``aliases`` - inne
+    zapisy tych samych wartości (np. ``'M'`` dla ``'male'``). Alias jest
+    zapisywany z kodem swojej wartości, więc odczyt zwraca zawsze postać
+    kanoniczną.
+    """
+
+    def __init__(self, *args, codes=None, aliases=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.aliases = dict(aliases or {})
+        self.values_by_code = {code: value for value, code in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['codes'] = self.codes
+        if self.aliases:
+            kwargs['aliases'] = self.aliases
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Bez walidatorów zakresu liczb z IntegerField - wartością jest tekst
+        return [*self.default_validators, *self._validators]
+
+    def canonical(self, value):
+        """Kanoniczna postać tekstowa wartości (lub jej kodu)"""
+        if value is None:
+            return None
+        code = value if isinstance(value, int) else self.codes.get(self.aliases.get(value, value))
+        if code not in self.values_by_code:
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value},
+            )
+        return self.values_by_code[code]
+
+    def to_python(self, value):
+        return self.canonical(value)
+
+    def pre_save(self, model_instance, add):
+        # Po zapisie obiekt ma postać kanoniczną, tak jak po odczycie z bazy
+        value = self.canonical(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.values_by_code.get(value, value)
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return self.codes[self.aliases.get(value, value)]
+        except KeyError:
+            raise ValueError(f'Pole {self.name!r} nie obsługuje wartości {value!r}') from None
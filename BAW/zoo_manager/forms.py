@@ -1,10 +1,26 @@
 from django import forms
+from django.db import router, transaction
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
-from .models import Employee, Animal, Task, Enclosure
+from .models import Employee, Animal, Task, TaskType, Enclosure
+from .audit import AuditedFormMixin
+from .tenants import TenantQuerySet
+from .task_lifecycle import record_progress
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
-class EmployeeCreationForm(UserCreationForm):
+class TenantFormMixin:
+    """Zawęża listy wyboru (querysety tworzone przy imporcie modułu) do bieżącego zoo"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            queryset = getattr(field, 'queryset', None)
+            if isinstance(queryset, TenantQuerySet):
+                field.queryset = queryset.for_zoo()
+
+class EmployeeCreationForm(AuditedFormMixin, TenantFormMixin, UserCreationForm):
     """Formularz do tworzenia nowego pracownika"""
-    enclosures = forms.ModelMultipleChoiceField(queryset=Enclosure.objects.all(), required=False)  # type: ignore
+    enclosures = forms.ModelMultipleChoiceField(
+        queryset=Enclosure.objects.all(), required=False, widget=AutocompleteSelectMultiple('enclosures')  # type: ignore
+    )
 
     class Meta(UserCreationForm.Meta):
         model = Employee
@@ -17,13 +33,19 @@ class EmployeeCreationForm(UserCreationForm):
         if 'groups' in self.fields:
             self.fields['groups'].required = False
 
-class EmployeeChangeForm(UserChangeForm):
+class EmployeeChangeForm(AuditedFormMixin, TenantFormMixin, UserChangeForm):
     """Formularz do edycji pracownika"""
-    enclosures = forms.ModelMultipleChoiceField(queryset=Enclosure.objects.all(), required=False)  # type: ignore
+    enclosures = forms.ModelMultipleChoiceField(
+        queryset=Enclosure.objects.all(), required=False, widget=AutocompleteSelectMultiple('enclosures')  # type: ignore
+    )
     
     class Meta(UserChangeForm.Meta):
         model = Employee
         fields = ('username', 'imie', 'nazwisko', 'role', 'enclosures', 'is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')
+        widgets = {
+            'groups': AutocompleteSelectMultiple('groups'),
+            'user_permissions': AutocompleteSelectMultiple('permissions'),
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -34,15 +56,17 @@ class EmployeeChangeForm(UserChangeForm):
         if 'user_permissions' in self.fields:
             self.fields['user_permissions'].required = False
 
-class EnclosureForm(forms.ModelForm):
+class EnclosureForm(AuditedFormMixin, TenantFormMixin, forms.ModelForm):
     """Formularz dla modelu Enclosure"""
-    responsible_employees = forms.ModelMultipleChoiceField(queryset=Employee.objects.all(), required=False)  # type: ignore
+    responsible_employees = forms.ModelMultipleChoiceField(
+        queryset=Employee.objects.all(), required=False, widget=AutocompleteSelectMultiple('employees')  # type: ignore
+    )
     
     class Meta:
         model = Enclosure
         fields = ['name', 'responsible_employees']
 
-class TaskCompletionForm(forms.ModelForm):
+class TaskCompletionForm(AuditedFormMixin, forms.ModelForm):
     """Formularz do oznaczania zadań jako ukończone"""
     class Meta:
         model = Task
@@ -55,20 +79,35 @@ class TaskCompletionForm(forms.ModelForm):
             'comments': 'Dodatkowe uwagi'
         }
 
-class AnimalForm(forms.ModelForm):
+    def save(self, commit=True):
+        # completed_at ustawia Task.save(), tu tylko początek pracy
+        record_progress(self.instance)
+        return super().save(commit)
+
+class AnimalForm(AuditedFormMixin, TenantFormMixin, forms.ModelForm):
     """Formularz do dodawania zwierzęcia"""
     class Meta:
         model = Animal
         fields = ('species', 'name', 'gender', 'enclosure')
+        widgets = {
+            'enclosure': AutocompleteSelect('enclosures'),
+        }
 
-class TaskForm(forms.ModelForm):
+class TaskForm(AuditedFormMixin, TenantFormMixin, forms.ModelForm):
     """Formularz do dodawania/przypisywania zadania"""
+    # Typ zadania wpisywany jako tekst, jak przed wprowadzeniem słownika task_types.
+    # Poza Meta.fields - walidacja nie przypisuje go do zadania; typ jest
+    # wyszukiwany lub dopisywany dopiero w save(), razem z zapisem zadania
+    task_type = forms.CharField(label='Typ zadania')
+    field_order = ('task_type', 'employee', 'comments', 'is_completed', 'task_timestamp')
+
     class Meta:
         model = Task
-        fields = ('task_type', 'employee', 'comments', 'is_completed', 'task_timestamp')
+        fields = ('employee', 'comments', 'is_completed', 'task_timestamp')
         widgets = {
             'task_timestamp': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'comments': forms.Textarea(attrs={'rows': 3}),
+            'employee': AutocompleteSelect('employees'),
         }
         help_texts = {
             'task_timestamp': 'Kiedy zadanie ma zostać wykonane lub kiedy zostało zarejestrowane.'
@@ -76,4 +115,11 @@ class TaskForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        pass 
\ No newline at end of file
+        if self.instance.task_type_id:
+            self.initial['task_type'] = self.instance.task_type.name
+
+    def save(self, commit=True):
+        # Odrzucony formularz nie może dopisać typu do wspólnego słownika
+        with transaction.atomic(using=router.db_for_write(TaskType)):
+            self.instance.task_type = TaskType.objects.for_name(self.cleaned_data['task_type'])  # type: ignore
+            return super().save(commit) 
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Klucze idempotencji dla zapisów przez API (nagłówek ``Idempotency-Key``).
+
+Tablety ponawiają POST/PUT/PATCH po przekroczeniu czasu odpowiedzi. Jeśli
+żądanie ma nagłówek ``Idempotency-Key``, pierwsze wykonanie zapisuje
+odpowiedź w cache ``IDEMPOTENCY_CACHE_ALIAS`` na ``IDEMPOTENCY_TTL``
+sekund, a każde powtórzenie z tym samym kluczem dostaje zapisaną odpowiedź
+(z nagłówkiem ``Idempotent-Replayed: true``) bez ponownego wykonania widoku.
+
+Klucze są osobne dla każdego użytkownika. Ten sam klucz użyty dla innego
+żądania (metoda, ścieżka lub treść) daje 422. Powtórzenie, które przyjdzie,
+zanim pierwsze wykonanie się skończy, czeka na jego wynik do
+``IDEMPOTENCY_WAIT_SECONDS`` (potem 409) - widok wykonuje się tylko raz.
+Odpowiedzi 5xx nie są zapamiętywane, więc takie żądanie można ponowić.
+
+Wpisy są zwarte: treść odpowiedzi jest kompresowana zlib. Bez wspólnego
+cache (``REDIS_URL``) powtórzenia są rozpoznawane tylko w obrębie procesu.
+"""
+import hashlib
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+
+from .auth_cache import user_scope
+from .authentication import request_user
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAY_HEADER = 'Idempotent-Replayed'
+METHODS = ('POST', 'PUT', 'PATCH')
+MAX_KEY_LENGTH = 255
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+def idempotency_cache():
+    return caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def store_key(user, key):
+    return f'idempotency:{user_scope(user)}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _entry(fingerprint, response):
+    """Zwarty zapis odpowiedzi (lub None, gdy nie nadaje się do zapamiętania)"""
+    if response.streaming or response.status_code >= 500:
+        return None
+    if len(response.content) > settings.IDEMPOTENCY_MAX_BODY_SIZE:
+        return None
+    return (DONE, fingerprint, response.status_code, list(response.items()), zlib.compress(response.content))
+
+
+def _replay(entry):
+    _, _, status_code, headers, body = entry
+    response = HttpResponse(zlib.decompress(body), status=status_code)
+    for header, value in headers:
+        response[header] = value
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _wait(cache, key):
+    """Czeka na zakończenie trwającego wykonania; zwraca wpis albo None, gdy zniknął"""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        entry = cache.get(key)
+        if entry is None or entry[0] == DONE or time.monotonic() >= deadline:
+            return entry
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+class IdempotencyMiddleware:
+    """Obsługuje nagłówek ``Idempotency-Key`` dla zapisów pod ``/api/`` (zalogowani użytkownicy)"""
+
+    def __init__(self, get_response):
+        if not settings.IDEMPOTENCY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.META.get(HEADER)
+        if key is None or request.method not in METHODS or not request.path.startswith('/api/'):
+            return self.get_response(request)
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            return JsonResponse(
+                {'error': f'Nagłówek Idempotency-Key musi mieć od 1 do {MAX_KEY_LENGTH} znaków'}, status=400
+            )
+        user = request_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        cache = idempotency_cache()
+        key = store_key(user, key)
+        fingerprint = request_fingerprint(request)
+        while not cache.add(key, (PENDING, fingerprint), settings.IDEMPOTENCY_LOCK_SECONDS):
+            entry = _wait(cache, key)
+            if entry is None:
+                # Poprzednie wykonanie zakończyło się błędem - próbujemy przejąć klucz
+                continue
+            if entry[1] != fingerprint:
+                return JsonResponse(
+                    {'error': 'Klucz Idempotency-Key został użyty dla innego żądania'}, status=422
+                )
+            if entry[0] == PENDING:
+                response = JsonResponse(
+                    {'error': 'Żądanie z tym kluczem jest wciąż wykonywane'}, status=409
+                )
+                response['Retry-After'] = '1'
+                return response
+            return _replay(entry)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            cache.delete(key)
+            raise
+        entry = _entry(fingerprint, response)
+        if entry is None:
+            cache.delete(key)
+        else:
+            cache.set(key, entry, settings.IDEMPOTENCY_TTL)
+        return response
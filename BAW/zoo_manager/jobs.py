@@ -0,0 +1,184 @@
+"""
+Prosta kolejka zadań w tle oparta o tabelę ``jobs``.
+
+Funkcje wykonywane w tle rejestruje się dekoratorem ``@job('nazwa')``,
+a zleca przez ``enqueue('nazwa', payload)``. Zadania wykonuje polecenie
+``python manage.py run_jobs`` z pulą wątków lub procesów. Kolejka nie
+wymaga żadnych zewnętrznych usług - wystarczy baza danych aplikacji.
+"""
+import logging
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import audit
+from .models import Job, Task
+from .reports import rebuild
+from .tenants import get_zoo, use_zoo
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def job(name, max_attempts=3):
+    """Dekorator rejestrujący funkcję jako zadanie w tle"""
+    def decorator(func):
+        _registry[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, user=None, delay=0):
+    """
+    Dodaje zadanie do kolejki i zwraca utworzony obiekt Job.
+
+    Przy ``settings.JOBS_RUN_EAGERLY`` zadanie jest wykonywane od razu,
+    co przydaje się w środowisku deweloperskim bez uruchomionego workera.
+    """
+    if name not in _registry:
+        raise ValueError(f'Nieznane zadanie w tle: {name}')
+    queued = Job.objects.create(  # type: ignore
+        name=name,
+        payload=payload or {},
+        max_attempts=_registry[name][1],
+        run_after=timezone.now() + timedelta(seconds=delay),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if settings.JOBS_RUN_EAGERLY:
+        execute(claim(queued.pk))
+        queued.refresh_from_db()
+    return queued
+
+
+def claim(pk=None):
+    """
+    Rezerwuje następne gotowe zadanie (lub zadanie o podanym pk).
+
+    Na PostgreSQL wiersze są blokowane przez SELECT ... FOR UPDATE SKIP LOCKED,
+    więc równoległe workery się nie blokują. Warunkowy UPDATE gwarantuje, że
+    zadanie zarezerwuje tylko jeden worker także na bazach bez blokad wierszy.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = Job.objects.select_for_update(skip_locked=True).filter(  # type: ignore
+            status='queued', run_after__lte=now
+        )
+        if pk is not None:
+            candidates = candidates.filter(pk=pk)
+        candidate = candidates.order_by('run_after', 'id').first()
+        if candidate is None:
+            return None
+        claimed = Job.objects.filter(pk=candidate.pk, status='queued').update(  # type: ignore
+            status='running', attempts=F('attempts') + 1, started_at=now
+        )
+    if not claimed:
+        return None
+    candidate.refresh_from_db()
+    return candidate
+
+
+def execute(claimed):
+    """Wykonuje zarezerwowane zadanie i zapisuje wynik lub planuje ponowienie"""
+    if claimed is None:
+        return
+    func = _registry.get(claimed.name, (None, 0))[0]
+    try:
+        if func is None:
+            raise LookupError(f'Nieznane zadanie w tle: {claimed.name}')
+        # Funkcja widzi dane zoo, w którym zlecono zadanie, a jej zmiany
+        # trafiają do dziennika jako zmiany zlecającego
+        with use_zoo(get_zoo(claimed.zoo_id)), audit.acting_as(claimed.created_by_id):
+            result = func(**claimed.payload)
+    except Exception:
+        claimed.error = traceback.format_exc()
+        if claimed.attempts < claimed.max_attempts:
+            # Wykładnicze opóźnienie kolejnych prób
+            delay = settings.JOBS_RETRY_BASE_DELAY * 2 ** (claimed.attempts - 1)
+            claimed.status = 'queued'
+            claimed.run_after = timezone.now() + timedelta(seconds=delay)
+            logger.warning('Zadanie %s nie powiodło się, ponowienie za %ss', claimed, delay)
+        else:
+            claimed.status = 'failed'
+            claimed.finished_at = timezone.now()
+            logger.error('Zadanie %s nie powiodło się definitywnie', claimed)
+    else:
+        claimed.status = 'succeeded'
+        claimed.result = result
+        claimed.error = None
+        claimed.finished_at = timezone.now()
+    claimed.save(update_fields=['status', 'result', 'error', 'run_after', 'finished_at'])
+
+
+def requeue_stale():
+    """Przywraca do kolejki zadania porzucone przez worker, który przestał działać"""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_STALE_AFTER)
+    return Job.objects.filter(status='running', started_at__lt=cutoff).update(status='queued')  # type: ignore
+
+
+def work(stop_event, poll_interval=1.0, once=False, zoo_id=None):
+    """
+    Pętla workera: rezerwuje i wykonuje zadania aż do ustawienia stop_event.
+    Z ``zoo_id`` obsługuje tylko kolejkę tego zoo (także na jego osobnej bazie).
+    """
+    with use_zoo(get_zoo(zoo_id)):
+        try:
+            while not stop_event.is_set():
+                close_old_connections()
+                try:
+                    claimed = claim()
+                except DatabaseError:
+                    # Np. chwilowa blokada bazy (SQLite) lub zerwane połączenie
+                    logger.exception('Nie udało się pobrać zadania z kolejki')
+                    stop_event.wait(poll_interval)
+                    continue
+                if claimed is None:
+                    if once:
+                        break
+                    stop_event.wait(poll_interval)
+                    continue
+                execute(claimed)
+        finally:
+            connections.close_all()
+
+
+def process_worker(poll_interval, once, zoo_id=None):
+    """Punkt wejścia procesu workera (tryb --mode process)"""
+    import django
+    django.setup()
+    work(threading.Event(), poll_interval, once, zoo_id)
+
+
+# --- Zadania w tle ---
+
+@job('refresh_task_reports')
+def refresh_task_reports(start=None, end=None):
+    """Przeliczenie podsumowań raportów dla zakresu dni"""
+    started = time.monotonic()
+    rows = rebuild(
+        date.fromisoformat(start) if start else None,
+        date.fromisoformat(end) if end else None,
+    )
+    return {'rows': rows, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@job('bulk_assign_tasks')
+def bulk_assign_tasks(task_ids, employee_id):
+    """Przypisanie wielu zadań do pracownika (None = zdjęcie przypisania)"""
+    assigned = 0
+    with transaction.atomic():
+        # Zapis pojedynczych obiektów uruchamia sygnały (raporty itd.)
+        for task in Task.objects.select_for_update().filter(pk__in=task_ids):  # type: ignore
+            if task.employee_id != employee_id:
+                change = {'old': task.employee_id, 'new': employee_id}
+                task.employee_id = employee_id
+                task.save(update_fields=['employee'])
+                audit.record(task, audit.UPDATE, {'employee': change}, 'job')
+                assigned += 1
+    return {'assigned': assigned}
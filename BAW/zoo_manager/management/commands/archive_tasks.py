@@ -0,0 +1,69 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from zoo_manager import audit
+from zoo_manager.archive import append_rows
+from zoo_manager.models import Task
+from zoo_manager.partitions import drop_empty_partitions_before, is_partitioned
+from zoo_manager.reports import preserve_stats
+from zoo_manager.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = 'Przenosi ukończone zadania starsze niż podana liczba dni do skompresowanego archiwum'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Wiek zadań (w dniach) podlegających archiwizacji')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Liczba zadań przenoszonych w jednej partii')
+        parser.add_argument('--dry-run', action='store_true', help='Tylko policz zadania, nic nie przenoś')
+        parser.add_argument(
+            '--keep-partitions', action='store_true',
+            help='Nie usuwaj pustych partycji miesięcznych po archiwizacji (PostgreSQL)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        queryset = (
+            Task.objects.filter(is_completed=True, task_timestamp__lt=cutoff)  # type: ignore
+            .select_related('employee', 'enclosure', 'task_type')
+            .order_by('task_timestamp', 'id')
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Zadań do archiwizacji: {queryset.count()}')
+            return
+
+        archived = 0
+        while True:
+            batch = list(queryset[:batch_size])
+            if not batch:
+                break
+
+            rows_by_month = defaultdict(list)
+            for task, row in zip(batch, TaskSerializer(batch, many=True).data):
+                rows_by_month[f'{task.task_timestamp:%Y-%m}'].append(row)
+            # Najpierw zapis do archiwum, potem usunięcie - przerwanie pomiędzy
+            # krokami daje co najwyżej duplikaty, które czytnik archiwum pomija.
+            append_rows(rows_by_month)
+
+            # Zarchiwizowane zadania zostają w raportach, a archiwizacja nie jest zmianą
+            # odnotowywaną w dzienniku
+            with transaction.atomic(), preserve_stats(), audit.suspended():
+                Task.objects.filter(  # type: ignore
+                    pk__in=[task.pk for task in batch], task_timestamp__lt=cutoff
+                ).delete()
+            archived += len(batch)
+            self.stdout.write(f'Zarchiwizowano {archived} zadań...')
+
+        if not options['keep_partitions'] and is_partitioned(connection):
+            with transaction.atomic():
+                dropped = drop_empty_partitions_before(connection, cutoff.date())
+            for name in dropped:
+                self.stdout.write(f'Usunięto pustą partycję {name}')
+
+        self.stdout.write(self.style.SUCCESS(f'Zakończono archiwizację: {archived} zadań'))
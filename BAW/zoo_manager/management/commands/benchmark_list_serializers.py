@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from zoo_manager.models import Animal, Employee, Enclosure, Task, TaskType
+from zoo_manager.projections import compile_projection
+from zoo_manager.renderers import ORJSONRenderer
+from zoo_manager.serializers import AnimalSerializer, EnclosureSerializer, TaskSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje czas serializacji list przez ModelSerializer i projekcje values(). '
+        'Dane testowe są tworzone w transakcji i wycofywane po pomiarze.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Liczba generowanych zadań i zwierząt')
+        parser.add_argument('--repeat', type=int, default=3, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                self.run(options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('Dane testowe wycofane')
+
+    def seed(self, rows):
+        self.stdout.write(f'Generowanie {rows} zadań i zwierząt...')
+        employees = Employee.objects.bulk_create(  # type: ignore
+            Employee(username=f'bench-{i}', imie=f'Imię{i}', nazwisko=f'Nazwisko{i}') for i in range(20)
+        )
+        enclosures = Enclosure.objects.bulk_create(  # type: ignore
+            Enclosure(name=f'Wybieg {i}') for i in range(max(rows // 100, 1))
+        )
+        for i, enclosure in enumerate(enclosures):
+            enclosure.responsible_employees.set(employees[i % 5:i % 5 + 3])
+        now = timezone.now()
+        task_types = [TaskType.objects.for_name(name) for name in ('karmienie', 'sprzątanie', 'przegląd')]  # type: ignore
+        Animal.objects.bulk_create(  # type: ignore
+            (Animal(species=f'Gatunek {i % 50}', name=f'Zwierzę {i}', gender='F' if i % 2 else 'M',
+                    enclosure=enclosures[i % len(enclosures)] if i % 10 else None, health=bool(i % 7))
+             for i in range(rows)),
+            batch_size=5000,
+        )
+        Task.objects.bulk_create(  # type: ignore
+            (Task(task_timestamp=now - timedelta(minutes=i), employee=employees[i % 20] if i % 4 else None,
+                  enclosure=enclosures[i % len(enclosures)], task_type=task_types[i % 3],
+                  comments=None if i % 3 else f'Komentarz {i}', is_completed=bool(i % 2))
+             for i in range(rows)),
+            batch_size=5000,
+        )
+
+    def run(self, repeat):
+        renderer = ORJSONRenderer()
+        cases = [
+            ('tasks', TaskSerializer, Task.objects.select_related('employee', 'enclosure', 'task_type').order_by('-task_timestamp', 'id')),  # type: ignore
+            ('animals', AnimalSerializer, Animal.objects.select_related('enclosure').order_by('species', 'name', 'id')),  # type: ignore
+            ('enclosures', EnclosureSerializer, Enclosure.objects.prefetch_related('responsible_employees').order_by('name')),  # type: ignore
+        ]
+
+        self.stdout.write(f"{'endpoint':<12}{'wiersze':>9}{'serializer ms':>16}{'values() ms':>14}{'przyspieszenie':>16}")
+        for name, serializer_class, queryset in cases:
+            projection = compile_projection(serializer_class)
+
+            slow, slow_payload = self.measure(repeat, lambda: renderer.render(
+                serializer_class(queryset.all(), many=True).data
+            ))
+            fast, fast_payload = self.measure(repeat, lambda: renderer.render(
+                projection.build(projection.queryset(queryset.all()))
+            ))
+            if slow_payload != fast_payload:
+                raise CommandError(f'{name}: wynik projekcji różni się od serializera')
+
+            rows = queryset.count()
+            self.stdout.write(f'{name:<12}{rows:>9}{slow:>16.1f}{fast:>14.1f}{slow / fast:>15.1f}x')
+
+    @staticmethod
+    def measure(repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            payload = func()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, payload
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from zoo_manager.api_urls import router
+from zoo_manager.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+
+
+class Command(BaseCommand):
+    help = 'Porównuje rozmiar odpowiedzi i czas serializacji rendererów dla list API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Liczba powtórzeń renderowania')
+
+    def handle(self, *args, **options):
+        renderers = [('drf-json', JSONRenderer()), ('orjson', ORJSONRenderer())]
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'endpoint':<14}{'wiersze':>9}  {'renderer':<10}{'bajty':>12}{'ms/render':>12}")
+        for prefix, viewset, basename in router.registry:
+            data = viewset.serializer_class(viewset.queryset.all(), many=True).data
+            for name, renderer in renderers:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    payload = renderer.render(data)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+                self.stdout.write(
+                    f'{prefix:<14}{len(data):>9}  {name:<10}{len(payload):>12}{elapsed_ms:>12.3f}'
+                )
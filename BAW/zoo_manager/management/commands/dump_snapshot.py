@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from zoo_manager.db_router import read_alias, use_replica
+from zoo_manager.snapshots import COMPRESSIONS, FORMATS, dump
+
+
+class Command(BaseCommand):
+    help = 'Zrzuca pracowników, wybiegi, zwierzęta i zadania do katalogu (COPY na PostgreSQL, CSV na SQLite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Katalog docelowy zrzutu')
+        parser.add_argument(
+            '--database', help='Alias bazy źródłowej (domyślnie replika, jeśli skonfigurowana, inaczej baza główna)',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS, default='binary',
+            help='Format COPY na PostgreSQL (na SQLite zawsze csv)',
+        )
+        parser.add_argument('--compression', choices=list(COMPRESSIONS), default='gzip', help='Kompresja plików tabel')
+        parser.add_argument(
+            '--anonymize', action='store_true',
+            help='Zastąp imiona, nazwiska, loginy i hasła pracowników danymi zastępczymi',
+        )
+        parser.add_argument('--jobs', type=int, default=1, help='Liczba tabel kopiowanych równolegle (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        if alias is None:
+            with use_replica():
+                alias = read_alias()
+
+        manifest = dump(
+            alias, options['directory'],
+            fmt=options['format'],
+            compression=options['compression'],
+            anonymize=options['anonymize'],
+            jobs=max(options['jobs'], 1),
+        )
+        for table in manifest['tables']:
+            self.stdout.write(f"{table['table']}: {table['rows']} wierszy")
+        self.stdout.write(self.style.SUCCESS(
+            f"Zrzut ({manifest['format']}, {manifest['compression']}) z bazy {alias} zapisany w {options['directory']}"
+        ))
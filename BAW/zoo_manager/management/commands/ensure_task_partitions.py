@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from zoo_manager.partitions import add_months, ensure_partitions, is_partitioned, month_start
+
+
+class Command(BaseCommand):
+    help = 'Tworzy miesięczne partycje tabeli zadań na nadchodzące miesiące (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help='Na ile miesięcy do przodu tworzyć partycje')
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            self.stdout.write('Tabela zadań nie jest partycjonowana - nic do zrobienia.')
+            return
+
+        current = month_start(timezone.now().date())
+        with transaction.atomic():
+            created = ensure_partitions(connection, current, add_months(current, options['ahead']))
+
+        for name in created:
+            self.stdout.write(f'Utworzono partycję {name}')
+        self.stdout.write(self.style.SUCCESS(f'Gotowe, nowych partycji: {len(created)}'))
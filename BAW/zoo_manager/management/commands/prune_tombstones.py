@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from zoo_manager.models import Tombstone
+from zoo_manager.sync import PRUNED_MARKER, pruned_until
+
+
+class Command(BaseCommand):
+    help = (
+        'Usuwa stare ślady usuniętych obiektów używane przez /api/sync/. Klienci, '
+        'którzy nie synchronizowali się dłużej, dostaną pełną kopię danych (reset).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SYNC_TOMBSTONE_DAYS,
+            help='Ile dni przechowywać ślady usunięć',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = Tombstone.objects.exclude(model=PRUNED_MARKER).filter(deleted_at__lt=cutoff)  # type: ignore
+
+        with transaction.atomic():
+            until = expired.aggregate(seq=Max('change_seq'))['seq']
+            if until is None:
+                self.stdout.write('Brak śladów do usunięcia')
+                return
+            deleted, _ = expired.delete()
+            # Jeden znacznik z najwyższym numerem usuniętego śladu
+            until = max(until, pruned_until())
+            Tombstone.objects.filter(model=PRUNED_MARKER).delete()  # type: ignore
+            Tombstone.objects.create(model=PRUNED_MARKER, object_id=0, change_seq=until)  # type: ignore
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Usunięto śladów: {deleted}; klienci z kursorem < {until} dostaną pełną kopię'
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from zoo_manager.feed import rebuild
+from zoo_manager.models import Zoo
+from zoo_manager.tenants import use_zoo
+
+
+class Command(BaseCommand):
+    help = 'Buduje od zera kanały "moja zmiana" pracowników używane przez /api/me/feed/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zoo', help='Slug zoo - tylko jego kanały (domyślnie wszystkie zoo)')
+
+    def handle(self, *args, **options):
+        zoos = Zoo.objects.order_by('pk')  # type: ignore
+        if options['zoo']:
+            zoos = zoos.filter(slug=options['zoo'])
+            if not zoos.exists():
+                raise CommandError(f"Nieznane zoo: {options['zoo']}")
+
+        for zoo in zoos:
+            with use_zoo(zoo):
+                count = rebuild()
+            self.stdout.write(self.style.SUCCESS(f'{zoo.slug}: wpisów w kanałach {count}'))
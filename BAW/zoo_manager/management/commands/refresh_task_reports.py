@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from zoo_manager.reports import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Przelicza od zera podsumowania zadań używane przez /api/reports/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='Pierwszy dzień (YYYY-MM-DD), domyślnie bez ograniczenia')
+        parser.add_argument('--to', dest='end', help='Ostatni dzień (YYYY-MM-DD), domyślnie bez ograniczenia')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as exc:
+            raise CommandError(f'Nieprawidłowa data: {exc}')
+
+        count = rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Przeliczono podsumowania: {count} wierszy'))
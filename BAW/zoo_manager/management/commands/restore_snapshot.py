@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from zoo_manager.snapshots import SnapshotError, restore
+
+
+class Command(BaseCommand):
+    help = 'Odtwarza zrzut z dump_snapshot (COPY na PostgreSQL, CSV na SQLite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Katalog zrzutu (z plikiem manifest.json)')
+        parser.add_argument('--database', default='default', help='Alias bazy docelowej')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Wyczyść tabele docelowe (oraz tabele, które je wskazują) przed odtworzeniem',
+        )
+        parser.add_argument('--jobs', type=int, default=1, help='Liczba tabel ładowanych równolegle (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        try:
+            counts = restore(
+                options['database'], options['directory'],
+                truncate=options['truncate'],
+                jobs=max(options['jobs'], 1),
+            )
+        except SnapshotError as exc:
+            raise CommandError(str(exc))
+        for table, rows in counts.items():
+            self.stdout.write(f'{table}: {rows} wierszy')
+        self.stdout.write(self.style.SUCCESS(f"Zrzut odtworzony w bazie {options['database']}"))
@@ -0,0 +1,69 @@
+import multiprocessing
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from zoo_manager.jobs import process_worker, requeue_stale, work
+from zoo_manager.models import Zoo
+from zoo_manager.tenants import use_zoo
+
+
+class Command(BaseCommand):
+    help = 'Uruchamia worker wykonujący zadania w tle z kolejki jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Liczba równoległych workerów')
+        parser.add_argument(
+            '--mode', choices=['thread', 'process'], default='thread',
+            help='Pula wątków (domyślnie) lub procesów',
+        )
+        parser.add_argument('--poll', type=float, default=1.0, help='Co ile sekund sprawdzać kolejkę, gdy jest pusta')
+        parser.add_argument('--once', action='store_true', help='Zakończ po opróżnieniu kolejki')
+        parser.add_argument('--zoo', help='Slug zoo - obsługuj tylko jego kolejkę (np. zoo na osobnej bazie)')
+
+    def handle(self, *args, **options):
+        zoo = None
+        if options['zoo']:
+            zoo = Zoo.objects.filter(slug=options['zoo']).first()  # type: ignore
+            if zoo is None:
+                raise CommandError(f"Nieznane zoo: {options['zoo']}")
+        zoo_id = zoo.pk if zoo is not None else None
+
+        with use_zoo(zoo):
+            requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Przywrócono do kolejki porzucone zadania: {requeued}')
+
+        workers = max(options['workers'], 1)
+        self.stdout.write(f"Start {workers} workerów ({options['mode']}), Ctrl+C kończy pracę")
+
+        if options['mode'] == 'process':
+            # Połączenia z bazą nie mogą być współdzielone z procesami potomnymi
+            connections.close_all()
+            pool = [
+                multiprocessing.Process(target=process_worker, args=(options['poll'], options['once'], zoo_id))
+                for _ in range(workers)
+            ]
+        else:
+            stop_event = threading.Event()
+            pool = [
+                threading.Thread(target=work, args=(stop_event, options['poll'], options['once'], zoo_id))
+                for _ in range(workers)
+            ]
+
+        for worker in pool:
+            worker.start()
+        try:
+            for worker in pool:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Zatrzymywanie workerów...')
+            if options['mode'] == 'process':
+                for worker in pool:
+                    worker.terminate()
+            else:
+                stop_event.set()
+            for worker in pool:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Worker zakończył pracę'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from zoo_manager.alerts import get_sink, process
+from zoo_manager.models import Zoo
+from zoo_manager.tenants import use_zoo
+
+
+class Command(BaseCommand):
+    help = 'Wysyła managerom i pracownikom zbiorcze powiadomienia o zaległych zadaniach i chorych zwierzętach'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zoo', help='Slug zoo - tylko jego powiadomienia (domyślnie wszystkie zoo)')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Co ile sekund powtarzać przebieg (0 = jeden przebieg, np. z crona)',
+        )
+
+    def handle(self, *args, **options):
+        zoos = Zoo.objects.order_by('pk')  # type: ignore
+        if options['zoo']:
+            zoos = zoos.filter(slug=options['zoo'])
+            if not zoos.exists():
+                raise CommandError(f"Nieznane zoo: {options['zoo']}")
+        sink = get_sink()
+
+        while True:
+            for zoo in zoos:
+                with use_zoo(zoo):
+                    alerts, digests = process(sink=sink)
+                if alerts:
+                    self.stdout.write(f'{zoo.slug}: alertów {alerts}, wiadomości {digests}')
+            if not options['interval']:
+                break
+            # Połączenia z bazą nie są zamykane przez cykl żądań Django
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Wykonywany w świeżym interpreterze: start aplikacji WSGI, opcjonalna
+# rozgrzewka i dwa kolejne żądania przez aplikację WSGI (bez serwera HTTP)
+PROBE = r'''
+import io, json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+options = json.loads(sys.argv[1])
+warmup = {}
+if options['warmup']:
+    from zoo_manager.warmup import warm_up
+    warmup = warm_up(force=True)
+warmed = time.perf_counter()
+headers = {}
+if options['user']:
+    from zoo_manager.authentication import token_for_user
+    from zoo_manager.models import Employee
+    user = Employee.objects.get(username=options['user'])
+    headers['HTTP_AUTHORIZATION'] = f'Bearer {token_for_user(user).access_token}'
+
+def request():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': options['path'], 'QUERY_STRING': '',
+        'SERVER_NAME': options['host'], 'SERVER_PORT': '80', 'HTTP_HOST': options['host'],
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr, **headers,
+    }
+    status = []
+    begin = time.perf_counter()
+    response = application(environ, lambda code, response_headers, exc_info=None: status.append(code))
+    b''.join(response)
+    response.close()
+    return (time.perf_counter() - begin) * 1000, status[0]
+
+first, status = request()
+second, _ = request()
+print(json.dumps({
+    'setup': (ready - start) * 1000, 'warmup': (warmed - ready) * 1000, 'steps': warmup,
+    'first': first, 'second': second, 'status': status,
+}))
+'''
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)')
+
+
+def parse_import_times(stderr):
+    """Wiersze ``-X importtime``: (moduł, czas własny w µs)"""
+    return [(match[2], int(match[1])) for match in map(IMPORT_TIME.match, stderr.splitlines()) if match]
+
+
+class Command(BaseCommand):
+    help = 'Mierzy czas importów przy starcie procesu i opóźnienie pierwszego żądania (z rozgrzewką i bez)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/', help='Ścieżka mierzonego żądania')
+        parser.add_argument('--user', help='Nazwa użytkownika, w imieniu którego wysyłane jest żądanie (JWT)')
+        parser.add_argument('--repeat', type=int, default=3, help='Liczba uruchomień procesu (mediana)')
+        parser.add_argument('--top', type=int, default=15, help='Liczba najdroższych pakietów w raporcie importów')
+
+    def probe(self, options, warmup, importtime=False):
+        args = [sys.executable]
+        if importtime:
+            args += ['-X', 'importtime']
+        host = next((host for host in settings.ALLOWED_HOSTS if not host.startswith(('*', '.'))), 'localhost')
+        probe_options = {'path': options['path'], 'user': options['user'], 'warmup': warmup, 'host': host}
+        result = subprocess.run(
+            [*args, '-c', PROBE, json.dumps(probe_options)],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Proces pomiarowy zakończył się błędem:\n{result.stderr[-2000:]}')
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat musi być większe od zera')
+
+        _, stderr = self.probe(options, warmup=False, importtime=True)
+        self.report_imports(parse_import_times(stderr), options['top'])
+
+        self.stdout.write(f"\nŻądanie GET {options['path']} w świeżym procesie (mediana z {options['repeat']}, ms)")
+        self.stdout.write(f"{'tryb':<16}{'start':>9}{'rozgrzewka':>12}{'1. żądanie':>12}{'2. żądanie':>12}  status")
+        for label, warmup in (('bez rozgrzewki', False), ('z rozgrzewką', True)):
+            runs = [self.probe(options, warmup)[0] for _ in range(options['repeat'])]
+            median = {key: statistics.median(run[key] for run in runs) for key in ('setup', 'warmup', 'first', 'second')}
+            self.stdout.write(
+                f"{label:<16}{median['setup']:>9.1f}{median['warmup']:>12.1f}"
+                f"{median['first']:>12.1f}{median['second']:>12.1f}  {runs[-1]['status']}"
+            )
+            if warmup:
+                steps = runs[-1]['steps']
+                self.stdout.write('  kroki rozgrzewki: ' + ', '.join(f'{name} {ms:.1f}' for name, ms in steps.items()))
+
+    def report_imports(self, rows, top):
+        """Czas importów od startu procesu do pierwszej odpowiedzi według pakietów najwyższego poziomu"""
+        by_package = defaultdict(int)
+        for module, self_us in rows:
+            by_package[module.partition('.')[0]] += self_us
+        total = sum(by_package.values())
+        self.stdout.write(f'Importy do pierwszej odpowiedzi: {total / 1000:.1f} ms, {len(rows)} modułów')
+        self.stdout.write(f"{'pakiet':<32}{'ms':>9}{'udział':>9}")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'{package:<32}{self_us / 1000:>9.1f}{self_us / total:>9.1%}')
@@ -0,0 +1,106 @@
+from datetime import date
+
+from django.db import migrations, models
+
+from zoo_manager.partitions import (
+    DEFAULT_PARTITION, TASKS_TABLE, add_months, ensure_partitions, supports_partitioning,
+)
+
+# Ile miesięcy do przodu tworzyć partycje podczas migracji
+MONTHS_AHEAD = 3
+
+
+def partition_tasks(apps, schema_editor):
+    """Zamienia tabelę tasks na tabelę partycjonowaną miesięcznie po task_timestamp"""
+    connection = schema_editor.connection
+    if not supports_partitioning(connection):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(task_timestamp) FROM tasks")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute("ALTER TABLE tasks RENAME TO tasks_unpartitioned")
+        cursor.execute(
+            "CREATE TABLE tasks (LIKE tasks_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (task_timestamp)"
+        )
+        # Klucz główny tabeli partycjonowanej musi zawierać klucz partycji;
+        # unikalność id nadal zapewnia sekwencja.
+        cursor.execute("CREATE SEQUENCE tasks_partitioned_id_seq")
+        cursor.execute("ALTER TABLE tasks ALTER COLUMN id SET DEFAULT nextval('tasks_partitioned_id_seq')")
+        cursor.execute("ALTER SEQUENCE tasks_partitioned_id_seq OWNED BY tasks.id")
+        cursor.execute("ALTER TABLE tasks ADD PRIMARY KEY (id, task_timestamp)")
+        cursor.execute(
+            "ALTER TABLE tasks ADD CONSTRAINT tasks_employee_id_fk_employees_id "
+            "FOREIGN KEY (employee_id) REFERENCES employees (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            "ALTER TABLE tasks ADD CONSTRAINT tasks_enclosure_id_fk_enclosures_id "
+            "FOREIGN KEY (enclosure_id) REFERENCES enclosures (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute("CREATE INDEX tasks_employee_id_idx ON tasks (employee_id)")
+        cursor.execute("CREATE INDEX tasks_enclosure_id_idx ON tasks (enclosure_id)")
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF tasks DEFAULT")
+
+    today = date.today()
+    ensure_partitions(connection, oldest or today, add_months(today, MONTHS_AHEAD))
+
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO tasks SELECT * FROM tasks_unpartitioned")
+        # Odroczone sprawdzenia kluczy obcych muszą się wykonać przed
+        # utworzeniem indeksów w dalszej części migracji.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            "SELECT setval('tasks_partitioned_id_seq', COALESCE((SELECT MAX(id) FROM tasks), 0) + 1, false)"
+        )
+        cursor.execute("DROP TABLE tasks_unpartitioned")
+
+
+def unpartition_tasks(apps, schema_editor):
+    """Przywraca zwykłą (niepartycjonowaną) tabelę tasks"""
+    connection = schema_editor.connection
+    if not supports_partitioning(connection):
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TASKS_TABLE} RENAME TO tasks_partitioned")
+        cursor.execute("CREATE TABLE tasks (LIKE tasks_partitioned INCLUDING DEFAULTS)")
+        cursor.execute("CREATE SEQUENCE tasks_id_seq_unpartitioned")
+        cursor.execute("ALTER TABLE tasks ALTER COLUMN id SET DEFAULT nextval('tasks_id_seq_unpartitioned')")
+        cursor.execute("ALTER SEQUENCE tasks_id_seq_unpartitioned OWNED BY tasks.id")
+        cursor.execute("INSERT INTO tasks SELECT * FROM tasks_partitioned")
+        cursor.execute(
+            "SELECT setval('tasks_id_seq_unpartitioned', COALESCE((SELECT MAX(id) FROM tasks), 0) + 1, false)"
+        )
+        cursor.execute("DROP TABLE tasks_partitioned CASCADE")
+        cursor.execute("ALTER TABLE tasks ADD PRIMARY KEY (id)")
+        cursor.execute(
+            "ALTER TABLE tasks ADD CONSTRAINT tasks_employee_id_fk_employees_id "
+            "FOREIGN KEY (employee_id) REFERENCES employees (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            "ALTER TABLE tasks ADD CONSTRAINT tasks_enclosure_id_fk_enclosures_id "
+            "FOREIGN KEY (enclosure_id) REFERENCES enclosures (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute("CREATE INDEX tasks_employee_id_idx ON tasks (employee_id)")
+        cursor.execute("CREATE INDEX tasks_enclosure_id_idx ON tasks (enclosure_id)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0006_animal_health'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tasks, unpartition_tasks),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['is_completed', 'task_timestamp'], name='tasks_completed_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-task_timestamp'], name='tasks_ts_desc_idx'),
+        ),
+    ]
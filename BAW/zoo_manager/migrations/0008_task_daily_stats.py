@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0007_task_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('employee', 'Employee'), ('enclosure', 'Enclosure')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'task_daily_stats',
+                'indexes': [models.Index(fields=['scope', 'day'], name='task_daily_stats_scope_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'object_id', 'day'), name='task_daily_stats_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,131 @@
+import django.db.models.deletion
+import zoo_manager.fields
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+GENDER_CODES = {'male': 1, 'female': 2}
+GENDER_ALIASES = {'M': 'male', 'F': 'female'}
+ROLE_CODES = {'manager': 1, 'worker': 2}
+
+# Zapisy spotykane w istniejących danych -> wartość kanoniczna
+GENDER_SPELLINGS = {'male': 'male', 'm': 'male', 'female': 'female', 'f': 'female'}
+ROLE_SPELLINGS = {'manager': 'manager', 'worker': 'worker'}
+
+
+def _convert(model, source, target, spellings):
+    """Przepisuje tekst z kolumny ``source`` na kod w ``target`` (po jednym UPDATE na wartość)"""
+    values = model.objects.values_list(source, flat=True).distinct()
+    unknown = []
+    for value in values:
+        canonical = spellings.get((value or '').strip().lower())
+        if canonical is None:
+            unknown.append(value)
+            continue
+        model.objects.filter(**{source: value}).update(**{target: canonical})
+    if unknown:
+        raise RuntimeError(f'{model.__name__}.{source}: nieznane wartości {unknown!r} - popraw dane przed migracją')
+
+
+def forwards(apps, schema_editor):
+    Animal = apps.get_model('zoo_manager', 'Animal')
+    Employee = apps.get_model('zoo_manager', 'Employee')
+    Task = apps.get_model('zoo_manager', 'Task')
+    TaskType = apps.get_model('zoo_manager', 'TaskType')
+
+    _convert(Animal, 'gender', 'gender_code', GENDER_SPELLINGS)
+    _convert(Employee, 'role', 'role_code', ROLE_SPELLINGS)
+
+    TaskType.objects.bulk_create(
+        [TaskType(name=name) for name in Task.objects.values_list('task_type', flat=True).distinct()],
+        ignore_conflicts=True,
+    )
+    # Jedno polecenie UPDATE dla całej (na PostgreSQL partycjonowanej) tabeli zadań
+    Task.objects.update(
+        task_type_ref=Subquery(TaskType.objects.filter(name=OuterRef('task_type')).values('id')[:1]),
+    )
+
+
+def backwards(apps, schema_editor):
+    Animal = apps.get_model('zoo_manager', 'Animal')
+    Employee = apps.get_model('zoo_manager', 'Employee')
+    Task = apps.get_model('zoo_manager', 'Task')
+    TaskType = apps.get_model('zoo_manager', 'TaskType')
+
+    for value in GENDER_CODES:
+        Animal.objects.filter(gender_code=value).update(gender=value)
+    for value in ROLE_CODES:
+        Employee.objects.filter(role_code=value).update(role=value)
+    Task.objects.update(
+        task_type=Subquery(TaskType.objects.filter(id=OuterRef('task_type_ref')).values('name')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0011_change_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskType',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.TextField(unique=True)),
+            ],
+            options={
+                'db_table': 'task_types',
+            },
+        ),
+        # Nowe kolumny obok starych, przepisanie danych, podmiana
+        migrations.AddField(
+            model_name='animal',
+            name='gender_code',
+            field=zoo_manager.fields.CompactChoiceField(codes=GENDER_CODES, aliases=GENDER_ALIASES, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='role_code',
+            field=zoo_manager.fields.CompactChoiceField(codes=ROLE_CODES, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='task_type_ref',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.tasktype',
+            ),
+        ),
+        # Stare kolumny dopuszczają NULL, aby cofnięcie migracji mogło je odtworzyć i wypełnić
+        migrations.AlterField(model_name='animal', name='gender', field=models.CharField(max_length=6, null=True)),
+        migrations.AlterField(model_name='employee', name='role', field=models.CharField(max_length=10, null=True)),
+        migrations.AlterField(model_name='task', name='task_type', field=models.TextField(null=True)),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(model_name='animal', name='gender'),
+        migrations.RemoveField(model_name='employee', name='role'),
+        migrations.RemoveField(model_name='task', name='task_type'),
+        migrations.RenameField(model_name='animal', old_name='gender_code', new_name='gender'),
+        migrations.RenameField(model_name='employee', old_name='role_code', new_name='role'),
+        migrations.RenameField(model_name='task', old_name='task_type_ref', new_name='task_type'),
+        migrations.AlterField(
+            model_name='animal',
+            name='gender',
+            field=zoo_manager.fields.CompactChoiceField(
+                choices=[('male', 'Male'), ('female', 'Female'), ('M', 'M'), ('F', 'F')],
+                codes=GENDER_CODES, aliases=GENDER_ALIASES,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='role',
+            field=zoo_manager.fields.CompactChoiceField(
+                choices=[('manager', 'Manager'), ('worker', 'Worker')], codes=ROLE_CODES, default='worker',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='task_type',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, related_name='tasks', to='zoo_manager.tasktype',
+            ),
+        ),
+    ]
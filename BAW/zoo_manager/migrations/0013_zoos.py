@@ -0,0 +1,120 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:00
+
+import django.db.models.deletion
+import zoo_manager.tenants
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def create_default_zoo(apps, schema_editor):
+    """Dotychczasowe dane należą do zoo DEFAULT_ZOO_ID"""
+    Zoo = apps.get_model('zoo_manager', 'Zoo')
+    Zoo.objects.using(schema_editor.connection.alias).get_or_create(
+        pk=settings.DEFAULT_ZOO_ID, defaults={'name': 'Zoo', 'slug': 'default'},
+    )
+    # Jawnie podany klucz nie przesuwa sekwencji na PostgreSQL
+    statements = schema_editor.connection.ops.sequence_reset_sql(no_style(), [Zoo])
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('zoo_manager', '0012_compact_enums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Zoo',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.TextField()),
+                ('slug', models.SlugField(unique=True)),
+                ('hostname', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('database', models.CharField(default='default', max_length=100)),
+            ],
+            options={
+                'db_table': 'zoos',
+            },
+        ),
+        migrations.RunPython(create_default_zoo, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='taskdailystat',
+            name='task_daily_stats_unique',
+        ),
+        migrations.RemoveIndex(
+            model_name='taskdailystat',
+            name='task_daily_stats_scope_day_idx',
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='enclosure',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='taskdailystat',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='zoo',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['zoo', 'species', 'name'], name='animals_zoo_species_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['zoo', 'nazwisko', 'imie'], name='employees_zoo_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enclosure',
+            index=models.Index(fields=['zoo', 'name'], name='enclosures_zoo_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['zoo', '-created_at'], name='jobs_zoo_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['zoo', '-task_timestamp'], name='tasks_zoo_ts_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskdailystat',
+            index=models.Index(fields=['zoo', 'scope', 'day'], name='task_daily_stats_scope_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['zoo', 'change_seq'], name='tombstones_zoo_seq_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailystat',
+            constraint=models.UniqueConstraint(fields=('zoo', 'scope', 'object_id', 'day'), name='task_daily_stats_unique'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Wyszukiwanie od początku wartości (zoo_manager/autocomplete.py, panel
+# administracyjny) filtruje po UPPER(kolumna) LIKE 'FRAZA%' w obrębie zoo
+INDEXES = (
+    ('employees_zoo_upper_nazwisko_idx', 'employees', 'nazwisko'),
+    ('employees_zoo_upper_imie_idx', 'employees', 'imie'),
+    ('employees_zoo_upper_username_idx', 'employees', 'username'),
+    ('enclosures_zoo_upper_name_idx', 'enclosures', 'name'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    """Indeksy wyrażeniowe - tylko PostgreSQL (text_pattern_ops obsługuje LIKE niezależnie od collation)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for name, table, column in INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} (zoo_id, (UPPER({column}::text)) text_pattern_ops)'
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for name, table, column in INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0013_zoos'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:25
+
+import django.core.serializers.json
+import django.db.models.deletion
+import zoo_manager.fields
+import zoo_manager.tenants
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0015_task_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('action', zoo_manager.fields.CompactChoiceField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], codes={'create': 1, 'delete': 3, 'update': 2})),
+                ('source', models.CharField(max_length=10)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('zoo', models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo')),
+            ],
+            options={
+                'db_table': 'audit_log',
+                'indexes': [models.Index(fields=['zoo', 'model', 'object_id', '-created_at'], name='audit_log_object_idx')],
+            },
+        ),
+    ]
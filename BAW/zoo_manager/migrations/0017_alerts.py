@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:33
+
+import django.db.models.deletion
+import zoo_manager.tenants
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_sick_animals(apps, schema_editor):
+    # Zwierzęta chore już przed migracją nie są "nowo chore" - bez tego
+    # pierwszy zapis każdego z nich (Animal.save()) wywołałby powiadomienie
+    Animal = apps.get_model('zoo_manager', 'Animal')
+    Animal._base_manager.using(schema_editor.connection.alias).filter(health=False).update(sick_since=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0016_audit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processed_until', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'alert_watermarks',
+            },
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='sick_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_sick_animals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['zoo', 'sick_since'], name='animals_zoo_sick_since_idx'),
+        ),
+        migrations.AddField(
+            model_name='alertwatermark',
+            name='zoo',
+            field=models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo'),
+        ),
+        migrations.AddConstraint(
+            model_name='alertwatermark',
+            constraint=models.UniqueConstraint(fields=('zoo',), name='alert_watermarks_zoo_unique'),
+        ),
+    ]
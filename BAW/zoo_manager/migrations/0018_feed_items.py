@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:36
+
+import django.core.serializers.json
+import django.db.models.deletion
+import zoo_manager.fields
+import zoo_manager.tenants
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0017_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', zoo_manager.fields.CompactChoiceField(choices=[('task', 'Task'), ('enclosure', 'Enclosure'), ('animal', 'Animal')], codes={'animal': 3, 'enclosure': 2, 'task': 1})),
+                ('object_id', models.BigIntegerField()),
+                ('enclosure_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('employee', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('zoo', models.ForeignKey(db_constraint=False, db_index=False, default=zoo_manager.tenants.current_zoo_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='zoo_manager.zoo')),
+            ],
+            options={
+                'db_table': 'feed_items',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='feed_items_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'kind', 'object_id'), name='feed_items_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:49
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def split_archived_counts(apps, schema_editor):
+    # Liczniki ponad to, co wynika z zadań w tabeli, pochodzą z zadań
+    # przeniesionych już do archiwum
+    Task = apps.get_model('zoo_manager', 'Task')
+    TaskDailyStat = apps.get_model('zoo_manager', 'TaskDailyStat')
+    alias = schema_editor.connection.alias
+    tasks = Task._base_manager.using(alias).annotate(day=TruncDate('task_timestamp'))
+    live = {}
+    for scope, column in (('employee', 'employee_id'), ('enclosure', 'enclosure_id')):
+        grouped = tasks.values('zoo_id', 'day', column).annotate(
+            total=Count('id'), completed=Count('id', filter=Q(is_completed=True)),
+        ).order_by()
+        for row in grouped:
+            live[(row['zoo_id'], scope, row[column] or 0, row['day'])] = (row['total'], row['completed'])
+
+    changed = []
+    for stat in TaskDailyStat._base_manager.using(alias).iterator():
+        total, completed = live.get((stat.zoo_id, stat.scope, stat.object_id, stat.day), (0, 0))
+        stat.archived = max(stat.total - total, 0)
+        stat.archived_completed = max(stat.completed - completed, 0)
+        if stat.archived or stat.archived_completed:
+            changed.append(stat)
+    TaskDailyStat._base_manager.using(alias).bulk_update(changed, ['archived', 'archived_completed'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0018_feed_items'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskdailystat',
+            name='archived',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskdailystat',
+            name='archived_completed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(split_archived_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from zoo_manager.sequences import create_next_function, drop_next_function
+
+
+def create_change_seq_function(apps, schema_editor):
+    create_next_function(schema_editor.connection)
+
+
+def drop_change_seq_function(apps, schema_editor):
+    drop_next_function(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0019_task_daily_stats_archived'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_change_seq_function, drop_change_seq_function),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+def mark_processed_overdue(apps, schema_editor):
+    # Zaległości z terminem w przedziale już przetworzonym przez powiadomienia
+    # zostały zgłoszone (albo pochodzą sprzed wdrożenia powiadomień)
+    Task = apps.get_model('zoo_manager', 'Task')
+    AlertWatermark = apps.get_model('zoo_manager', 'AlertWatermark')
+    alias = schema_editor.connection.alias
+    for zoo_id, processed_until in AlertWatermark._base_manager.using(alias).values_list('zoo_id', 'processed_until'):
+        Task._base_manager.using(alias).filter(
+            zoo_id=zoo_id, is_completed=False, task_timestamp__lte=processed_until,
+        ).update(overdue_alerted_at=processed_until)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0020_change_seq_in_flight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='overdue_alerted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_processed_overdue, migrations.RunPython.noop),
+    ]
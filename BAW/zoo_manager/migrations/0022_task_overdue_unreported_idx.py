@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoo_manager', '0021_task_overdue_alerted_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(models.Q(('overdue_alerted_at__isnull', True), ('overdue_alerted_at__lt', models.F('task_timestamp')), _connector='OR'), ('is_completed', False)), fields=['zoo', 'task_timestamp'], name='tasks_overdue_unreported_idx'),
+        ),
+    ]
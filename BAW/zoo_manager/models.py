@@ -1,7 +1,77 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.db import router, transaction
 
-class EmployeeManager(BaseUserManager):
+from .fields import CompactChoiceField
+from .sequences import next_change_seq
+from .tenants import TenantManager, current_zoo_id
+
+
+class Zoo(models.Model):
+    """
+    Ogród zoologiczny (dzierżawca) - patrz zoo_manager/tenants.py.
+
+    ``hostname`` pozwala rozpoznać zoo po adresie, a ``database`` wskazuje
+    alias bazy (settings.DATABASES), w której leżą jego dane.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.TextField()
+    slug = models.SlugField(max_length=50, unique=True)
+    hostname = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    database = models.CharField(max_length=100, default='default')
+
+    class Meta:
+        db_table = 'zoos'
+
+    def __str__(self):
+        return self.name
+
+
+class TenantModel(models.Model):
+    """
+    Model należący do jednego zoo. ``objects`` zwraca tylko wiersze bieżącego
+    zoo; nowe obiekty dostają je automatycznie.
+    """
+    # Bez więzów klucza obcego - rejestr zoo może leżeć w innej bazie niż dane.
+    # Indeksy zaczynające się od zoo deklarują poszczególne modele.
+    zoo = models.ForeignKey(
+        Zoo, on_delete=models.PROTECT, default=current_zoo_id, db_constraint=False, db_index=False,
+        related_name='+', editable=False,
+    )
+
+    objects = TenantManager()
+
+    class Meta:
+        abstract = True
+
+
+class SyncedModel(models.Model):
+    """
+    Model synchronizowany przyrostowo z tabletami (zoo_manager/sync.py).
+
+    Każdy zapis nadaje obiektowi nowy, globalnie rosnący ``change_seq``, dzięki
+    czemu klient pobiera tylko wiersze zmienione od ostatniej synchronizacji.
+    """
+    change_seq = models.BigIntegerField(default=0, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'change_seq' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'change_seq']
+        # Numer i zapis w jednej transakcji - inaczej kursor synchronizacji
+        # mógłby minąć numer, zanim wiersz zostanie zapisany
+        with transaction.atomic(using=using, savepoint=False):
+            self.change_seq = next_change_seq(using)
+            super().save(*args, **kwargs)
+
+
+class EmployeeManager(TenantManager, BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
         """
         Tworzy i zapisuje użytkownika z podanym username i hasłem.
@@ -27,7 +97,7 @@ class EmployeeManager(BaseUserManager):
 
         return self.create_user(username, password, **extra_fields)
 
-class Employee(PermissionsMixin, AbstractBaseUser):
+class Employee(TenantModel, SyncedModel, PermissionsMixin, AbstractBaseUser):
     ROLE_CHOICES = [
         ('manager', 'Manager'),
         ('worker', 'Worker'),
@@ -35,7 +105,7 @@ class Employee(PermissionsMixin, AbstractBaseUser):
     imie = models.TextField()
     nazwisko = models.TextField()
     username = models.CharField(max_length=150, unique=True)
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='worker')
+    role = CompactChoiceField(choices=ROLE_CHOICES, codes={'manager': 1, 'worker': 2}, default='worker')
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     enclosures = models.ManyToManyField('Enclosure', blank=True, related_name='employees')
@@ -47,6 +117,9 @@ class Employee(PermissionsMixin, AbstractBaseUser):
 
     class Meta:
         db_table = 'employees'
+        indexes = [
+            models.Index(fields=['zoo', 'nazwisko', 'imie'], name='employees_zoo_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.imie} {self.nazwisko} ({self.username})"
@@ -57,12 +130,15 @@ class Employee(PermissionsMixin, AbstractBaseUser):
     def get_short_name(self):
         return self.imie
 
-class Enclosure(models.Model):
+class Enclosure(TenantModel, SyncedModel):
     name = models.TextField()
     responsible_employees = models.ManyToManyField('Employee', blank=True, related_name='responsible_enclosures')
 
     class Meta:
         db_table = 'enclosures'
+        indexes = [
+            models.Index(fields=['zoo', 'name'], name='enclosures_zoo_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -71,7 +147,28 @@ class Enclosure(models.Model):
     def current_animal_count(self):
         return self.animal_set.count()
 
-class Animal(models.Model):
+class VersionedModel(models.Model):
+    """
+    Model z licznikiem wersji do optymistycznej kontroli współbieżności.
+
+    Każdy zapis istniejącego obiektu podbija ``version``; szybkie aktualizacje
+    (zoo_manager/fast_updates.py) sprawdzają wersję w klauzuli WHERE zamiast
+    blokować wiersz.
+    """
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'version' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+
+class Animal(TenantModel, SyncedModel, VersionedModel):
     GENDER_CHOICES = [
         ('male', 'Male'),
         ('female', 'Female'),
@@ -80,26 +177,267 @@ class Animal(models.Model):
     ]
     species = models.TextField()
     name = models.TextField()
-    gender = models.CharField(max_length=6, choices=GENDER_CHOICES)
+    # 'M' i 'F' to aliasy - zapisywane z tym samym kodem, odczytywane jako 'male'/'female'
+    gender = CompactChoiceField(choices=GENDER_CHOICES, codes={'male': 1, 'female': 2}, aliases={'M': 'male', 'F': 'female'})
     enclosure = models.ForeignKey(Enclosure, on_delete=models.SET_NULL, null=True, blank=True)
     health = models.BooleanField(default=True)  # True = zdrowy, False = chory
+    # Chwila oznaczenia jako chore (tylko dla chorych) - patrz zoo_manager/alerts.py
+    sick_since = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'animals'
+        indexes = [
+            models.Index(fields=['zoo', 'species', 'name'], name='animals_zoo_species_name_idx'),
+            models.Index(fields=['zoo', 'sick_since'], name='animals_zoo_sick_since_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.species})"
 
-class Task(models.Model):
+    def save(self, *args, **kwargs):
+        # sick_since jest ustawione dokładnie dla chorych zwierząt
+        if self.health:
+            self.sick_since = None
+        elif self.sick_since is None:
+            self.sick_since = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'health' in update_fields and 'sick_since' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'sick_since']
+        super().save(*args, **kwargs)
+
+class TaskTypeManager(models.Manager):
+    def for_name(self, name):
+        """Zwraca typ zadania o podanej nazwie, dopisując go do słownika w razie potrzeby"""
+        return self.get_or_create(name=name.strip())[0]
+
+
+class TaskType(models.Model):
+    """
+    Słownik typów zadań. Zadania wskazują typ kluczem ``smallint`` zamiast
+    powtarzać ten sam tekst w każdym wierszu; w API typ nadal jest tekstem.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.TextField(unique=True)
+
+    objects = TaskTypeManager()
+
+    class Meta:
+        db_table = 'task_types'
+
+    def __str__(self):
+        return self.name
+
+class Task(TenantModel, SyncedModel, VersionedModel):
     task_timestamp = models.DateTimeField()
     employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True)
     enclosure = models.ForeignKey(Enclosure, on_delete=models.SET_NULL, null=True, blank=True)
-    task_type = models.TextField()
+    task_type = models.ForeignKey(TaskType, on_delete=models.PROTECT, related_name='tasks')
     comments = models.TextField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    # Cykl życia zadania - patrz zoo_manager/task_lifecycle.py
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Koniec przedziału powiadomień, w którym zgłoszono zaległość - patrz zoo_manager/alerts.py
+    overdue_alerted_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = 'tasks'
+        # Na PostgreSQL tabela jest partycjonowana miesięcznie po task_timestamp
+        # (patrz zoo_manager/partitions.py i migracja 0007).
+        indexes = [
+            models.Index(fields=['is_completed', 'task_timestamp'], name='tasks_completed_ts_idx'),
+            models.Index(fields=['-task_timestamp'], name='tasks_ts_desc_idx'),
+            models.Index(fields=['zoo', '-task_timestamp'], name='tasks_zoo_ts_desc_idx'),
+            # Niezgłoszone zaległości (zoo_manager/alerts.py) - warunek musi
+            # być identyczny z filtrem pending_overdue(), inaczej planista
+            # nie użyje indeksu
+            models.Index(
+                fields=['zoo', 'task_timestamp'],
+                condition=models.Q(
+                    models.Q(overdue_alerted_at__isnull=True) | models.Q(overdue_alerted_at__lt=models.F('task_timestamp')),
+                    is_completed=False,
+                ),
+                name='tasks_overdue_unreported_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.task_type} for {self.employee_id} at {self.task_timestamp}"
+
+    def save(self, *args, **kwargs):
+        # completed_at jest ustawione dokładnie dla zadań ukończonych
+        if not self.is_completed:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'is_completed' in update_fields and 'completed_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'completed_at']
+        super().save(*args, **kwargs)
+
+class TaskDailyStat(TenantModel):
+    """
+    Dzienne podsumowanie zadań dla jednego pracownika lub wybiegu.
+
+    Tabela jest utrzymywana przyrostowo przez sygnały (zoo_manager/reports.py)
+    i przeliczana poleceniem refresh_task_reports, dzięki czemu raporty nie
+    muszą skanować tabeli zadań.
+    """
+    SCOPE_CHOICES = [
+        ('employee', 'Employee'),
+        ('enclosure', 'Enclosure'),
+    ]
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    object_id = models.BigIntegerField()  # 0 = zadania nieprzypisane
+    day = models.DateField()
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    # Część liczników pochodząca z zadań przeniesionych do archiwum -
+    # przeliczenie od zera nie może jej odtworzyć z tabeli zadań
+    archived = models.IntegerField(default=0)
+    archived_completed = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'task_daily_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['zoo', 'scope', 'object_id', 'day'], name='task_daily_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['zoo', 'scope', 'day'], name='task_daily_stats_scope_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.object_id} {self.day}: {self.completed}/{self.total}"
+
+
+class Job(TenantModel):
+    """
+    Zadanie w tle wykonywane przez polecenie run_jobs (zoo_manager/jobs.py).
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='jobs_status_run_after_idx'),
+            models.Index(fields=['zoo', '-created_at'], name='jobs_zoo_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class AuditEntry(TenantModel):
+    """
+    Wpis dziennika zmian (zoo_manager/audit.py): kto, kiedy i które pola
+    obiektu zmienił. Wpisy są dopisywane zbiorczo w tle.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    created_at = models.DateTimeField()
+    # Bez klucza obcego w bazie - wpis zachowuje autora także po jego usunięciu
+    actor = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, null=True, blank=True, db_constraint=False, db_index=False,
+        related_name='+',
+    )
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = CompactChoiceField(choices=ACTION_CHOICES, codes={'create': 1, 'update': 2, 'delete': 3})
+    # api, form, admin, job, delete
+    source = models.CharField(max_length=10)
+    # {pole: {"old": ..., "new": ...}}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = 'audit_log'
+        indexes = [
+            models.Index(fields=['zoo', 'model', 'object_id', '-created_at'], name='audit_log_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} #{self.object_id} by {self.actor_id} at {self.created_at}"
+
+
+class AlertWatermark(TenantModel):
+    """
+    Koniec przedziału czasu już przetworzonego przez powiadomienia zoo
+    (zoo_manager/alerts.py) - kolejny przebieg zaczyna od tej chwili.
+    """
+    processed_until = models.DateTimeField()
+
+    class Meta:
+        db_table = 'alert_watermarks'
+        constraints = [
+            models.UniqueConstraint(fields=['zoo'], name='alert_watermarks_zoo_unique'),
+        ]
+
+
+class FeedItem(TenantModel):
+    """
+    Wpis kanału "moja zmiana" pracownika (zoo_manager/feed.py): gotowe dane
+    zadania, wybiegu lub zwierzęcia, utrzymywane przez odbiorniki sygnałów.
+    """
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('enclosure', 'Enclosure'),
+        ('animal', 'Animal'),
+    ]
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, db_index=False, related_name='+')
+    kind = CompactChoiceField(choices=KIND_CHOICES, codes={'task': 1, 'enclosure': 2, 'animal': 3})
+    object_id = models.BigIntegerField()
+    # Wybieg, przez który obiekt trafił do kanału (zwierzęta, wybiegi) lub wybieg zadania
+    enclosure_id = models.BigIntegerField(null=True, blank=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = 'feed_items'
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'kind', 'object_id'], name='feed_items_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='feed_items_object_idx'),
+        ]
+
+
+class Tombstone(models.Model):
+    """
+    Ślad po usuniętym obiekcie - pozwala klientom synchronizacji usunąć go
+    z lokalnej kopii. Stare wpisy usuwa polecenie prune_tombstones.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    # None dla znacznika czyszczenia (dotyczy wszystkich zoo)
+    zoo = models.ForeignKey(
+        Zoo, on_delete=models.PROTECT, null=True, blank=True, db_constraint=False, db_index=False, related_name='+',
+    )
+
+    class Meta:
+        db_table = 'tombstones'
+        indexes = [
+            models.Index(fields=['zoo', 'change_seq'], name='tombstones_zoo_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} (seq {self.change_seq})"
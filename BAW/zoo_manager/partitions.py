@@ -0,0 +1,133 @@
+"""
+Obsługa miesięcznego partycjonowania tabeli zadań (tylko PostgreSQL).
+
+Tabela ``tasks`` jest partycjonowana zakresowo po ``task_timestamp``:
+każdy miesiąc ma własną partycję ``tasks_pYYYYMM``, a ``tasks_default``
+przyjmuje wiersze spoza utworzonych zakresów. Na innych bazach (np. SQLite)
+funkcje z tego modułu nic nie robią.
+"""
+from datetime import date
+
+TASKS_TABLE = 'tasks'
+DEFAULT_PARTITION = 'tasks_default'
+
+
+def supports_partitioning(connection):
+    """Czy baza obsługuje partycjonowanie deklaratywne"""
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    """Zwraca pierwszy dzień miesiąca dla podanej daty"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """Przesuwa początek miesiąca o podaną liczbę miesięcy"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TASKS_TABLE}_p{month:%Y%m}'
+
+
+def is_partitioned(connection):
+    """Sprawdza, czy tabela zadań jest już tabelą partycjonowaną"""
+    if not supports_partitioning(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TASKS_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(connection):
+    """Zwraca nazwy istniejących partycji miesięcznych"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TASKS_TABLE],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_partition(connection, month):
+    """
+    Tworzy partycję dla podanego miesiąca, jeśli jeszcze nie istnieje.
+
+    Partycja jest tworzona jako osobna tabela i dołączana przez ATTACH
+    PARTITION, więc wiersze, które trafiły wcześniej do ``tasks_default``,
+    są najpierw przenoszone do nowej partycji. Zwraca True, gdy partycja
+    została utworzona.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    if name in existing_partitions(connection):
+        return False
+
+    quote = connection.ops.quote_name
+    lower = month.isoformat()
+    upper = add_months(month, 1).isoformat()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} (LIKE {quote(TASKS_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS ("
+            f"DELETE FROM {quote(DEFAULT_PARTITION)} "
+            f"WHERE task_timestamp >= %s AND task_timestamp < %s RETURNING *"
+            f") INSERT INTO {quote(name)} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(TASKS_TABLE)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+    return True
+
+
+def ensure_partitions(connection, start, end):
+    """Tworzy brakujące partycje dla miesięcy od ``start`` do ``end`` włącznie"""
+    created = []
+    month = month_start(start)
+    last = month_start(end)
+    while month <= last:
+        if ensure_partition(connection, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_empty_partitions_before(connection, cutoff):
+    """
+    Usuwa puste partycje miesięczne, które w całości leżą przed ``cutoff``.
+
+    Wywoływane po archiwizacji, aby stare miesiące nie zajmowały miejsca
+    w bazie.
+    """
+    quote = connection.ops.quote_name
+    dropped = []
+    for name in sorted(existing_partitions(connection)):
+        if name == DEFAULT_PARTITION:
+            continue
+        suffix = name.rsplit('_p', 1)[-1]
+        month = date(int(suffix[:4]), int(suffix[4:]), 1)
+        if add_months(month, 1) > cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT 1 FROM {quote(name)} LIMIT 1")
+            if cursor.fetchone() is not None:
+                continue
+            cursor.execute(f"ALTER TABLE {quote(TASKS_TABLE)} DETACH PARTITION {quote(name)}")
+            cursor.execute(f"DROP TABLE {quote(name)}")
+        dropped.append(name)
+    return dropped
@@ -115,9 +115,20 @@ class CanEditAnimalHealth(permissions.BasePermission):
             
         # Pracownik może tylko aktualizować stan zdrowia
         if request.method == 'PATCH':
-            # Sprawdź czy w danych jest tylko pole health
-            if request.data.keys() == {'health'}:
+            # Sprawdź czy w danych jest tylko pole health (i ewentualnie wersja)
+            if request.data.keys() - {'version'} == {'health'}:
                 return True
                 
         return False
 
+
+
+class IsManagerOrStaff(permissions.BasePermission):
+    """
+    Pozwala na dostęp managerom i pracownikom z dostępem do panelu administracyjnego
+    """
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        return request.user.role == 'manager' or request.user.is_staff
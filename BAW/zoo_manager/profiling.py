@@ -0,0 +1,301 @@
+"""
+Profilowanie pojedynczych żądań na życzenie.
+
+Manager lub pracownik z dostępem do panelu administracyjnego dodaje do
+żądania nagłówek ``X-Profile: 1`` albo parametr ``?_profile=1``. Całe
+przetwarzanie żądania (widok, serializer, renderowanie odpowiedzi) jest wtedy
+próbkowane: osobny wątek co ``PROFILING_SAMPLE_INTERVAL`` sekund odczytuje
+stos wątku żądania. Rejestrowane są też wszystkie zapytania SQL, a dla
+najwolniejszych odczytów wykonywany jest ``EXPLAIN`` (po zakończeniu
+żądania, poza mierzonym czasem).
+
+Wynik trafia do katalogu ``settings.PROFILING_DIR``: ``<id>.json`` z
+podsumowaniem i zapytaniami oraz ``<id>.speedscope.json`` z wykresem
+płomieniowym do otwarcia w https://www.speedscope.app. Identyfikator
+profilu wraca w nagłówku ``X-Profile-Id``; listę profili udostępnia
+``/api/profiles/``. Profil jest oznaczony zoo, w którym wykonano żądanie, i
+widoczny tylko w nim. Parametry zapytań do tabel z hasłami i sesjami
+(``MASKED_TABLES``) są zamaskowane, a takich zapytań nie obejmuje
+``EXPLAIN`` - plan PostgreSQL zawiera wartości parametrów.
+
+Bez flagi middleware tylko sprawdza nagłówek i parametr, a przy
+``PROFILING_ENABLED = False`` nie jest w ogóle ładowany.
+"""
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from .authentication import request_user
+from .tenants import current_zoo
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAM = '_profile'
+PROFILE_ID_PATTERN = re.compile(r'\d{8}T\d{6}-[0-9a-f]{8}')
+
+# Tabele, których parametry (hasła, klucze sesji) nie trafiają do profilu
+MASKED_TABLES = ('employees', 'django_session')
+MASKED_TABLES_PATTERN = re.compile(r'\b(?:%s)\b' % '|'.join(MASKED_TABLES))
+MASKED_VALUE = '***'
+
+
+def profiles_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def is_valid_profile_id(profile_id):
+    """Sprawdza format identyfikatora (chroni też przed wskazaniem dowolnej ścieżki)"""
+    return PROFILE_ID_PATTERN.fullmatch(profile_id) is not None
+
+
+def summary_path(profile_id):
+    return profiles_dir() / f'{profile_id}.json'
+
+
+def speedscope_path(profile_id):
+    return profiles_dir() / f'{profile_id}.speedscope.json'
+
+
+def _visible(summary):
+    """Profil należy do bieżącego zoo (bez ustalonego zoo widoczne są wszystkie)"""
+    zoo = current_zoo()
+    return zoo is None or summary.get('zoo') == zoo.pk
+
+
+def list_profiles():
+    """Podsumowania zapisanych profili bieżącego zoo (bez zapytań), od najnowszego"""
+    directory = profiles_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        if not is_valid_profile_id(path.stem):
+            continue
+        summary = json.loads(path.read_text(encoding='utf-8'))
+        if not _visible(summary):
+            continue
+        summary.pop('queries', None)
+        summary.pop('top_functions', None)
+        profiles.append(summary)
+    return profiles
+
+
+def read_profile(profile_id):
+    """Podsumowanie profilu albo None, jeśli go nie ma lub należy do innego zoo"""
+    path = summary_path(profile_id)
+    if not path.exists():
+        return None
+    summary = json.loads(path.read_text(encoding='utf-8'))
+    return summary if _visible(summary) else None
+
+
+def can_profile(user):
+    return bool(user and user.is_authenticated and (user.role == 'manager' or user.is_staff))
+
+
+class StackSampler:
+    """Próbkuje stos jednego wątku z osobnego wątku (bez zewnętrznych zależności)"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._started = self._last = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _frame_index(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_index(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples.append(stack)
+                self.weights.append((now - self._last) * 1000)
+            self._last = now
+
+    def top_functions(self, limit=20):
+        """Funkcje z największym czasem własnym (na szczycie stosu)"""
+        names = {index: key for key, index in self.frames.items()}
+        own = Counter()
+        for stack, weight in zip(self.samples, self.weights):
+            own[stack[-1]] += weight
+        return [
+            {'name': names[index][0], 'file': names[index][1], 'line': names[index][2], 'ms': round(ms, 2)}
+            for index, ms in own.most_common(limit)
+        ]
+
+    def speedscope(self, name):
+        frames = sorted(self.frames.items(), key=lambda item: item[1])
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'zoo_manager.profiling',
+            'activeProfileIndex': 0,
+            'shared': {
+                'frames': [{'name': key[0], 'file': key[1], 'line': key[2]} for key, _ in frames],
+            },
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round(self.duration * 1000, 3),
+                'samples': self.samples,
+                'weights': [round(weight, 3) for weight in self.weights],
+            }],
+        }
+
+
+class QueryRecorder:
+    """Wrapper ``execute`` zapisujący zapytania wszystkich baz wraz z czasem"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                masked = MASKED_TABLES_PATTERN.search(sql) is not None
+                self.queries.append({
+                    'database': alias,
+                    'sql': sql,
+                    'params': _mask(params, many) if masked else params,
+                    'many': many,
+                    'masked': masked,
+                    'ms': round((time.perf_counter() - started) * 1000, 3),
+                })
+        return wrapper
+
+    def explain_slowest(self, limit):
+        """Plan wykonania najwolniejszych odczytów (EXPLAIN bez ANALYZE - zapytanie nie jest wykonywane)"""
+        reads = [
+            query for query in self.queries
+            if not query['many'] and not query['masked']
+            and query['sql'].split(None, 1)[0].upper() in ('SELECT', 'WITH')
+        ]
+        for query in sorted(reads, key=lambda query: query['ms'], reverse=True)[:limit]:
+            connection = connections[query['database']]
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"{connection.ops.explain_query_prefix()} {query['sql']}", query['params'])
+                    query['explain'] = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+            except DatabaseError as e:
+                query['explain'] = f'EXPLAIN nie powiódł się: {e}'
+
+
+def _mask(params, many):
+    """Zastępuje wartości parametrów zapytania, zachowując ich układ"""
+    if params is None:
+        return None
+    if many:
+        return [_mask(row, False) for row in params]
+    if isinstance(params, dict):
+        return dict.fromkeys(params, MASKED_VALUE)
+    return [MASKED_VALUE] * len(params)
+
+
+def _requested(request):
+    return request.META.get(HEADER, '') == '1' or request.GET.get(QUERY_PARAM, '') == '1'
+
+
+def _prune(directory):
+    summaries = sorted(path for path in directory.glob('*.json') if is_valid_profile_id(path.stem))
+    for path in summaries[:max(len(summaries) - settings.PROFILING_KEEP, 0)]:
+        path.unlink(missing_ok=True)
+        speedscope_path(path.stem).unlink(missing_ok=True)
+
+
+def save_profile(request, response, user, sampler, recorder):
+    created = timezone.now()
+    profile_id = f"{created:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    name = f'{request.method} {request.get_full_path()}'
+    queries = recorder.queries
+    zoo = current_zoo()
+    summary = {
+        'id': profile_id,
+        'zoo': zoo.pk if zoo is not None else user.zoo_id,
+        'created': created.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'user': user.username,
+        'duration_ms': round(sampler.duration * 1000, 3),
+        'samples': len(sampler.samples),
+        'query_count': len(queries),
+        'query_ms': round(sum(query['ms'] for query in queries), 3),
+        'top_functions': sampler.top_functions(),
+        'queries': queries,
+    }
+
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    speedscope_path(profile_id).write_text(json.dumps(sampler.speedscope(name)), encoding='utf-8')
+    summary_path(profile_id).write_text(json.dumps(summary, ensure_ascii=False, default=str), encoding='utf-8')
+    _prune(directory)
+    return profile_id
+
+
+class ProfilingMiddleware:
+    """Profiluje żądania z flagą ``X-Profile: 1`` / ``?_profile=1`` (managerowie i personel)"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _requested(request):
+            return self.get_response(request)
+        user = request_user(request)
+        if not can_profile(user):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder(connection.alias)))
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+
+        recorder.explain_slowest(settings.PROFILING_EXPLAIN_QUERIES)
+        response['X-Profile-Id'] = save_profile(request, response, user, sampler, recorder)
+        return response
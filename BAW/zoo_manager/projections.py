@@ -0,0 +1,199 @@
+"""
+Szybka ścieżka odczytu list oparta o projekcje ``values()``.
+
+Lista serializowana przez ``ModelSerializer`` tworzy obiekt modelu dla
+każdego wiersza i przepuszcza go przez wszystkie pola serializera (w tym
+SerializerMethodField, które często wykonują dodatkowe zapytania). Tutaj
+lista pól serializera jest jednorazowo kompilowana do projekcji
+``values()``/``annotate()``, a wynik budowany wprost ze słowników - bez
+tworzenia instancji modeli. Wynik jest identyczny z ``serializer.data``.
+
+Pola, których nie da się odczytać wprost z kolumny (SerializerMethodField,
+właściwości modelu), serializer opisuje w atrybucie ``projected_fields``
+za pomocą ``Computed``, ``Annotated`` lub ``Related``.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Liczba kluczy w jednym zapytaniu o wartości relacji wiele-do-wielu
+RELATED_CHUNK_SIZE = 1000
+
+
+class Computed:
+    """Wartość wyliczana w Pythonie z kolumn pobranych przez values()"""
+
+    def __init__(self, func, *lookups):
+        self.func = func
+        self.lookups = lookups
+
+
+class Annotated:
+    """Wartość wyliczana przez bazę danych (wyrażenie dla annotate())"""
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class Related:
+    """
+    Lista wartości z relacji wiele-do-wielu.
+
+    Pobierana jednym dodatkowym zapytaniem dla całej strony wyników,
+    posortowana po id powiązanych obiektów.
+    """
+
+    def __init__(self, relation, func, *lookups):
+        self.relation = relation
+        self.func = func
+        self.lookups = lookups
+
+
+class Projection:
+    """Skompilowana projekcja jednego serializera"""
+
+    def __init__(self, serializer_class):
+        model = serializer_class.Meta.model
+        specs = getattr(serializer_class, 'projected_fields', {})
+        self.model = model
+        self.columns = [model._meta.pk.attname]
+        self.annotations = {}
+        self.related = {}
+        self.builders = []
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            spec = specs.get(name)
+            if isinstance(spec, Computed):
+                self._add_columns(spec.lookups)
+                self.builders.append((name, self._computed(spec)))
+            elif isinstance(spec, Annotated):
+                self.annotations[name] = spec.expression
+                self.builders.append((name, self._column(name)))
+            elif isinstance(spec, Related):
+                self.related[name] = spec
+                self.builders.append((name, self._related(name)))
+            else:
+                column = self._model_column(field)
+                if column is None:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.{name} wymaga wpisu w projected_fields'
+                    )
+                self._add_columns([column])
+                if isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField)):
+                    # Klucz obcy i pola tylko do odczytu zwracają surową wartość
+                    self.builders.append((name, self._column(column)))
+                else:
+                    self.builders.append((name, self._converted(column, field)))
+
+    def _add_columns(self, lookups):
+        for lookup in lookups:
+            if lookup not in self.columns:
+                self.columns.append(lookup)
+
+    def _model_column(self, field):
+        """Kolumna modelu odpowiadająca polu serializera (None, jeśli jej nie ma)"""
+        if isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField)):
+            return None
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        return model_field.attname
+
+    @staticmethod
+    def _column(column):
+        return lambda row, related: row[column]
+
+    @staticmethod
+    def _converted(column, field):
+        def build(row, related):
+            value = row[column]
+            return None if value is None else field.to_representation(value)
+        return build
+
+    @staticmethod
+    def _computed(spec):
+        return lambda row, related: spec.func(*(row[lookup] for lookup in spec.lookups))
+
+    def _related(self, name):
+        pk = self.model._meta.pk.attname
+        return lambda row, related: related[name].get(row[pk], [])
+
+    def queryset(self, queryset):
+        """Zamienia queryset modelu na projekcję values() zachowując filtry i sortowanie"""
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values(*self.columns, *self.annotations)
+
+    def _fetch_related(self, spec, pks):
+        field = self.model._meta.get_field(spec.relation)
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        columns = (f'{source}_id', *(f'{target}__{lookup}' for lookup in spec.lookups))
+        grouped = defaultdict(list)
+        # Porcje kluczy, tak jak w prefetch_related - jedno IN (...) dla całej
+        # niestronicowanej listy przekroczyłoby limit parametrów SQLite
+        for start in range(0, len(pks), RELATED_CHUNK_SIZE):
+            rows = (
+                through.objects.filter(**{f'{source}__in': pks[start:start + RELATED_CHUNK_SIZE]})
+                .order_by(f'{target}_id')
+                .values_list(*columns)
+            )
+            for owner, *values in rows:
+                grouped[owner].append(spec.func(*values))
+        return grouped
+
+    def build(self, rows):
+        """Buduje listę słowników w kolejności i formacie pól serializera"""
+        rows = list(rows)
+        pk = self.model._meta.pk.attname
+        related = {}
+        if self.related:
+            pks = [row[pk] for row in rows]
+            related = {name: self._fetch_related(spec, pks) for name, spec in self.related.items()}
+        return [
+            {name: builder(row, related) for name, builder in self.builders}
+            for row in rows
+        ]
+
+
+_compiled = {}
+
+
+def compile_projection(serializer_class):
+    """Zwraca (z pamięci podręcznej) projekcję dla klasy serializera"""
+    projection = _compiled.get(serializer_class)
+    if projection is None:
+        projection = _compiled[serializer_class] = Projection(serializer_class)
+    return projection
+
+
+def supports_projection(serializer_class):
+    return hasattr(serializer_class, 'projected_fields')
+
+
+class ProjectedListMixin:
+    """
+    Domieszka ViewSetu: akcja list korzysta z projekcji values() zamiast
+    instancji modeli, jeśli serializer deklaruje ``projected_fields``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if not supports_projection(serializer_class):
+            return super().list(request, *args, **kwargs)
+
+        projection = compile_projection(serializer_class)
+        queryset = projection.queryset(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.build(page))
+        return Response(projection.build(queryset))
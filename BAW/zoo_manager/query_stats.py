@@ -0,0 +1,243 @@
+"""
+Ciągła statystyka zapytań SQL według kształtu (odcisku).
+
+Każde zapytanie wykonane przez Django przechodzi przez wrapper ``execute``
+podpinany do każdego nowego połączenia. Tekst SQL jest sprowadzany do
+odcisku (``fingerprint``): wartości i listy ``IN (...)`` zastępowane są
+symbolami, więc np. ``responsible_employees.all()`` wywoływane dla każdego
+wybiegu osobno daje jeden wiersz statystyki z dużą liczbą wykonań.
+
+Statystyka (liczba, łączny czas, maksimum i przybliżony p95) jest liczona
+osobno dla każdej trójki (odcisk, widok, zoo żądania) w pamięci procesu;
+``/api/query-stats/`` pokazuje tylko wiersze bieżącego zoo. Tabela ma
+ograniczony rozmiar ``QUERY_STATS_MAX_ENTRIES`` - po jej zapełnieniu nowe
+kształty trafiają do wspólnego wiersza ``OTHER``. Co
+``QUERY_STATS_FLUSH_SECONDS`` migawka trafia do logu ``zoo_manager.query_stats``
+i tabela jest zerowana; bieżącą migawkę procesu zwraca też
+``/api/query-stats/``.
+
+Zapytania wolniejsze niż ``QUERY_STATS_SLOW_MS`` dostają jednorazowo (dla
+każdego odcisku i zoo) plan ``EXPLAIN``, wykonywany po zakończeniu żądania.
+Pomijane są zapytania do tabel z hasłami i sesjami
+(``profiling.MASKED_TABLES``) - plan PostgreSQL zawiera wartości parametrów,
+więc ich parametry nie są nawet zapamiętywane.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+
+from .profiling import MASKED_TABLES_PATTERN
+from .tenants import current_zoo
+
+logger = logging.getLogger(__name__)
+
+OTHER = '(inne zapytania)'
+NO_VIEW = '-'
+
+# Górne granice przedziałów histogramu czasu (ms): 0.05 ms ... ~26 s
+BUCKETS = tuple(0.05 * 2 ** i for i in range(20))
+
+_IN_LIST = re.compile(r'\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_SPACE = re.compile(r'\s+')
+
+_view = ContextVar('query_stats_view', default=NO_VIEW)
+# Zapytania wykonywane przez samą statystykę (EXPLAIN) nie są liczone
+_paused = ContextVar('query_stats_paused', default=False)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Kształt zapytania: bez wartości, z jednym symbolem zamiast list IN"""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class Entry:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.histogram[bisect_left(BUCKETS, ms)] += 1
+
+    def percentile(self, fraction):
+        """Górna granica przedziału zawierającego dany percentyl"""
+        threshold = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= threshold:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    """Ograniczona tabela statystyk (odcisk, widok) jednego procesu"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._explains = {}
+        self._pending = {}
+        self.started = time.time()
+
+    def record(self, sql, params, alias, ms, many):
+        shape = fingerprint(sql)
+        zoo = current_zoo()
+        zoo_id = zoo.pk if zoo is not None else None
+        key = (shape, _view.get(), zoo_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= settings.QUERY_STATS_MAX_ENTRIES:
+                    key = (OTHER, NO_VIEW, zoo_id)
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = Entry()
+            entry.add(ms)
+            plan_key = (shape, zoo_id)
+            if (ms >= settings.QUERY_STATS_SLOW_MS and not many and plan_key not in self._explains
+                    and plan_key not in self._pending and sql.split(None, 1)[0].upper() in ('SELECT', 'WITH')
+                    and MASKED_TABLES_PATTERN.search(sql) is None):
+                self._pending[plan_key] = (alias, sql, params)
+
+    def explain_pending(self):
+        """Plany wolnych zapytań (EXPLAIN bez ANALYZE) - poza wrapperem, na połączeniach bieżącego wątku"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        token = _paused.set(True)
+        try:
+            for (shape, zoo_id), (alias, sql, params) in pending.items():
+                connection = connections[alias]
+                try:
+                    # Błąd planu nie może przerwać transakcji żądania
+                    with transaction.atomic(using=alias), connection.cursor() as cursor:
+                        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                        plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+                except DatabaseError as e:
+                    plan = f'EXPLAIN nie powiódł się: {e}'
+                with self._lock:
+                    self._explains[shape, zoo_id] = plan
+                logger.warning('Wolne zapytanie (zoo %s) %s\n%s', zoo_id, shape, plan)
+        finally:
+            _paused.reset(token)
+
+    def snapshot(self, reset=False, zoo=None):
+        """Statystyki posortowane malejąco po łącznym czasie (tylko danego zoo, jeśli podane)"""
+        with self._lock:
+            entries, started = self._entries, self.started
+            explains = dict(self._explains)
+            if reset:
+                self._entries = {}
+                self.started = time.time()
+        rows = [
+            {
+                'fingerprint': shape,
+                'view': view,
+                'zoo': zoo_id,
+                'count': entry.count,
+                'total_ms': round(entry.total_ms, 3),
+                'avg_ms': round(entry.total_ms / entry.count, 3),
+                'p95_ms': round(entry.percentile(0.95), 3),
+                'max_ms': round(entry.max_ms, 3),
+                'explain': explains.get((shape, zoo_id)),
+            }
+            for (shape, view, zoo_id), entry in entries.items()
+            if zoo is None or zoo_id == zoo.pk
+        ]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return {'since': started, 'until': time.time(), 'queries': rows}
+
+    def flush(self):
+        """Zapisuje migawkę do logu i zeruje tabelę"""
+        self.explain_pending()
+        snapshot = self.snapshot(reset=True)
+        if snapshot['queries']:
+            logger.info('%s', json.dumps(snapshot, ensure_ascii=False))
+        return snapshot
+
+
+stats = QueryStats()
+
+
+def _wrapper(alias):
+    def wrapper(execute, sql, params, many, context):
+        if _paused.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.record(sql, params, alias, (time.perf_counter() - started) * 1000, many)
+    wrapper.query_stats = True
+    return wrapper
+
+
+def install(sender, connection, **kwargs):
+    """Podpina wrapper do połączenia (raz na obiekt połączenia, także po ponownym połączeniu)"""
+    if not any(getattr(wrapper, 'query_stats', False) for wrapper in connection.execute_wrappers):
+        # Na początek listy: connection.execute_wrapper() zdejmuje ostatni element
+        connection.execute_wrappers.insert(0, _wrapper(connection.alias))
+
+
+if settings.QUERY_STATS_ENABLED:
+    connection_created.connect(install, dispatch_uid='zoo_manager.query_stats')
+
+
+class QueryStatsMiddleware:
+    """
+    Przypisuje zapytania do widoku, po żądaniu wykonuje zaległe EXPLAIN
+    i co ``QUERY_STATS_FLUSH_SECONDS`` zapisuje migawkę do logu
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._next_flush = time.monotonic() + settings.QUERY_STATS_FLUSH_SECONDS
+        self._flush_lock = threading.Lock()
+
+    def __call__(self, request):
+        token = _view.set(NO_VIEW)
+        try:
+            response = self.get_response(request)
+        finally:
+            _view.reset(token)
+        stats.explain_pending()
+        if time.monotonic() >= self._next_flush and self._flush_lock.acquire(blocking=False):
+            try:
+                self._next_flush = time.monotonic() + settings.QUERY_STATS_FLUSH_SECONDS
+                stats.flush()
+            finally:
+                self._flush_lock.release()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        _view.set(match.view_name or match.route if match else NO_VIEW)
@@ -0,0 +1,86 @@
+"""
+Szybkie renderery i parsery API.
+
+``ORJSONRenderer``/``ORJSONParser`` zastępują domyślne klasy JSON z DRF
+implementacją opartą o orjson. ``MessagePackRenderer``/``MessagePackParser``
+obsługują binarny format ``application/msgpack`` - są dostępne tylko, gdy
+zainstalowany jest pakiet msgpack.
+"""
+import datetime
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack jest opcjonalny
+    msgpack = None
+
+# Typy, których orjson lub msgpack nie obsługują natywnie (Decimal, daty
+# w msgpack, leniwe napisy tłumaczeń...) kodujemy jak domyślny enkoder DRF.
+_drf_encoder = JSONEncoder()
+
+# Surowe daty i czasy (spoza pól serializerów) zapisujemy jak DjangoJSONEncoder -
+# z milisekundami i strefą UTC jako "Z", tak jak dane JSON zapisywane w bazie
+# (kanały pracowników, zadania w tle). orjson dostaje je przez
+# OPT_PASSTHROUGH_DATETIME, bo sam zapisałby pełne mikrosekundy.
+_django_encoder = DjangoJSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def encode_default(obj):
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return _django_encoder.default(obj)
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renderer JSON oparty o orjson, zgodny z formatem JSONRenderer z DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=options)
+
+
+class ORJSONParser(JSONParser):
+    """Parser JSON oparty o orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer binarnego formatu MessagePack"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Parser binarnego formatu MessagePack"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
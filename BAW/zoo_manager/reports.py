@@ -0,0 +1,246 @@
+"""
+Raporty obciążenia i realizacji zadań per pracownik i per wybieg.
+
+Raporty czytają wyłącznie z tabeli ``TaskDailyStat``. Tabela jest
+aktualizowana przyrostowo: każdy zapis lub usunięcie zadania przesuwa liczniki
+w odpowiednich dziennych "kubełkach". Zmiany z pominięciem sygnałów (np.
+``QuerySet.update``, SET_NULL przy usuwaniu pracownika) wyrównuje pełne
+przeliczenie ``rebuild()`` (polecenie ``refresh_task_reports``).
+
+Zadania przenoszone do archiwum (``archive_tasks``) pozostają w raportach -
+usuwanie ich z tabeli odbywa się w ``preserve_stats()``, który przenosi ich
+liczniki do części zarchiwizowanej (``archived``/``archived_completed``).
+Tej części nie da się odtworzyć z tabeli zadań, więc ``rebuild()`` przelicza
+od zera tylko zadania z tabeli i dolicza do nich zachowaną część
+zarchiwizowaną.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Employee, Enclosure, Task, TaskDailyStat
+from .signals import fields_updated
+
+# Identyfikator kubełka dla zadań bez pracownika / bez wybiegu
+UNASSIGNED = 0
+
+TRACKED_FIELDS = ('zoo_id', 'task_timestamp', 'employee_id', 'enclosure_id', 'is_completed')
+
+# Liczniki zadań usuniętych w bloku preserve_stats(): kubełek -> [total, completed]
+_archived_deltas = ContextVar('zoo_archived_report_stats', default=None)
+
+
+@contextmanager
+def preserve_stats():
+    """
+    Usuwanie zadań w obrębie bloku with nie zmienia podsumowań - liczniki
+    usuniętych zadań przechodzą do części zarchiwizowanej (po wyjściu z bloku,
+    jednym UPDATE na kubełek)
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    token = _archived_deltas.set(deltas)
+    try:
+        yield
+    finally:
+        _archived_deltas.reset(token)
+    for (zoo_id, scope, object_id, day), (total, completed) in deltas.items():
+        TaskDailyStat.objects.filter(  # type: ignore
+            zoo_id=zoo_id, scope=scope, object_id=object_id, day=day
+        ).update(archived=F('archived') + total, archived_completed=F('archived_completed') + completed)
+
+
+def _task_state(task):
+    return {field: getattr(task, field) for field in TRACKED_FIELDS}
+
+
+def _buckets(state):
+    day = timezone.localdate(state['task_timestamp'])
+    return [
+        (state['zoo_id'], 'employee', state['employee_id'] or UNASSIGNED, day),
+        (state['zoo_id'], 'enclosure', state['enclosure_id'] or UNASSIGNED, day),
+    ]
+
+
+def _bump(zoo_id, scope, object_id, day, total, completed):
+    """Dodaje różnicę do liczników kubełka, tworząc go w razie potrzeby"""
+    lookup = {'zoo_id': zoo_id, 'scope': scope, 'object_id': object_id, 'day': day}
+    changes = {'total': F('total') + total, 'completed': F('completed') + completed}
+    if TaskDailyStat.objects.filter(**lookup).update(**changes):  # type: ignore
+        return
+    try:
+        with transaction.atomic():
+            TaskDailyStat.objects.create(total=total, completed=completed, **lookup)  # type: ignore
+    except IntegrityError:
+        # Kubełek utworzył w międzyczasie równoległy zapis
+        TaskDailyStat.objects.filter(**lookup).update(**changes)  # type: ignore
+
+
+def apply_delta(previous, current):
+    """
+    Przenosi zadanie między kubełkami.
+
+    ``previous`` i ``current`` to słowniki z polami TRACKED_FIELDS (stan przed
+    i po zmianie) albo None dla nowego / usuniętego zadania.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    if previous is not None:
+        for key in _buckets(previous):
+            deltas[key][0] -= 1
+            deltas[key][1] -= int(previous['is_completed'])
+    if current is not None:
+        for key in _buckets(current):
+            deltas[key][0] += 1
+            deltas[key][1] += int(current['is_completed'])
+
+    for (zoo_id, scope, object_id, day), (total, completed) in deltas.items():
+        if total or completed:
+            _bump(zoo_id, scope, object_id, day, total, completed)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild(start=None, end=None):
+    """
+    Przelicza podsumowania od zera dla podanego zakresu dni (domyślnie całość).
+
+    Liczniki zadań z tabeli są liczone od nowa, a część zarchiwizowana jest
+    zachowywana - także w dniach, z których wszystkie zadania są już w archiwum.
+    W żądaniu obejmuje tylko bieżące zoo, poza nim - wszystkie zoo w bazie.
+    """
+    tasks = Task.objects.all()  # type: ignore
+    stats = TaskDailyStat.objects.all()  # type: ignore
+    # Filtrowanie po task_timestamp (a nie po dniu) pozwala użyć indeksu
+    # i ograniczyć odczyt do właściwych partycji
+    if start is not None:
+        tasks = tasks.filter(task_timestamp__gte=_day_start(start))
+        stats = stats.filter(day__gte=start)
+    if end is not None:
+        tasks = tasks.filter(task_timestamp__lt=_day_start(end + timedelta(days=1)))
+        stats = stats.filter(day__lte=end)
+    tasks = tasks.annotate(day=TruncDate('task_timestamp'))
+
+    counts = defaultdict(lambda: [0, 0, 0, 0])
+    for scope, column in (('employee', 'employee_id'), ('enclosure', 'enclosure_id')):
+        grouped = tasks.values('zoo_id', 'day', column).annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(is_completed=True)),
+        ).order_by()
+        for row in grouped:
+            key = (row['zoo_id'], scope, row[column] or UNASSIGNED, row['day'])
+            counts[key][:2] = row['total'], row['completed']
+
+    with transaction.atomic():
+        archived = stats.filter(Q(archived__gt=0) | Q(archived_completed__gt=0)).values_list(
+            'zoo_id', 'scope', 'object_id', 'day', 'archived', 'archived_completed'
+        )
+        for zoo_id, scope, object_id, day, total, completed in archived:
+            counts[(zoo_id, scope, object_id, day)][2:] = total, completed
+        rows = [
+            TaskDailyStat(
+                zoo_id=zoo_id, scope=scope, object_id=object_id, day=day,
+                total=total + archived_total, completed=completed + archived_completed,
+                archived=archived_total, archived_completed=archived_completed,
+            )
+            for (zoo_id, scope, object_id, day), (total, completed, archived_total, archived_completed) in counts.items()
+        ]
+        stats.delete()
+        TaskDailyStat.objects.bulk_create(rows, batch_size=1000)  # type: ignore
+    return len(rows)
+
+
+def summarize(scope, start=None, end=None, by_day=False):
+    """
+    Zwraca metryki per pracownik lub wybieg w podanym zakresie dni.
+
+    Zadania zaległe (overdue) to nieukończone zadania z terminem przed
+    dzisiejszym dniem.
+    """
+    today = timezone.localdate()
+    stats = TaskDailyStat.objects.filter(scope=scope)  # type: ignore
+    if start is not None:
+        stats = stats.filter(day__gte=start)
+    if end is not None:
+        stats = stats.filter(day__lte=end)
+
+    group_by = ['object_id', 'day'] if by_day else ['object_id']
+    rows = stats.values(*group_by).annotate(
+        total_sum=Sum('total'),
+        completed_sum=Sum('completed'),
+        overdue_sum=Sum(F('total') - F('completed'), filter=Q(day__lt=today)),
+    ).order_by(*group_by)
+
+    model = Employee if scope == 'employee' else Enclosure
+    names = {
+        obj.pk: str(obj.get_full_name() if scope == 'employee' else obj.name)
+        for obj in model.objects.filter(pk__in={row['object_id'] for row in rows})  # type: ignore
+    }
+
+    results = []
+    for row in rows:
+        total = row['total_sum'] or 0
+        completed = row['completed_sum'] or 0
+        result = {
+            'id': row['object_id'] or None,
+            'name': names.get(row['object_id']),
+            'total': total,
+            'completed': completed,
+            'pending': total - completed,
+            'overdue': row['overdue_sum'] or 0,
+            'completion_rate': round(completed / total, 4) if total else None,
+        }
+        if by_day:
+            result['day'] = row['day']
+        results.append(result)
+    return results
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw=False, **kwargs):
+    """Zapamiętuje stan zadania sprzed zapisu, aby policzyć różnicę"""
+    instance._report_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._report_previous = (
+        Task.objects.using(router.db_for_write(Task, instance=instance))  # type: ignore
+        .filter(pk=instance.pk)
+        .values(*TRACKED_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_delta(getattr(instance, '_report_previous', None), _task_state(instance))
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_delete(sender, instance, **kwargs):
+    archived = _archived_deltas.get()
+    if archived is None:
+        apply_delta(_task_state(instance), None)
+        return
+    state = _task_state(instance)
+    for key in _buckets(state):
+        archived[key][0] += 1
+        archived[key][1] += int(state['is_completed'])
+
+
+@receiver(fields_updated, sender=Task)
+def update_stats_on_fields_updated(sender, row, previous, **kwargs):
+    """Szybka aktualizacja pól (fast_updates) podaje poprzednie wartości wprost"""
+    current = {field: row[field] for field in TRACKED_FIELDS}
+    before = {**current, **{field: value for field, value in previous.items() if field in current}}
+    if before != current:
+        apply_delta(before, current)
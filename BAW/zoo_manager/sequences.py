@@ -0,0 +1,140 @@
+"""
+Globalny, rosnący numer zmiany (``change_seq``) używany przez synchronizację
+przyrostową (zoo_manager/sync.py).
+
+Na PostgreSQL to zwykła sekwencja ``zoo_change_seq``. Na innych bazach
+(SQLite w środowisku deweloperskim) sekwencję zastępuje jednowierszowa
+tabela-licznik o tej samej nazwie. Obie tworzy migracja 0011.
+
+Numery są wydawane w chwili zapisu, a wiersze stają się widoczne dopiero po
+zatwierdzeniu transakcji, więc ostatni wydany numer nie jest bezpiecznym
+kursorem synchronizacji. Na PostgreSQL numery wydaje funkcja
+``zoo_next_change_seq()`` (migracja 0020). Przy pierwszym numerze w
+transakcji bierze ona współdzieloną blokadę doradczą (do końca transakcji) z
+kluczem nie większym niż wydawane numery. ``safe_change_seq()`` zwraca więc
+numer mniejszy od najniższego klucza trzymanego przez trwające transakcje.
+Na SQLite zapisy są szeregowane, więc zatwierdzony stan licznika jest
+bezpieczny sam w sobie.
+"""
+from django.db import connections
+from django.db.models import Value
+from django.db.models.expressions import RawSQL
+
+SEQUENCE_NAME = 'zoo_change_seq'
+NEXT_FUNCTION = 'zoo_next_change_seq'
+# Znacznik transakcji, która ma już blokadę doradczą (set_config(..., true))
+IN_FLIGHT_SETTING = 'zoo.change_seq_in_flight'
+
+
+def create_sequence(connection):
+    if connection.vendor == 'postgresql':
+        statements = [f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME}']
+    else:
+        statements = [
+            f'CREATE TABLE IF NOT EXISTS {SEQUENCE_NAME} (id INTEGER PRIMARY KEY, value BIGINT NOT NULL)',
+            f'INSERT INTO {SEQUENCE_NAME} (id, value) VALUES (1, 0)',
+        ]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_sequence(connection):
+    kind = 'SEQUENCE' if connection.vendor == 'postgresql' else 'TABLE'
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP {kind} IF EXISTS {SEQUENCE_NAME}')
+
+
+def create_next_function(connection):
+    """Funkcja wydająca numery zmian z rejestracją trwającej transakcji (tylko PostgreSQL)"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {NEXT_FUNCTION}() RETURNS bigint
+            LANGUAGE plpgsql VOLATILE AS $$
+            BEGIN
+                IF current_setting('{IN_FLIGHT_SETTING}', true) IS DISTINCT FROM 'on' THEN
+                    -- Klucz przed nextval(), więc nie przekracza żadnego numeru tej transakcji
+                    PERFORM pg_advisory_xact_lock_shared(
+                        (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {SEQUENCE_NAME}) + 1
+                    );
+                    PERFORM set_config('{IN_FLIGHT_SETTING}', 'on', true);
+                END IF;
+                RETURN nextval('{SEQUENCE_NAME}');
+            END
+            $$
+        """)
+
+
+def drop_next_function(connection):
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP FUNCTION IF EXISTS {NEXT_FUNCTION}()')
+
+
+def next_change_seq(using='default'):
+    """Pobiera kolejny numer zmiany"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'SELECT {NEXT_FUNCTION}()')
+        else:
+            cursor.execute(f'UPDATE {SEQUENCE_NAME} SET value = value + 1 WHERE id = 1 RETURNING value')
+        return cursor.fetchone()[0]
+
+
+def current_change_seq(using='default'):
+    """Ostatnio wydany numer zmiany (bez jego zużywania)"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {SEQUENCE_NAME}')
+        else:
+            cursor.execute(f'SELECT value FROM {SEQUENCE_NAME} WHERE id = 1')
+        return cursor.fetchone()[0]
+
+
+def safe_change_seq(using='default'):
+    """
+    Najwyższy numer zmiany, do którego wszystkie zapisy są już zatwierdzone
+    (albo wycofane) - kursor, po którym nie pojawi się już wiersz z niższym
+    numerem. Trzeba go czytać z bazy głównej, przed odczytem zmian.
+    """
+    current = current_change_seq(using)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return current
+    with connection.cursor() as cursor:
+        # Klucz bigint blokady doradczej: classid - starsze 32 bity, objid - młodsze
+        cursor.execute(
+            "SELECT min((classid::bigint << 32) | objid::bigint) FROM pg_locks "
+            "WHERE locktype = 'advisory' AND objsubid = 1 "
+            "AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+        )
+        in_flight = cursor.fetchone()[0]
+    return current if in_flight is None else min(current, in_flight - 1)
+
+
+def advance_change_seq(value, using='default'):
+    """Przesuwa licznik co najmniej do ``value`` (np. po wczytaniu wierszy z zewnątrz)"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"SELECT setval('{SEQUENCE_NAME}', GREATEST(%s, (SELECT last_value FROM {SEQUENCE_NAME})))",
+                [value],
+            )
+        else:
+            cursor.execute(f'UPDATE {SEQUENCE_NAME} SET value = MAX(value, %s) WHERE id = 1', [value])
+
+
+def change_seq_expression(using='default'):
+    """
+    Wyrażenie dla UPDATE ustawiające nowy numer zmiany. Na PostgreSQL
+    funkcja wydająca numery trafia wprost do polecenia, bez osobnego zapytania.
+    """
+    if connections[using].vendor == 'postgresql':
+        return RawSQL(f'{NEXT_FUNCTION}()', ())
+    return Value(next_change_seq(using))
@@ -1,15 +1,35 @@
 from rest_framework import serializers
 from typing import TYPE_CHECKING
-from .models import Employee, Enclosure, Animal, Task
+from django.db import router, transaction
+from django.db.models import Count
+from .models import Employee, Enclosure, Animal, Task, TaskType, Job, AuditEntry
+from .projections import Annotated, Computed, Related
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
 
 
+def full_name(imie, nazwisko):
+    """Odpowiednik Employee.get_full_name() dla wartości z projekcji values()"""
+    if imie is None:
+        return None
+    return f"{imie} {nazwisko}"
+
+
+class TaskTypeField(serializers.CharField):
+    """
+    Typ zadania jako tekst. Walidacja sprawdza tylko tekst - nieznane nazwy
+    dopisuje do słownika task_types dopiero zapis (TaskSerializer.save).
+    """
+
+    def to_representation(self, value):
+        return value.name
+
+
 class EmployeeSerializer(serializers.ModelSerializer):
     """Serializer dla modelu Employee"""
     password = serializers.CharField(write_only=True, required=False)
-    enclosures = serializers.PrimaryKeyRelatedField(many=True, queryset=Enclosure.objects.all(), required=False)  # type: ignore
+    enclosures = serializers.PrimaryKeyRelatedField(many=True, queryset=Enclosure.objects, required=False)  # type: ignore
     
     class Meta:
         model = Employee
@@ -18,6 +38,10 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'password': {'write_only': True}
         }
     
+    projected_fields = {
+        'enclosures': Related('enclosures', lambda pk: pk, 'id'),
+    }
+    
     def create(self, validated_data):
         """Tworzenie nowego pracownika z hashowanym hasłem i przypisaniem wybiegów"""
         enclosures = validated_data.pop('enclosures', None)
@@ -59,8 +83,16 @@ class EnclosureSerializer(serializers.ModelSerializer):
         model = Enclosure
         fields = ['id', 'name', 'responsible_employees', 'current_animal_count']
     
+    # Szybka ścieżka list (zoo_manager/projections.py)
+    projected_fields = {
+        'responsible_employees': Related('responsible_employees', full_name, 'imie', 'nazwisko'),
+        'current_animal_count': Annotated(Count('animal')),
+    }
+    
     def get_responsible_employees(self, obj):
-        return [emp.get_full_name() for emp in obj.responsible_employees.all()]
+        # Stała kolejność (po id) - także przy prefetch_related i w projekcji
+        employees = sorted(obj.responsible_employees.all(), key=lambda emp: emp.pk)
+        return [emp.get_full_name() for emp in employees]
 
 
 class AnimalSerializer(serializers.ModelSerializer):
@@ -69,7 +101,8 @@ class AnimalSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Animal
-        fields = ['id', 'species', 'name', 'gender', 'enclosure', 'enclosure_name', 'health']
+        fields = ['id', 'species', 'name', 'gender', 'enclosure', 'enclosure_name', 'health', 'sick_since', 'version']
+        read_only_fields = ['sick_since', 'version']
         extra_kwargs = {
             'species': {'required': False},
             'name': {'required': False},
@@ -78,6 +111,10 @@ class AnimalSerializer(serializers.ModelSerializer):
             'health': {'required': False},
         }
     
+    projected_fields = {
+        'enclosure_name': Computed(lambda name: name, 'enclosure__name'),
+    }
+    
     def get_enclosure_name(self, obj):
         """Zwraca nazwę wybiegu"""
         if obj.enclosure:
@@ -89,10 +126,26 @@ class TaskSerializer(serializers.ModelSerializer):
     """Serializer dla modelu Task"""
     employee_name = serializers.SerializerMethodField()
     enclosure_name = serializers.SerializerMethodField()
+    task_type = TaskTypeField()
     
     class Meta:
         model = Task
-        fields = ['id', 'task_timestamp', 'employee', 'employee_name', 'enclosure', 'enclosure_name', 'task_type', 'comments', 'is_completed']
+        fields = ['id', 'task_timestamp', 'employee', 'employee_name', 'enclosure', 'enclosure_name', 'task_type', 'comments', 'is_completed',
+                  'started_at', 'completed_at', 'version']
+        read_only_fields = ['started_at', 'completed_at', 'version']
+    
+    projected_fields = {
+        'employee_name': Computed(full_name, 'employee__imie', 'employee__nazwisko'),
+        'enclosure_name': Computed(lambda name: name, 'enclosure__name'),
+        'task_type': Computed(lambda name: name, 'task_type__name'),
+    }
+    
+    def save(self, **kwargs):
+        """Zapis z typem zadania wyszukanym lub dopisanym w tej samej transakcji"""
+        with transaction.atomic(using=router.db_for_write(TaskType)):
+            if 'task_type' in self.validated_data:
+                self.validated_data['task_type'] = TaskType.objects.for_name(self.validated_data['task_type'])  # type: ignore
+            return super().save(**kwargs)
     
     def get_employee_name(self, obj):
         """Zwraca pełne imię i nazwisko przypisanego pracownika"""
@@ -114,3 +167,41 @@ class TaskCompletionSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['is_completed', 'comments']
 
+
+class AnimalHealthSerializer(serializers.ModelSerializer):
+    """Uproszczony serializer dla zmiany stanu zdrowia zwierzęcia"""
+    
+    class Meta:
+        model = Animal
+        fields = ['health']
+        extra_kwargs = {'health': {'required': True}}
+
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer statusu zadania w tle"""
+    
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'payload', 'status', 'attempts', 'max_attempts', 'run_after',
+                  'result', 'error', 'created_by', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
+class AuditEntrySerializer(serializers.ModelSerializer):
+    """Serializer wpisu dziennika zmian"""
+    actor_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AuditEntry
+        fields = ['id', 'created_at', 'actor', 'actor_name', 'action', 'source', 'changes']
+        read_only_fields = fields
+    
+    def get_actor_name(self, obj):
+        return obj.actor.get_full_name() if obj.actor_id else None
+
+
+class BulkAssignSerializer(serializers.Serializer):
+    """Dane wejściowe masowego przypisania zadań"""
+    task_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    employee = serializers.PrimaryKeyRelatedField(queryset=Employee.objects, allow_null=True)  # type: ignore
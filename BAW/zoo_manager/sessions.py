@@ -0,0 +1,85 @@
+"""
+Silnik sesji: najpierw pamięć podręczna, zapis do bazy z opóźnieniem.
+
+Domyślny silnik czyta ``django_session`` w każdym żądaniu z ciasteczkiem
+sesji. Tu sesja jest czytana z cache ``SESSION_CACHE_ALIAS``, a z bazy tylko
+wtedy, gdy wpisu w cache nie ma.
+
+Nowa sesja (logowanie, ``cycle_key``) i jej usunięcie (wylogowanie) trafiają
+do bazy od razu. Zmiana istniejącej sesji jest zapisywana tylko w cache, a do
+bazy - zbiorczo, najpóźniej po ``SESSION_WRITE_BEHIND_SECONDS`` (i przy
+zamknięciu procesu). Baza jest więc kopią zapasową: przy utracie wpisu w
+cache sesja wraca do stanu z bazy.
+
+Silnik wymaga cache wspólnego dla procesów (settings.py włącza go tylko przy
+``REDIS_URL``) - przy pamięci lokalnej wylogowanie w jednym procesie nie
+byłoby widoczne w pozostałych.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import connections, router
+
+_lock = threading.Lock()
+# klucz sesji -> alias bazy, w której leży jej wiersz
+_dirty = {}
+_timer = None
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'zoo_manager.sessions'
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None or not settings.SESSION_WRITE_BEHIND_SECONDS:
+            super().save(must_create=must_create)
+            return
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        _mark_dirty(self.session_key, router.db_for_write(self.model))
+
+    def delete(self, session_key=None):
+        with _lock:
+            _dirty.pop(session_key or self.session_key, None)
+        super().delete(session_key)
+
+
+def _mark_dirty(session_key, using):
+    global _timer
+    with _lock:
+        _dirty[session_key] = using
+        if _timer is None:
+            _timer = threading.Timer(settings.SESSION_WRITE_BEHIND_SECONDS, _flush_in_thread)
+            _timer.daemon = True
+            _timer.start()
+
+
+def flush_dirty():
+    """Zapisuje do bazy sesje zmienione tylko w cache; zwraca liczbę zapisanych"""
+    global _timer
+    with _lock:
+        dirty = dict(_dirty)
+        _dirty.clear()
+        _timer = None
+    saved = 0
+    for session_key, using in dirty.items():
+        store = SessionStore(session_key)
+        data = store._cache.get(store.cache_key)
+        if data is None:
+            # Wylogowanie albo wygaśnięcie po zmianie
+            continue
+        store._session_cache = data
+        store.create_model_instance(data).save(using=using)
+        saved += 1
+    return saved
+
+
+def _flush_in_thread():
+    try:
+        flush_dirty()
+    finally:
+        # Połączenia otwarte przez wątek zapisu nie są zamykane przez Django
+        connections.close_all()
+
+
+atexit.register(flush_dirty)
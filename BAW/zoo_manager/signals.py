@@ -0,0 +1,13 @@
+"""
+Własne sygnały aplikacji zoo_manager.
+"""
+from django.dispatch import Signal
+
+# Wysyłany po szybkiej aktualizacji pól (zoo_manager/fast_updates.py), która
+# omija pre_save/post_save. Argumenty:
+#   pk       - klucz zmienionego wiersza,
+#   row      - pełny stan wiersza po zmianie (słownik atrybutów modelu),
+#   previous - poprzednie wartości zmienionych pól, o ile są znane,
+#   fields   - nazwy zapisanych pól (także wyliczanych, np. completed_at),
+#   using    - alias bazy danych.
+fields_updated = Signal()
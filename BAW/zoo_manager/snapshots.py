@@ -0,0 +1,339 @@
+"""
+Szybki zrzut i odtwarzanie danych zoo (``manage.py dump_snapshot`` /
+``manage.py restore_snapshot``).
+
+Zamiast ``dumpdata``/``loaddata`` (ORM, wiersz po wierszu) każda tabela jest
+kopiowana jednym strumieniem: na PostgreSQL poleceniem ``COPY`` w formacie
+binarnym lub CSV, na innych bazach (SQLite) przez kursor do tego samego
+formatu CSV. Zrzut to katalog z plikiem na tabelę (opcjonalnie gzip/xz) i
+``manifest.json``.
+
+Na PostgreSQL tabele mogą być kopiowane równolegle: każdy wątek ma własne
+połączenie, a wspólną, spójną migawkę danych zapewnia ``pg_export_snapshot()``
+(jak w ``pg_dump --jobs``). Odtwarzanie idzie poziomami zależności kluczy
+obcych - tabele jednego poziomu ładowane są równolegle.
+"""
+import csv
+import gzip
+import io
+import json
+import lzma
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Animal, Employee, Enclosure, Task, TaskDailyStat, TaskType, Tombstone, Zoo
+from .partitions import ensure_partitions, is_partitioned
+from .sequences import advance_change_seq
+from .tenants import clear_registry_cache
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+FORMATS = ('binary', 'csv')
+COMPRESSIONS = {'gzip': '.gz', 'xz': '.xz', 'none': ''}
+NULL = r'\N'
+CHUNK_SIZE = 1024 * 1024
+INSERT_BATCH_SIZE = 1000
+
+# Poziomy zależności: tabela wskazuje kluczami obcymi tylko tabele z
+# wcześniejszych poziomów
+LEVELS = (
+    (Zoo, TaskType, TaskDailyStat),
+    (Employee, Enclosure),
+    (Animal, Task, Employee.enclosures.through, Enclosure.responsible_employees.through),
+)
+
+# Anonimizacja danych osobowych (--anonymize): wyrażenia SQL zamiast kolumn
+ANONYMIZED = {
+    Employee: {
+        'imie': "'Pracownik'",
+        'nazwisko': "'Nr ' || id",
+        'username': "'user' || id",
+        # Hasła z produkcji nie trafiają do zrzutu - konta bez hasła
+        'password': "'!'",
+    },
+}
+
+
+class SnapshotError(Exception):
+    """Zrzut nie pasuje do bazy docelowej lub baza nie jest pusta"""
+
+
+def snapshot_models():
+    return [model for level in LEVELS for model in level]
+
+
+def columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def file_name(model, fmt, compression):
+    extension = '.copy' if fmt == 'binary' else '.csv'
+    return f'{model._meta.db_table}{extension}{COMPRESSIONS[compression]}'
+
+
+def _open(path, mode, compression):
+    writing = 'w' in mode
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6) if writing else gzip.open(path, mode)
+    if compression == 'xz':
+        return lzma.open(path, mode, preset=1) if writing else lzma.open(path, mode)
+    return open(path, mode)
+
+
+def _copy_out(cursor, sql, stream):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        raw.copy_expert(sql, stream, size=CHUNK_SIZE)
+    else:
+        with raw.copy(sql) as copy:
+            for chunk in copy:
+                stream.write(chunk)
+    return raw.rowcount
+
+
+def _copy_in(cursor, sql, stream):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        raw.copy_expert(sql, stream, size=CHUNK_SIZE)
+    else:
+        with raw.copy(sql) as copy:
+            while chunk := stream.read(CHUNK_SIZE):
+                copy.write(chunk)
+    return raw.rowcount
+
+
+def _copy_options(fmt):
+    if fmt == 'binary':
+        return '(FORMAT binary)'
+    return f"(FORMAT csv, HEADER true, NULL '{NULL}')"
+
+
+def _select_list(connection, model, anonymize):
+    quote = connection.ops.quote_name
+    replacements = ANONYMIZED.get(model, {}) if anonymize else {}
+    return ', '.join(
+        f'{replacements[column]} AS {quote(column)}' if column in replacements else quote(column)
+        for column in columns(model)
+    )
+
+
+def _dump_table(alias, model, directory, fmt, compression, anonymize, snapshot_id=None):
+    """Zapisuje jedną tabelę; ``snapshot_id`` - migawka koordynatora (wątki robocze)"""
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    select = f'SELECT {_select_list(connection, model, anonymize)} FROM {quote(table)}'
+    path = Path(directory) / file_name(model, fmt, compression)
+
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        if snapshot_id is not None:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+        with _open(path, 'wb', compression) as stream:
+            if connection.vendor == 'postgresql':
+                rows = _copy_out(cursor, f'COPY ({select}) TO STDOUT WITH {_copy_options(fmt)}', stream)
+            else:
+                text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+                writer = csv.writer(text)
+                writer.writerow(columns(model))
+                cursor.execute(select)
+                rows = 0
+                while batch := cursor.fetchmany(INSERT_BATCH_SIZE):
+                    writer.writerows([_csv_value(value) for value in row] for row in batch)
+                    rows += len(batch)
+                text.flush()
+                text.detach()
+    return {'table': table, 'file': path.name, 'columns': columns(model), 'rows': rows}
+
+
+def _csv_value(value):
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        # Sterownik SQLite zwraca bool, a kolumna przyjmuje 0/1
+        return int(value)
+    return value
+
+
+def _in_thread(function, *args, **kwargs):
+    """Wykonanie w wątku roboczym - z zamknięciem jego połączeń na koniec"""
+    try:
+        return function(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def dump(alias, directory, fmt='binary', compression='gzip', anonymize=False, jobs=1):
+    """Zrzuca tabele zoo do katalogu; zwraca manifest"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        # Bez COPY zostaje przenośny CSV; SQLite czyta w jednym wątku
+        fmt, jobs = 'csv', 1
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    models = snapshot_models()
+
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        months = Task.objects.using(alias).aggregate(  # type: ignore
+            first=Min('task_timestamp'), last=Max('task_timestamp'),
+        )
+        if jobs > 1:
+            cursor.execute('SELECT pg_export_snapshot()')
+            snapshot_id = cursor.fetchone()[0]
+            # Koordynator trzyma transakcję (i migawkę) do końca pracy wątków
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = [
+                    pool.submit(
+                        _in_thread, _dump_table, alias, model, directory, fmt, compression, anonymize, snapshot_id,
+                    )
+                    for model in models
+                ]
+                tables = [future.result() for future in futures]
+        else:
+            tables = [_dump_table(alias, model, directory, fmt, compression, anonymize) for model in models]
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'created': timezone.now().isoformat(),
+        'vendor': connection.vendor,
+        'format': fmt,
+        'compression': compression,
+        'anonymized': anonymize,
+        'task_months': [
+            months['first'].isoformat() if months['first'] else None,
+            months['last'].isoformat() if months['last'] else None,
+        ],
+        'tables': tables,
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
+
+
+def read_manifest(directory):
+    path = Path(directory) / MANIFEST
+    if not path.exists():
+        raise SnapshotError(f'Brak pliku {MANIFEST} w {directory}')
+    manifest = json.loads(path.read_text(encoding='utf-8'))
+    if manifest.get('version') != FORMAT_VERSION:
+        raise SnapshotError(f"Nieobsługiwana wersja zrzutu: {manifest.get('version')}")
+    return manifest
+
+
+def _load_table(alias, model, directory, manifest, entry):
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    column_list = ', '.join(quote(column) for column in entry['columns'])
+    path = Path(directory) / entry['file']
+
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        with _open(path, 'rb', manifest['compression']) as stream:
+            if connection.vendor == 'postgresql':
+                sql = f"COPY {table} ({column_list}) FROM STDIN WITH {_copy_options(manifest['format'])}"
+                return _copy_in(cursor, sql, stream)
+            reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+            next(reader)
+            sql = f"INSERT INTO {table} ({column_list}) VALUES ({', '.join(['%s'] * len(entry['columns']))})"
+            rows = 0
+            batch = []
+            for row in reader:
+                batch.append([None if value == NULL else value for value in row])
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    cursor.executemany(sql, batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                rows += len(batch)
+            return rows
+
+
+def _has_rows(connection, model):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {connection.ops.quote_name(model._meta.db_table)} LIMIT 1')
+        return cursor.fetchone() is not None
+
+
+def restore(alias, directory, truncate=False, jobs=1):
+    """
+    Odtwarza zrzut w bazie ``alias``. Tabele danych muszą być puste, chyba że
+    ``truncate`` - wtedy są czyszczone razem z tabelami, które je wskazują.
+    Rejestr zoo jest zawsze zastępowany rejestrem ze zrzutu.
+    """
+    manifest = read_manifest(directory)
+    connection = connections[alias]
+    if manifest['vendor'] != connection.vendor:
+        raise SnapshotError(
+            f"Zrzut z bazy {manifest['vendor']} nie może być odtworzony w bazie {connection.vendor}"
+        )
+    if connection.vendor != 'postgresql':
+        jobs = 1
+    entries = {entry['table']: entry for entry in manifest['tables']}
+    models = snapshot_models()
+    missing = [model._meta.db_table for model in models if model._meta.db_table not in entries]
+    if missing:
+        raise SnapshotError(f"Zrzut nie zawiera tabel: {', '.join(missing)}")
+
+    # Przy jednym wątku całość jest jedną transakcją - błąd nie zostawia
+    # wyczyszczonej bazy; wątki robocze zatwierdzają każdy poziom osobno
+    with transaction.atomic(using=alias) if jobs == 1 else nullcontext():
+        if truncate:
+            tables = [model._meta.db_table for model in models] + [Tombstone._meta.db_table]
+            statements = connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        else:
+            filled = [model._meta.db_table for model in models if model is not Zoo and _has_rows(connection, model)]
+            if filled:
+                raise SnapshotError(
+                    f"Tabele nie są puste: {', '.join(filled)} (użyj --truncate, aby je wyczyścić)"
+                )
+            # Migracja 0013 tworzy domyślne zoo - zastępuje je rejestr ze zrzutu
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(Zoo._meta.db_table)}')
+
+        first, last = manifest['task_months']
+        if first and is_partitioned(connection):
+            ensure_partitions(connection, datetime.fromisoformat(first), datetime.fromisoformat(last))
+
+        counts = {}
+        for level in LEVELS:
+            # Klucze obce wskazują tylko na wiersze z wcześniejszych poziomów;
+            # przy wątkach każdy poziom jest zatwierdzony przed następnym
+            if jobs > 1:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    futures = {
+                        model: pool.submit(
+                            _in_thread, _load_table, alias, model, directory, manifest, entries[model._meta.db_table],
+                        )
+                        for model in level
+                    }
+                    for model, future in futures.items():
+                        counts[model._meta.db_table] = future.result()
+            else:
+                for model in level:
+                    counts[model._meta.db_table] = _load_table(
+                        alias, model, directory, manifest, entries[model._meta.db_table],
+                    )
+
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(statement)
+        synced = [model for model in models if any(field.name == 'change_seq' for field in model._meta.fields)]
+        latest = max(
+            (model._default_manager.db_manager(alias).aggregate(latest=Max('change_seq'))['latest'] or 0)
+            for model in synced
+        )
+        advance_change_seq(latest, using=alias)
+    clear_registry_cache()
+    return counts
@@ -0,0 +1,102 @@
+// Pola wyboru z podpowiedziami (zoo_manager/widgets.py): serwer renderuje
+// tylko wybrane opcje, pozostałe są pobierane z /api/autocomplete/<źródło>/
+// w trakcie pisania, po jednej stronie wyników.
+(function () {
+    'use strict';
+
+    var DELAY = 250;
+
+    function setup(select) {
+        var url = select.getAttribute('data-autocomplete-url');
+        var input = document.createElement('input');
+        var more = document.createElement('button');
+        var timer = null;
+        var request = 0;
+        var term = '';
+        var page = 1;
+
+        input.type = 'search';
+        input.className = 'form-control form-control-sm mb-1 vTextField';
+        input.placeholder = 'Szukaj…';
+        input.setAttribute('aria-label', 'Szukaj');
+        more.type = 'button';
+        more.className = 'btn btn-link btn-sm';
+        more.textContent = 'Więcej wyników';
+        more.hidden = true;
+        select.parentNode.insertBefore(input, select);
+        select.parentNode.insertBefore(more, select.nextSibling);
+
+        function dropUnselected() {
+            Array.prototype.slice.call(select.options).forEach(function (option) {
+                if (!option.selected && option.value !== '') {
+                    select.removeChild(option);
+                }
+            });
+        }
+
+        function load(append) {
+            var current = ++request;
+            var params = new URLSearchParams({q: term, page: String(page)});
+            fetch(url + '?' + params.toString(), {
+                credentials: 'same-origin',
+                headers: {'Accept': 'application/json'}
+            })
+                .then(function (response) {
+                    return response.ok ? response.json() : {results: [], more: false};
+                })
+                .then(function (data) {
+                    // Odpowiedź na starsze zapytanie - użytkownik pisze dalej
+                    if (current !== request) {
+                        return;
+                    }
+                    if (!append) {
+                        dropUnselected();
+                    }
+                    var present = {};
+                    Array.prototype.forEach.call(select.options, function (option) {
+                        present[option.value] = true;
+                    });
+                    data.results.forEach(function (item) {
+                        if (!present[String(item.id)]) {
+                            select.appendChild(new Option(item.text, item.id));
+                        }
+                    });
+                    more.hidden = !data.more;
+                });
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                term = input.value.trim();
+                page = 1;
+                load(false);
+            }, DELAY);
+        });
+        // Pierwsza strona dopiero przy pierwszym użyciu pola
+        input.addEventListener('focus', function () {
+            if (request === 0) {
+                load(false);
+            }
+        });
+        select.addEventListener('focus', function () {
+            if (request === 0) {
+                load(false);
+            }
+        });
+        more.addEventListener('click', function () {
+            page += 1;
+            load(true);
+        });
+    }
+
+    function init() {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
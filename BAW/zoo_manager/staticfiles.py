@@ -0,0 +1,202 @@
+"""
+Pliki statyczne i zbudowany frontend serwowane przez Django (tryb
+``SERVE_FRONTEND``).
+
+``collectstatic`` zbiera pliki aplikacji i wynik ``npm run build:django``
+(``frontend/dist``) do ``STATIC_ROOT``. ``CompressedManifestStaticFilesStorage``
+nadaje im nazwy z hashem treści i zapisuje obok gotowe warianty ``.gz``
+(i ``.br``, gdy zainstalowany jest pakiet brotli), więc kompresja nie
+obciąża serwera w czasie żądań.
+
+``StaticFilesMiddleware`` serwuje te pliki z indeksu zbudowanego przy
+starcie procesu: wybiera wariant zgodny z ``Accept-Encoding``, a plikom z
+hashem w nazwie nadaje nagłówek ``Cache-Control: immutable`` z rocznym
+terminem ważności. ``ApiGZipMiddleware`` kompresuje w locie duże odpowiedzi
+``/api/``.
+"""
+import gzip
+import mimetypes
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound
+from django.middleware.gzip import GZipMiddleware
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli jest opcjonalny
+    brotli = None
+
+COMPRESSIBLE = {'.css', '.html', '.js', '.json', '.map', '.mjs', '.svg', '.txt', '.xml', '.ico', '.webmanifest'}
+FRONTEND_PREFIX = 'frontend/'
+# Nazwy z hashem treści nadanym przez Vite (frontend/dist/assets)
+FRONTEND_ASSETS_PREFIX = f'{FRONTEND_PREFIX}assets/'
+IMMUTABLE_CACHE = f'public, max-age={365 * 24 * 3600}, immutable'
+REVALIDATE_CACHE = 'no-cache'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _is_fresh(path, suffix):
+    variant = path.with_name(path.name + suffix)
+    return variant.exists() and variant.stat().st_mtime >= path.stat().st_mtime
+
+
+def compress_file(path):
+    """Zapisuje warianty .gz/.br pliku, jeśli są wyraźnie mniejsze; zwraca utworzone ścieżki"""
+    if path.stat().st_size < settings.STATIC_COMPRESS_MIN_SIZE:
+        return []
+    suffixes = ('.gz', '.br') if brotli is not None else ('.gz',)
+    if all(_is_fresh(path, suffix) for suffix in suffixes):
+        # Bez zmian od poprzedniego collectstatic
+        return []
+    data = path.read_bytes()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    created = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * 0.95:
+            target = path.with_name(path.name + suffix)
+            target.write_bytes(compressed)
+            created.append(target)
+    return created
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage zapisujący dodatkowo wstępnie skompresowane warianty plików"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        root = Path(self.location)
+        for path in sorted(root.rglob('*')):
+            if path.is_file() and path.suffix in COMPRESSIBLE:
+                for target in compress_file(path):
+                    name = path.relative_to(root).as_posix()
+                    yield name, target.relative_to(root).as_posix(), True
+
+
+class StaticFile:
+    __slots__ = ('path', 'size', 'content_type', 'headers', 'variants')
+
+    def __init__(self, path, immutable):
+        stat = path.stat()
+        self.path = path
+        self.size = stat.st_size
+        self.content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.headers = {
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Last-Modified': http_date(stat.st_mtime),
+            # Słaby ETag - ten sam dla wszystkich wariantów kodowania
+            'ETag': f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            'Vary': 'Accept-Encoding',
+        }
+        # (kodowanie, ścieżka, rozmiar) w kolejności preferencji
+        self.variants = [
+            (encoding, variant, variant.stat().st_size)
+            for encoding, suffix in ENCODINGS
+            if (variant := path.with_name(path.name + suffix)).exists()
+        ]
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def build_index(root, hashed_names):
+    """Indeks plików STATIC_ROOT (bez wariantów skompresowanych)"""
+    index = {}
+    root = Path(root)
+    if not root.is_dir():
+        return index
+    for path in root.rglob('*'):
+        if not path.is_file() or path.suffix in ('.gz', '.br'):
+            continue
+        name = path.relative_to(root).as_posix()
+        immutable = name in hashed_names or name.startswith(FRONTEND_ASSETS_PREFIX)
+        index[name] = StaticFile(path, immutable)
+    return index
+
+
+def _hashed_names(storage):
+    return set(getattr(storage, 'hashed_files', {}).values())
+
+
+class StaticFilesMiddleware:
+    """
+    Serwuje pliki z ``STATIC_ROOT`` pod ``STATIC_URL`` (tylko w trybie
+    ``SERVE_FRONTEND``; w pozostałych przypadkach nie jest ładowany)
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVE_FRONTEND:
+            raise MiddlewareNotUsed
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        # Indeks budowany raz - pliki zmieniają się tylko przy wdrożeniu (collectstatic)
+        self.index = build_index(settings.STATIC_ROOT, _hashed_names(staticfiles_storage))
+
+    def __call__(self, request):
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        entry = self.index.get(request.path[len(self.prefix):])
+        if entry is None:
+            return HttpResponseNotFound()
+        return self.serve(request, entry)
+
+    def serve(self, request, entry):
+        if request.headers.get('If-None-Match') == entry.headers['ETag']:
+            response = HttpResponse(status=304)
+        else:
+            accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            path, size, encoding = entry.path, entry.size, None
+            for variant_encoding, variant_path, variant_size in entry.variants:
+                if variant_encoding in accepted:
+                    path, size, encoding = variant_path, variant_size, variant_encoding
+                    break
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=entry.content_type)
+            else:
+                response = FileResponse(path.open('rb'), content_type=entry.content_type)
+            response['Content-Length'] = str(size)
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        for header, value in entry.headers.items():
+            response[header] = value
+        return response
+
+
+@lru_cache(maxsize=1)
+def frontend_index():
+    """Zawartość index.html zbudowanego frontendu (z hashowanymi odnośnikami do zasobów)"""
+    path = Path(settings.STATIC_ROOT) / FRONTEND_PREFIX / 'index.html'
+    if not path.exists():
+        return None
+    return path.read_bytes()
+
+
+class ApiGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware tylko dla odpowiedzi ``/api/`` większych niż ``API_GZIP_MIN_SIZE`` bajtów"""
+
+    def process_response(self, request, response):
+        if not request.path.startswith('/api/'):
+            return response
+        if not response.streaming and len(response.content) < settings.API_GZIP_MIN_SIZE:
+            return response
+        return super().process_response(request, response)
+
@@ -0,0 +1,229 @@
+"""
+Synchronizacja przyrostowa dla tabletów pracowników (``/api/sync/``).
+
+Każdy zapis pracownika, wybiegu, zwierzęcia lub zadania nadaje wierszowi
+nowy, globalnie rosnący ``change_seq`` (zoo_manager/sequences.py), a
+usunięcie zostawia ślad w tabeli ``tombstones``. Klient przechowuje
+ostatni otrzymany kursor ``next`` i pyta ``?since=<kursor>`` - dostaje
+tylko wiersze zmienione i usunięte od tego momentu.
+
+Zmiany z pominięciem ``save()`` (zbiorcze UPDATE, SET_NULL przy usuwaniu,
+relacje wiele-do-wielu, liczba zwierząt na wybiegu) podbijają ``change_seq``
+odbiorniki sygnałów poniżej.
+
+Numer zmiany jest nadawany w chwili zapisu, a nie zatwierdzenia transakcji,
+więc wiersz z niższym numerem może stać się widoczny chwilę po wyższym.
+Dlatego kursor ``next`` nie przekracza numerów trzymanych przez trwające
+transakcje (``safe_change_seq()``, zoo_manager/sequences.py). Kursor i zmiany
+są czytane z bazy głównej - replika z opóźnieniem nie miałaby jeszcze
+wierszy, które kursor już obejmuje. Zakres odczytu zaczyna się dodatkowo
+``SYNC_SEQUENCE_OVERLAP`` numerów przed kursorem klienta; powtórzone wiersze
+klient po prostu nadpisuje.
+"""
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Max, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Animal, Employee, Enclosure, Task, Tombstone
+from .db_router import use_primary
+from .projections import compile_projection
+from .sequences import change_seq_expression, next_change_seq, safe_change_seq
+from .serializers import AnimalSerializer, EmployeeSerializer, EnclosureSerializer, TaskSerializer
+from .tenants import tenant_q
+
+# Nazwa strumienia w odpowiedzi -> (model, serializer)
+STREAMS = {
+    'employees': (Employee, EmployeeSerializer),
+    'enclosures': (Enclosure, EnclosureSerializer),
+    'animals': (Animal, AnimalSerializer),
+    'tasks': (Task, TaskSerializer),
+}
+STREAM_BY_MODEL = {model: name for name, (model, _) in STREAMS.items()}
+
+# Wpis w tombstones zapamiętujący najwyższy numer zmiany usuniętych śladów
+PRUNED_MARKER = '*'
+
+
+def _sync_serializer(serializer_class):
+    """Serializer API rozszerzony o change_seq (osobna klasa = osobna projekcja)"""
+    meta = type('Meta', (serializer_class.Meta,), {
+        'fields': [*serializer_class.Meta.fields, 'change_seq'],
+        'read_only_fields': [*getattr(serializer_class.Meta, 'read_only_fields', []), 'change_seq'],
+    })
+    return type(f'Sync{serializer_class.__name__}', (serializer_class,), {'Meta': meta})
+
+
+SYNC_SERIALIZERS = {name: _sync_serializer(serializer) for name, (_, serializer) in STREAMS.items()}
+
+
+def bump(model, using=None, **filters):
+    """Nadaje nowy numer zmiany wierszom zmienionym z pominięciem save()"""
+    using = using or router.db_for_write(model)
+    # Na SQLite numer jest pobierany osobnym zapytaniem - razem z UPDATE w jednej transakcji
+    with transaction.atomic(using=using, savepoint=False):
+        return model._base_manager.using(using).filter(**filters).update(change_seq=change_seq_expression(using))
+
+
+def task_scope(user):
+    """Zadania widoczne dla użytkownika: manager - wszystkie, pracownik - własne i wolne z jego wybiegów"""
+    if user.role == 'manager':
+        return Q()
+    return Q(employee_id=user.pk) | Q(employee__isnull=True, enclosure_id__in=user.enclosures.values('id'))
+
+
+def pruned_until():
+    marker = Tombstone.objects.filter(model=PRUNED_MARKER).aggregate(seq=Max('change_seq'))['seq']  # type: ignore
+    return marker or 0
+
+
+def _window(queryset, since, limit):
+    """
+    Zawęża queryset do zmian po ``since`` (z zakładką) i co najwyżej ``limit``
+    nowych wierszy. Zwraca (queryset, granica) - granica to numer, do którego
+    strumień jest kompletny, lub None, gdy zwrócono wszystko.
+    """
+    boundary = (
+        queryset.filter(change_seq__gt=since)
+        .order_by('change_seq')
+        .values_list('change_seq', flat=True)[limit:limit + 1]
+    )
+    boundary = next(iter(boundary), None)
+    queryset = queryset.filter(change_seq__gt=max(since - settings.SYNC_SEQUENCE_OVERLAP, 0))
+    if boundary is not None:
+        # Wiersze z tym samym numerem nie są dzielone między strony
+        queryset = queryset.filter(change_seq__lte=boundary)
+    return queryset.order_by('change_seq', 'pk'), boundary
+
+
+def changes_since(user, since=None, limit=None):
+    """
+    Zwraca zmiany widoczne dla użytkownika po numerze ``since`` (None = pełna
+    kopia). ``reset`` oznacza, że klient musi odrzucić lokalną kopię, bo
+    potrzebne mu ślady usunięć zostały już wyczyszczone.
+    """
+    with use_primary():
+        return _changes_since(user, since, limit or settings.SYNC_PAGE_SIZE)
+
+
+def _changes_since(user, since, limit):
+    # Kursor odczytany przed zapytaniami - zmiany nadane później (i zapisy
+    # jeszcze niezatwierdzone) przyjdą w kolejnej synchronizacji
+    cursor = safe_change_seq(router.db_for_write(Task))
+    reset = since is not None and since < pruned_until()
+    if reset:
+        since = None
+
+    changes, deleted, boundaries = {}, {name: [] for name in STREAMS}, []
+    for name, (model, _) in STREAMS.items():
+        queryset = model.objects.all()  # type: ignore
+        if model is Task:
+            queryset = queryset.filter(task_scope(user))
+        if since is not None:
+            queryset, boundary = _window(queryset, since, limit)
+            if boundary is not None:
+                boundaries.append(boundary)
+        projection = compile_projection(SYNC_SERIALIZERS[name])
+        changes[name] = projection.build(projection.queryset(queryset))
+
+    if since is not None:
+        tombstones = Tombstone.objects.exclude(model=PRUNED_MARKER).filter(tenant_q())  # type: ignore
+        tombstones, boundary = _window(tombstones, since, limit)
+        if boundary is not None:
+            boundaries.append(boundary)
+        for stream, object_id in tombstones.values_list('model', 'object_id'):
+            deleted[stream].append(object_id)
+
+        if user.role != 'manager':
+            # Zadania, które zmieniły się, ale wypadły poza zakres pracownika
+            # (np. przypisane komuś innemu), klient usuwa jak usunięte
+            revoked, boundary = _window(Task.objects.exclude(task_scope(user)), since, limit)  # type: ignore
+            if boundary is not None:
+                boundaries.append(boundary)
+            deleted['tasks'].extend(revoked.values_list('pk', flat=True))
+
+    return {
+        'since': since,
+        'next': min([cursor, *boundaries]),
+        'has_more': bool(boundaries),
+        'reset': reset,
+        'changes': changes,
+        'deleted': deleted,
+    }
+
+
+# --- Odbiorniki sygnałów ---
+
+@receiver(post_delete)
+def record_tombstone(sender, instance, using, **kwargs):
+    stream = STREAM_BY_MODEL.get(sender)
+    if stream is not None:
+        Tombstone.objects.using(using).create(  # type: ignore
+            model=stream, object_id=instance.pk, change_seq=next_change_seq(using), zoo_id=instance.zoo_id,
+        )
+
+
+@receiver(pre_delete, sender=Enclosure)
+def bump_before_enclosure_delete(sender, instance, using, **kwargs):
+    # SET_NULL na zadaniach i zwierzętach oraz zmiana listy wybiegów pracowników
+    bump(Task, using, enclosure=instance)
+    bump(Animal, using, enclosure=instance)
+    bump(Employee, using, enclosures=instance)
+
+
+@receiver(pre_delete, sender=Employee)
+def bump_before_employee_delete(sender, instance, using, **kwargs):
+    bump(Task, using, employee=instance)
+    bump(Enclosure, using, responsible_employees=instance)
+
+
+@receiver(pre_save, sender=Animal)
+def remember_animal_enclosure(sender, instance, raw=False, using=None, **kwargs):
+    instance._sync_previous_enclosure = None
+    if not raw and not instance._state.adding:
+        instance._sync_previous_enclosure = (
+            Animal.objects.using(using).filter(pk=instance.pk).values_list('enclosure_id', flat=True).first()  # type: ignore
+        )
+
+
+@receiver(post_save, sender=Animal)
+def bump_enclosure_on_animal_save(sender, instance, created, raw=False, using=None, **kwargs):
+    # Zmienia się liczba zwierząt (current_animal_count) na wybiegach
+    if raw:
+        return
+    previous = getattr(instance, '_sync_previous_enclosure', None)
+    if created or previous != instance.enclosure_id:
+        bump(Enclosure, using, pk__in=[pk for pk in (previous, instance.enclosure_id) if pk])
+
+
+@receiver(post_delete, sender=Animal)
+def bump_enclosure_on_animal_delete(sender, instance, using, **kwargs):
+    if instance.enclosure_id:
+        bump(Enclosure, using, pk=instance.enclosure_id)
+
+
+def _bump_m2m_owner(owner_model, relation, instance, action, reverse, pk_set, using):
+    """
+    Podbija obiekty, których serializowana lista relacji (``relation`` na
+    ``owner_model``) się zmieniła - przy zmianie z drugiej strony relacji
+    są to obiekty z ``pk_set``.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        bump(owner_model, using, pk=instance.pk)
+    elif action == 'pre_clear':
+        bump(owner_model, using, **{relation: instance})
+    elif pk_set:
+        bump(owner_model, using, pk__in=pk_set)
+
+
+@receiver(m2m_changed, sender=Employee.enclosures.through)
+def bump_on_employee_enclosures(sender, instance, action, reverse, pk_set, using, **kwargs):
+    _bump_m2m_owner(Employee, 'enclosures', instance, action, reverse, pk_set, using)
+
+
+@receiver(m2m_changed, sender=Enclosure.responsible_employees.through)
+def bump_on_responsible_employees(sender, instance, action, reverse, pk_set, using, **kwargs):
+    _bump_m2m_owner(Enclosure, 'responsible_employees', instance, action, reverse, pk_set, using)
@@ -0,0 +1,175 @@
+"""
+Analiza spóźnień i czasu wykonania ukończonych zadań (NumPy).
+
+Dla ukończonych zadań z zakresu dni baza zwraca tylko potrzebne kolumny:
+identyfikatory pracownika, wybiegu i typu zadania oraz dwie różnice czasu
+wyliczone w SQL - spóźnienie (``completed_at - task_timestamp``) i czas
+wykonania (``completed_at - started_at``). Wiersze są czytane porcjami po
+``TASK_ANALYTICS_CHUNK_SIZE`` i od razu zamieniane na tablice NumPy; dalsze
+obliczenia (percentyle, średnie, histogramy per grupa) są wektorowe - bez
+pętli po wierszach ani obiektach modeli.
+
+Zadania ukończone przed wprowadzeniem ``completed_at`` nie mają znaczników
+czasu i są pomijane; zadania bez ``started_at`` (zoo_manager/task_lifecycle.py)
+liczą się tylko do spóźnień.
+"""
+from datetime import datetime, time, timedelta
+from importlib import import_module
+from importlib.util import find_spec
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import BigIntegerField, DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Employee, Enclosure, Task, TaskType
+
+# NumPy (opcjonalny) jest importowany dopiero przy pierwszej analizie - jego
+# import wydłużałby start każdego procesu serwera
+np = None
+
+# Identyfikator grupy dla zadań bez pracownika / bez wybiegu
+UNASSIGNED = 0
+
+PERCENTILES = (50, 90, 95)
+# Granice przedziałów histogramów w minutach (spóźnienie < 0 = przed terminem)
+LATENESS_BINS = (0, 15, 60, 240, 1440)
+DURATION_BINS = (15, 30, 60, 120, 240, 480)
+
+GROUPS = {
+    'employee': 'employee_id',
+    'enclosure': 'enclosure_id',
+    'task_type': 'task_type_id',
+}
+
+
+def is_available():
+    return find_spec('numpy') is not None
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        np = import_module('numpy')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _interval(delta):
+    return ExpressionWrapper(delta, output_field=DurationField())
+
+
+def completed_rows(start=None, end=None):
+    """Krotki (pracownik, wybieg, typ, spóźnienie, czas wykonania) ukończonych zadań bieżącego zoo"""
+    tasks = Task.objects.filter(is_completed=True, completed_at__isnull=False)  # type: ignore
+    if start is not None:
+        tasks = tasks.filter(task_timestamp__gte=_day_start(start))
+    if end is not None:
+        tasks = tasks.filter(task_timestamp__lt=_day_start(end + timedelta(days=1)))
+    return tasks.values_list(
+        Coalesce('employee_id', Value(UNASSIGNED), output_field=BigIntegerField()),
+        Coalesce('enclosure_id', Value(UNASSIGNED), output_field=BigIntegerField()),
+        'task_type_id',
+        _interval(F('completed_at') - F('task_timestamp')),
+        _interval(F('completed_at') - F('started_at')),
+    ).order_by()
+
+
+def load_arrays(rows, chunk_size):
+    """Kolumny wierszy jako tablice NumPy, budowane porcjami (czasy w minutach, brak = NaN)"""
+    rows = iter(rows)
+    chunks = []
+    while chunk := list(islice(rows, chunk_size)):
+        employees, enclosures, task_types, lateness, duration = zip(*chunk)
+        chunks.append((
+            np.array(employees, dtype=np.int64),
+            np.array(enclosures, dtype=np.int64),
+            np.array(task_types, dtype=np.int64),
+            np.array(lateness, dtype='timedelta64[us]'),
+            np.array(duration, dtype='timedelta64[us]'),
+        ))
+    if not chunks:
+        empty = np.empty(0, dtype=np.int64)
+        return {name: empty for name in GROUPS}, np.empty(0), np.empty(0)
+    columns = [np.concatenate(parts) for parts in zip(*chunks)]
+    keys = dict(zip(GROUPS, columns[:3]))
+    minute = np.timedelta64(1, 'm')
+    # NaT (brak started_at) / minuta = NaN
+    return keys, columns[3] / minute, columns[4] / minute
+
+
+def grouped_stats(keys, values, bins):
+    """
+    Statystyki ``values`` per wartość ``keys``: {klucz: {count, mean, pXX, histogram}}.
+
+    Wiersze są sortowane raz po (klucz, wartość); percentyle to interpolacja
+    liniowa między sąsiednimi pozycjami każdej grupy, liczona dla wszystkich
+    grup naraz.
+    """
+    valid = ~np.isnan(values)
+    keys, values = keys[valid], values[valid]
+    if not len(values):
+        return {}
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    groups, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    percentiles = {}
+    for percentile in PERCENTILES:
+        position = starts + (counts - 1) * (percentile / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        percentiles[percentile] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    means = np.add.reduceat(values, starts) / counts
+
+    width = len(bins) + 1
+    group_index = np.repeat(np.arange(len(groups)), counts)
+    bin_index = np.searchsorted(np.asarray(bins, dtype=float), values, side='right')
+    histograms = np.bincount(group_index * width + bin_index, minlength=len(groups) * width).reshape(-1, width)
+
+    return {
+        int(key): {
+            'count': int(counts[index]),
+            'mean': round(float(means[index]), 2),
+            **{f'p{percentile}': round(float(percentiles[percentile][index]), 2) for percentile in PERCENTILES},
+            'histogram': histograms[index].tolist(),
+        }
+        for index, key in enumerate(groups)
+    }
+
+
+def _names(group, ids):
+    if group == 'employee':
+        employees = Employee.objects.filter(pk__in=ids).only('imie', 'nazwisko')  # type: ignore
+        return {employee.pk: employee.get_full_name() for employee in employees}
+    model = Enclosure if group == 'enclosure' else TaskType
+    return dict(model.objects.filter(pk__in=ids).values_list('pk', 'name'))  # type: ignore
+
+
+def analyze(start=None, end=None):
+    """Spóźnienia i czas wykonania (minuty) per pracownik, wybieg i typ zadania"""
+    _load_numpy()
+    chunk_size = settings.TASK_ANALYTICS_CHUNK_SIZE
+    keys, lateness, duration = load_arrays(completed_rows(start, end).iterator(chunk_size=chunk_size), chunk_size)
+    result = {
+        'tasks': int(len(lateness)),
+        'unit': 'minutes',
+        'bins': {'lateness': list(LATENESS_BINS), 'duration': list(DURATION_BINS)},
+    }
+    for group in GROUPS:
+        late = grouped_stats(keys[group], lateness, LATENESS_BINS)
+        took = grouped_stats(keys[group], duration, DURATION_BINS)
+        names = _names(group, [key for key in late if key != UNASSIGNED])
+        result[group] = [
+            {
+                'id': key or None,
+                'name': names.get(key),
+                'lateness': late[key],
+                'duration': took.get(key),
+            }
+            for key in sorted(late)
+        ]
+    return result
@@ -0,0 +1,60 @@
+"""
+Kolejka zadań do samodzielnego podjęcia przez pracowników.
+
+Pracownik dostaje najstarsze (po ``task_timestamp``) nieprzypisane i
+nieukończone zadanie z wybiegów, do których jest przypisany
+(``Employee.enclosures``). Na PostgreSQL kandydat jest wybierany przez
+SELECT ... FOR UPDATE SKIP LOCKED, więc równolegle przejmujący pracownicy
+nie czekają na siebie i dostają różne zadania. Samo przypisanie to
+warunkowy UPDATE (``WHERE employee_id IS NULL``), który chroni przed
+podwójnym przejęciem także na bazach bez blokad wierszy.
+"""
+from django.db import transaction
+
+from . import fast_updates
+from .models import Task
+from .task_lifecycle import started_now
+
+# Ile razy szukać kolejnego kandydata, gdy wybrane zadanie przejął ktoś inny
+# (możliwe tylko na bazach bez SKIP LOCKED, np. SQLite)
+MAX_ATTEMPTS = 10
+# Po ilu sekundach klient może ponowić przejęcie po ``ClaimContention``
+CLAIM_RETRY_AFTER = 1
+
+
+class ClaimContention(Exception):
+    """Wolne zadania są, ale każdego kandydata przejął w międzyczasie ktoś inny"""
+
+
+def eligible_tasks(employee):
+    """Zadania, które pracownik może podjąć, od najstarszego"""
+    return Task.objects.filter(  # type: ignore
+        employee__isnull=True,
+        is_completed=False,
+        enclosure_id__in=employee.enclosures.values('id'),
+    ).order_by('task_timestamp', 'id')
+
+
+def claim_task(employee):
+    """
+    Przypisuje pracownikowi następne wolne zadanie i je zwraca (None, gdy
+    wolnych zadań nie ma). Po MAX_ATTEMPTS przegranych próbach zgłasza
+    ``ClaimContention`` - klient powinien spróbować ponownie.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        with transaction.atomic():
+            candidate = (
+                eligible_tasks(employee)
+                .select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+            result = fast_updates.update_fields(
+                Task, candidate, {'employee_id': employee.pk}, where={'employee_id': None},
+                derived={'started_at': started_now()},
+            )
+        if result.status == fast_updates.UPDATED:
+            return Task.objects.select_related('employee', 'enclosure', 'task_type').get(pk=candidate)  # type: ignore
+    raise ClaimContention
@@ -0,0 +1,45 @@
+"""
+Znaczniki czasu cyklu życia zadania.
+
+``completed_at`` - chwila oznaczenia zadania jako ukończone, czyszczona przy
+cofnięciu ukończenia. Przy zapisie przez ORM pilnuje tego ``Task.save()``,
+a szybka ścieżka UPDATE (zoo_manager/fast_updates.py) dostaje odpowiednie
+wyrażenie z ``completion_updates()``.
+
+``started_at`` - pierwsza czynność pracownika przy zadaniu: przejęcie
+(``claim``) albo zapis przez ścieżkę ukończenia, który zadania nie kończy
+(np. komentarz). Zadanie ukończone od razu nie ma ``started_at`` - jego czas
+trwania jest nieznany, a spóźnienie liczone jest względem ``task_timestamp``
+(zoo_manager/task_analytics.py).
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def started_now(now=None):
+    """Wyrażenie ustawiające ``started_at`` tylko przy pierwszej czynności"""
+    return Coalesce(F('started_at'), Value(now or timezone.now()))
+
+
+def completion_updates(values, now=None):
+    """
+    Dodatkowe kolumny zapisu przez ścieżkę ukończenia (``TaskCompletionSerializer``)
+    dla zmienionych pól ``values``
+    """
+    now = now or timezone.now()
+    updates = {}
+    if values.get('is_completed'):
+        # Ponowne oznaczenie ukończonego zadania nie zmienia pierwotnej chwili
+        updates['completed_at'] = Coalesce(F('completed_at'), Value(now))
+    else:
+        if 'is_completed' in values:
+            updates['completed_at'] = None
+        updates['started_at'] = started_now(now)
+    return updates
+
+
+def record_progress(task, now=None):
+    """Ustawia ``started_at`` obiektu przed zapisem przez ścieżkę ukończenia (``TaskCompletionForm``)"""
+    if not task.is_completed and task.started_at is None:
+        task.started_at = now or timezone.now()
@@ -0,0 +1,130 @@
+"""
+Wiele ogrodów zoologicznych (dzierżawców) w jednym wdrożeniu.
+
+Pracownicy, wybiegi, zwierzęta, zadania i dane pochodne mają klucz ``zoo``.
+Bieżące zoo jest ustalane dla każdego żądania - z nazwy hosta
+(``Zoo.hostname``), z roszczenia ``zoo`` w tokenie JWT albo z zoo
+zalogowanego sesyjnie pracownika - i przechowywane w zmiennej kontekstowej,
+tak jak tryb repliki w db_router.py.
+
+Gdy zoo jest ustalone, domyślne managery modeli (``Model.objects``)
+zwracają wyłącznie jego wiersze, a router baz danych kieruje zapytania do
+bazy wskazanej w ``Zoo.database`` - duże zoo można w ten sposób przenieść
+na osobny serwer. Bez ustalonego zoo (polecenia manage.py, migracje)
+managery widzą wszystkie wiersze bazy domyślnej.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+_current_zoo = ContextVar('zoo_current_zoo', default=None)
+
+# Podręczna kopia rejestru zoo: klucz -> (ważne do, Zoo lub None)
+_registry_cache = {}
+
+
+def current_zoo():
+    """Zoo bieżącego żądania (None = brak ograniczenia)"""
+    return _current_zoo.get()
+
+
+def current_zoo_id():
+    """Identyfikator bieżącego zoo; domyślna wartość pola ``zoo`` nowych obiektów"""
+    zoo = _current_zoo.get()
+    return zoo.pk if zoo is not None else settings.DEFAULT_ZOO_ID
+
+
+@contextmanager
+def use_zoo(zoo):
+    """Ogranicza zapytania w obrębie bloku with do danego zoo (None = bez ograniczenia)"""
+    token = _current_zoo.set(zoo)
+    try:
+        yield
+    finally:
+        _current_zoo.reset(token)
+
+
+def activate(zoo):
+    """Ustawia zoo do końca bieżącego kontekstu (bloku ``use_zoo`` z TenantMiddleware)"""
+    _current_zoo.set(zoo)
+
+
+def tenant_q():
+    """Warunek ograniczający do bieżącego zoo - dla zapytań z pominięciem managera"""
+    zoo = _current_zoo.get()
+    return models.Q() if zoo is None else models.Q(zoo_id=zoo.pk)
+
+
+def _cached(key, load):
+    now = time.monotonic()
+    hit = _registry_cache.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    value = load()
+    _registry_cache[key] = (now + settings.ZOO_REGISTRY_CACHE_SECONDS, value)
+    return value
+
+
+def clear_registry_cache(**kwargs):
+    _registry_cache.clear()
+
+
+# Zmiana rejestru zoo w tym procesie jest widoczna od razu, w pozostałych
+# po ZOO_REGISTRY_CACHE_SECONDS
+post_save.connect(clear_registry_cache, sender='zoo_manager.Zoo')
+post_delete.connect(clear_registry_cache, sender='zoo_manager.Zoo')
+
+
+def get_zoo(pk):
+    """Zoo o podanym identyfikatorze (z podręcznej kopii rejestru)"""
+    from .models import Zoo
+    if pk is None:
+        return None
+    return _cached(('id', pk), lambda: Zoo.objects.filter(pk=pk).first())  # type: ignore
+
+
+def zoo_for_host(host):
+    """Zoo obsługiwane pod daną nazwą hosta (bez portu) lub None"""
+    from .models import Zoo
+    hostname = host.rsplit(':', 1)[0].lower() if host else ''
+    if not hostname:
+        return None
+    return _cached(('host', hostname), lambda: Zoo.objects.filter(hostname=hostname).first())  # type: ignore
+
+
+class TenantQuerySet(models.QuerySet):
+    def for_zoo(self, zoo=None):
+        """Zawęża do podanego (domyślnie bieżącego) zoo"""
+        zoo = zoo if zoo is not None else _current_zoo.get()
+        if zoo is None:
+            return self
+        return self.filter(zoo_id=getattr(zoo, 'pk', zoo))
+
+
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    """Manager widzący tylko wiersze bieżącego zoo (gdy jest ustalone)"""
+
+    def get_queryset(self):
+        return super().get_queryset().for_zoo()
+
+
+class TenantMiddleware:
+    """
+    Ustala zoo żądania: z nazwy hosta, a gdy host nie wskazuje zoo - z zoo
+    pracownika zalogowanego sesją. Żądania API z tokenem JWT dostają zoo z
+    tokenu w ``TenantJWTAuthentication`` (zoo_manager/authentication.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        zoo = zoo_for_host(request.get_host())
+        with use_zoo(zoo):
+            if zoo is None and request.user.is_authenticated:
+                activate(get_zoo(request.user.zoo_id))
+            return self.get_response(request)
@@ -1,3 +1,703 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.contrib.auth.models import Permission
+from django.db import connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from . import alerts, fast_updates, feed, idempotency, profiling, projections, query_stats, reports
+from .api_views import TaskViewSet
+from .auth_backends import CachedPermissionBackend
+from .authentication import token_for_user
+from .auth_cache import auth_cache
+from .db_router import PIN_COOKIE
+from .jobs import enqueue
+from .models import Animal, Employee, Enclosure, Job, Task, TaskDailyStat, TaskType, Zoo
+from .forms import TaskForm
+from .serializers import EnclosureSerializer
+from .task_claims import CLAIM_RETRY_AFTER, claim_task
+from .tenants import use_zoo
+
+TEST_REPLICA = settings.TEST_REPLICA
+
+
+@override_settings(DATABASE_REPLICAS=[TEST_REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Kierowanie zapytań na repliki (zoo_manager/db_router.py)"""
+
+    databases = {'default', TEST_REPLICA}
+
+    def setUp(self):
+        self.manager = Employee.objects.create_user(  # type: ignore
+            'manager', 'pass', imie='Anna', nazwisko='Nowak', role='manager', is_staff=True
+        )
+        self.enclosure = Enclosure.objects.create(name='Lwy')  # type: ignore
+        Animal.objects.create(species='Lew', name='Simba', gender='male', enclosure=self.enclosure)  # type: ignore
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def request(self, method, path, **kwargs):
+        """Odpowiedź i liczba zapytań wykonanych na (bazie głównej, replice)"""
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[TEST_REPLICA]) as replica:
+                response = getattr(self.client, method)(path, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_get_reads_from_replica(self):
+        response, primary, replica = self.request('get', '/api/animals/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 0)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_goes_to_primary_and_pins_client(self):
+        response, primary, replica = self.request(
+            'patch', f'/api/enclosures/{self.enclosure.pk}/', data={'name': 'Tygrysy'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    def test_pinned_client_reads_from_primary(self):
+        self.client.cookies[PIN_COOKIE] = '1'
+        for path in ('/api/animals/', '/api/dashboard/'):
+            with self.subTest(path=path):
+                response, primary, replica = self.request('get', path)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(primary, 0)
+                self.assertEqual(replica, 0)
+
+    def test_dashboard_reads_from_replica(self):
+        response, primary, replica = self.request('get', '/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(replica, 0)
+        self.assertEqual(primary, 0)
+
+    def test_sync_reads_cursor_and_changes_from_primary(self):
+        response, primary, replica = self.request('get', '/api/sync/?since=0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica, 0)
+        self.assertGreater(response.json()['next'], 0)
+        self.assertEqual([animal['name'] for animal in response.json()['changes']['animals']], ['Simba'])
+
+    def test_read_only_batch_reads_from_replica_without_pinning(self):
+        requests = [{'path': 'animals/'}, {'path': 'enclosures/'}, {'path': 'tasks/'}]
+        for batch in (requests, requests[:1]):
+            with self.subTest(size=len(batch)):
+                opened = []
+                connection_created.connect(opened.append)
+                try:
+                    response, primary, replica = self.request(
+                        'post', '/api/batch/', data={'requests': batch}, format='json'
+                    )
+                finally:
+                    connection_created.disconnect(opened.append)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([item['status'] for item in response.json()['responses']], [200] * len(batch))
+                self.assertGreater(replica, 0)
+                self.assertEqual(primary, 0)
+                self.assertNotIn(PIN_COOKIE, response.cookies)
+                # Pod-żądania korzystają z już otwartego połączenia żądania
+                self.assertEqual(opened, [])
+
+    def test_batch_with_write_uses_primary_and_pins_client(self):
+        requests = [
+            {'method': 'PATCH', 'path': f'enclosures/{self.enclosure.pk}/', 'body': {'name': 'Tygrysy'}},
+            {'path': 'enclosures/'},
+        ]
+        response, primary, replica = self.request('post', '/api/batch/', data={'requests': requests}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['responses'][1]['body'][0]['name'], 'Tygrysy')
+        self.assertEqual(replica, 0)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(AUTH_CACHE_PERMISSIONS=True, DATABASE_REPLICAS=[TEST_REPLICA])
+class PermissionCacheTests(TransactionTestCase):
+    """Pamięć podręczna uprawnień (zoo_manager/auth_cache.py)"""
+
+    databases = {'default', TEST_REPLICA}
+    PERM = 'zoo_manager.view_animal'
+
+    def setUp(self):
+        auth_cache().clear()
+        self.user = Employee.objects.create_user('worker', 'pass', imie='Jan', nazwisko='Kowalski')  # type: ignore
+        self.permission = Permission.objects.get(codename='view_animal')
+        self.user.user_permissions.add(self.permission)
+        self.backend = CachedPermissionBackend()
+
+    def permissions(self, using='default'):
+        return self.backend.get_all_permissions(Employee.objects.using(using).get(pk=self.user.pk))  # type: ignore
+
+    def test_revoke_is_seen_by_user_loaded_from_replica(self):
+        self.assertIn(self.PERM, self.permissions(TEST_REPLICA))
+        with transaction.atomic():
+            self.user.user_permissions.remove(self.permission)
+            # Wersja jest podbijana dopiero po zatwierdzeniu transakcji
+            self.assertIn(self.PERM, self.permissions())
+        self.assertNotIn(self.PERM, self.permissions(TEST_REPLICA))
+        self.assertNotIn(self.PERM, self.permissions())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SELECT ... FOR UPDATE SKIP LOCKED wymaga PostgreSQL')
+class TaskClaimConcurrencyTests(TransactionTestCase):
+    """Równoległe przejmowanie zadań (zoo_manager/task_claims.py)"""
+
+    WORKERS = 16
+    TASKS = 200
+
+    def setUp(self):
+        enclosure = Enclosure.objects.create(name='Lwy')  # type: ignore
+        self.employees = [
+            Employee.objects.create_user(f'worker-{i}', 'pass', imie='Jan', nazwisko=str(i))  # type: ignore
+            for i in range(self.WORKERS)
+        ]
+        for employee in self.employees:
+            employee.enclosures.add(enclosure)
+        task_type = TaskType.objects.for_name('karmienie')  # type: ignore
+        start = timezone.now()
+        Task.objects.bulk_create(  # type: ignore
+            Task(task_timestamp=start + timedelta(seconds=i), enclosure=enclosure, task_type=task_type)
+            for i in range(self.TASKS)
+        )
+
+    def test_no_task_is_claimed_twice(self):
+        claimed = []
+        failures = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.WORKERS)
+
+        def worker(employee):
+            barrier.wait()
+            try:
+                while (task := claim_task(employee)) is not None:
+                    with lock:
+                        claimed.append((task.pk, employee.pk))
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(employee,)) for employee in self.employees]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual([pk for pk, count in Counter(pk for pk, _ in claimed).items() if count > 1], [])
+        self.assertEqual(len(claimed), self.TASKS)
+        self.assertEqual(dict(Task.objects.values_list('pk', 'employee_id')), dict(claimed))  # type: ignore
+
+
+class TaskClaimAPITests(TestCase):
+    def setUp(self):
+        enclosure = Enclosure.objects.create(name='Lwy')  # type: ignore
+        self.worker = Employee.objects.create_user('worker', 'pass', imie='Jan', nazwisko='Kowalski')  # type: ignore
+        self.worker.enclosures.add(enclosure)
+        Task.objects.create(  # type: ignore
+            task_timestamp=timezone.now(), enclosure=enclosure, task_type=TaskType.objects.for_name('karmienie')  # type: ignore
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+
+    def test_claim_assigns_oldest_free_task(self):
+        response = self.client.post('/api/tasks/claim/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['employee'], self.worker.pk)
+        self.assertEqual(self.client.post('/api/tasks/claim/').status_code, 404)
+
+    def test_lost_races_ask_client_to_retry(self):
+        lost = fast_updates.UpdateResult(fast_updates.CONFLICT, None)
+        with mock.patch.object(fast_updates, 'update_fields', return_value=lost):
+            response = self.client.post('/api/tasks/claim/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(CLAIM_RETRY_AFTER))
+        self.assertIsNone(Task.objects.get().employee_id)  # type: ignore
+
+
+class ReportRebuildTests(TestCase):
+    """Przeliczanie podsumowań raportów (zoo_manager/reports.py)"""
+
+    def setUp(self):
+        task_type = TaskType.objects.for_name('karmienie')  # type: ignore
+        now = timezone.now()
+        self.old = [
+            Task.objects.create(task_timestamp=now - timedelta(days=100), task_type=task_type, is_completed=True)  # type: ignore
+            for _ in range(3)
+        ]
+        Task.objects.create(task_timestamp=now, task_type=task_type)  # type: ignore
+
+    def stats(self):
+        return sorted(TaskDailyStat.objects.values_list('scope', 'object_id', 'day', 'total', 'completed'))  # type: ignore
+
+    def test_rebuild_keeps_archived_tasks(self):
+        expected = self.stats()
+        with reports.preserve_stats():
+            Task.objects.filter(pk__in=[task.pk for task in self.old]).delete()  # type: ignore
+        self.assertEqual(self.stats(), expected)
+
+        for start, end in ((None, None), (timezone.localdate(self.old[0].task_timestamp), None)):
+            with self.subTest(start=start, end=end):
+                reports.rebuild(start, end)
+                self.assertEqual(self.stats(), expected)
+
+
+class ProjectionTests(TestCase):
+    """Projekcje list (zoo_manager/projections.py)"""
+
+    def test_related_values_are_fetched_in_chunks(self):
+        employees = [
+            Employee.objects.create_user(f'worker-{i}', 'pass', imie='Jan', nazwisko=str(i))  # type: ignore
+            for i in range(3)
+        ]
+        for i in range(5):
+            Enclosure.objects.create(name=f'Wybieg {i}').responsible_employees.set(employees[:i % 4])  # type: ignore
+        queryset = Enclosure.objects.order_by('pk')  # type: ignore
+        projection = projections.compile_projection(EnclosureSerializer)
+
+        with mock.patch.object(projections, 'RELATED_CHUNK_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                rows = projection.build(projection.queryset(queryset))
+        self.assertEqual(rows, EnclosureSerializer(queryset, many=True).data)
+        # Lista wybiegów i trzy porcje kluczy dla responsible_employees
+        self.assertEqual(len(queries), 4)
+
+
+class ProfilingTests(TestCase):
+    """Profile żądań (zoo_manager/profiling.py)"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiles = override_settings(PROFILING_DIR=directory.name)
+        profiles.enable()
+        self.addCleanup(profiles.disable)
+        other = Zoo.objects.create(name='Zoo Inne', slug='inne')  # type: ignore
+        for username, zoo in (('admin', None), ('other-admin', other)):
+            Employee.objects.create_user(  # type: ignore
+                username, 'pass', imie='Anna', nazwisko='Nowak', role='manager', is_staff=True,
+                **({'zoo': zoo} if zoo else {})
+            )
+
+    def profile(self):
+        self.client.login(username='admin', password='pass')
+        response = self.client.get('/api/employees/?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        return response['X-Profile-Id']
+
+    def test_profile_is_visible_only_in_its_zoo(self):
+        profile_id = self.profile()
+        self.assertEqual([item['id'] for item in self.client.get('/api/profiles/').json()['profiles']], [profile_id])
+
+        self.client.login(username='other-admin', password='pass')
+        self.assertEqual(self.client.get('/api/profiles/').json()['profiles'], [])
+        for query in ('', '?download=speedscope'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/profiles/{profile_id}/{query}').status_code, 404)
+
+    def test_params_of_sensitive_tables_are_masked(self):
+        queries = profiling.read_profile(self.profile())['queries']
+        masked = [query for query in queries if query['masked']]
+        self.assertTrue(masked)
+        for query in masked:
+            self.assertTrue(all(param == profiling.MASKED_VALUE for param in query['params']))
+            self.assertNotIn('explain', query)
+
+
+class OverdueAlertTests(TestCase):
+    """Powiadomienia o zaległych zadaniach (zoo_manager/alerts.py)"""
+
+    class Sink:
+        def __init__(self):
+            self.digests = []
+
+        def deliver(self, digests):
+            self.digests.extend(digests)
+
+    def setUp(self):
+        Employee.objects.create_user('manager', 'pass', imie='Anna', nazwisko='Nowak', role='manager')  # type: ignore
+        self.task_type = TaskType.objects.for_name('karmienie')  # type: ignore
+        self.now = timezone.now()
+
+    def task(self, timestamp):
+        return Task.objects.create(task_timestamp=timestamp, task_type=self.task_type)  # type: ignore
+
+    def process(self, minutes):
+        sink = self.Sink()
+        alerts.process(now=self.now + timedelta(minutes=minutes), sink=sink)
+        return sorted({alert.object_id for digest in sink.digests for alert in digest.alerts})
+
+    def test_each_overdue_task_is_alerted_once(self):
+        self.task(self.now - timedelta(days=1))
+        self.assertEqual(self.process(0), [])  # Pierwszy przebieg - zaległości sprzed wdrożenia
+
+        backdated = self.task(self.now - timedelta(days=2))
+        due = self.task(self.now + timedelta(minutes=5))
+        self.assertEqual(self.process(10), [backdated.pk, due.pk])
+        self.assertEqual(self.process(20), [])
+
+        due.task_timestamp = self.now + timedelta(minutes=25)
+        due.save()
+        self.assertEqual(self.process(30), [due.pk])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan PostgreSQL dla małej tabeli testowej zależy od statystyk')
+    def test_pending_overdue_uses_partial_index(self):
+        with use_zoo(Zoo.objects.get(pk=settings.DEFAULT_ZOO_ID)):  # type: ignore
+            plan = alerts.pending_overdue(self.now).explain()
+        self.assertIn('tasks_overdue_unreported_idx', plan)
+
+
+@override_settings(QUERY_STATS_SLOW_MS=0)
+class QueryStatsTests(TestCase):
+    """Statystyka zapytań (zoo_manager/query_stats.py)"""
+
+    def setUp(self):
+        self.stats = query_stats.QueryStats()
+        self.zoo = Zoo.objects.get(pk=settings.DEFAULT_ZOO_ID)  # type: ignore
+        self.other = Zoo.objects.create(name='Zoo Inne', slug='inne')  # type: ignore
+
+    def test_sensitive_tables_are_not_explained(self):
+        with use_zoo(self.zoo):
+            self.stats.record('SELECT * FROM "employees" WHERE "username" = %s', ['admin'], 'default', 1, False)
+            self.stats.record('SELECT * FROM "django_session" WHERE "session_key" = %s', ['k'], 'default', 1, False)
+            self.stats.record('SELECT * FROM "animals" WHERE "name" = %s', ['Simba'], 'default', 1, False)
+        self.assertEqual([sql for _, sql, _ in self.stats._pending.values()], ['SELECT * FROM "animals" WHERE "name" = %s'])
+
+    def test_snapshot_is_scoped_to_zoo(self):
+        for zoo, table in ((self.zoo, 'animals'), (self.other, 'tasks')):
+            with use_zoo(zoo):
+                self.stats.record(f'SELECT * FROM "{table}"', [], 'default', 1, False)
+        self.stats.explain_pending()
+
+        rows = self.stats.snapshot(zoo=self.other)['queries']
+        self.assertEqual([(row['fingerprint'], row['zoo']) for row in rows], [('SELECT * FROM "tasks"', self.other.pk)])
+        self.assertIsNotNone(rows[0]['explain'])
+        self.assertEqual(len(self.stats.snapshot()['queries']), 2)
+
+
+class TaskTypeValidationTests(TestCase):
+    """Typ zadania jest dopisywany do słownika dopiero przy zapisie zadania"""
+
+    def setUp(self):
+        manager = Employee.objects.create_user(  # type: ignore
+            'manager', 'pass', imie='Anna', nazwisko='Nowak', role='manager', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(manager)
+
+    def types(self):
+        return set(TaskType.objects.values_list('name', flat=True))  # type: ignore
+
+    def test_api_rejected_task_does_not_add_type(self):
+        before = self.types()
+        response = self.client.post('/api/tasks/', {'task_type': 'ważenie', 'task_timestamp': 'wczoraj'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.types(), before)
+
+        response = self.client.post(
+            '/api/tasks/', {'task_type': ' ważenie ', 'task_timestamp': timezone.now().isoformat()}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['task_type'], 'ważenie')
+        self.assertEqual(self.types(), before | {'ważenie'})
+
+    def test_form_rejected_task_does_not_add_type(self):
+        before = self.types()
+        self.assertFalse(TaskForm({'task_type': 'ważenie', 'task_timestamp': 'wczoraj'}).is_valid())
+        self.assertEqual(self.types(), before)
+
+        form = TaskForm({'task_type': 'ważenie', 'task_timestamp': '2026-10-19T10:00'})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().task_type.name, 'ważenie')
+        self.assertEqual(list(form.fields)[0], 'task_type')
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class TenantIsolationTests(TestCase):
+    """Rozdzielenie danych zoo (zoo_manager/tenants.py, zoo_manager/authentication.py)"""
+
+    def setUp(self):
+        self.zoo_a = Zoo.objects.get(pk=settings.DEFAULT_ZOO_ID)  # type: ignore
+        self.zoo_a.hostname = 'a.zoo.test'
+        self.zoo_a.save()
+        self.zoo_b = Zoo.objects.create(name='Zoo B', slug='zoo-b', hostname='b.zoo.test')  # type: ignore
+        self.a = self.populate(self.zoo_a, 'A')
+        self.b = self.populate(self.zoo_b, 'B')
+
+    def populate(self, zoo, name):
+        with use_zoo(zoo):
+            manager = Employee.objects.create_user(  # type: ignore
+                f'manager-{name}', 'pass', imie='Anna', nazwisko=name, role='manager', is_staff=True
+            )
+            worker = Employee.objects.create_user(f'worker-{name}', 'pass', imie='Jan', nazwisko=name)  # type: ignore
+            enclosure = Enclosure.objects.create(name=f'Wybieg {name}')  # type: ignore
+            worker.enclosures.add(enclosure)
+            animal = Animal.objects.create(  # type: ignore
+                species='Lew', name=f'Lew {name}', gender='male', enclosure=enclosure
+            )
+            task = Task.objects.create(  # type: ignore
+                task_timestamp=timezone.now(), enclosure=enclosure, employee=worker,
+                task_type=TaskType.objects.for_name('karmienie'),  # type: ignore
+            )
+        return {'manager': manager, 'worker': worker, 'enclosure': enclosure, 'animal': animal, 'task': task}
+
+    def api(self, user, host=None):
+        client = APIClient(**({'HTTP_HOST': host} if host else {}))
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_for_user(user).access_token}')
+        return client
+
+    def test_lists_and_sync_return_only_callers_zoo(self):
+        for data in (self.a, self.b):
+            client = self.api(data['manager'])
+            with self.subTest(zoo=data['enclosure'].name):
+                self.assertEqual([row['id'] for row in client.get('/api/animals/').json()], [data['animal'].pk])
+                self.assertEqual([row['id'] for row in client.get('/api/tasks/').json()], [data['task'].pk])
+                self.assertEqual([row['id'] for row in client.get('/api/enclosures/').json()], [data['enclosure'].pk])
+                self.assertEqual(
+                    {row['id'] for row in client.get('/api/employees/').json()},
+                    {data['manager'].pk, data['worker'].pk},
+                )
+                changes = client.get('/api/sync/').json()['changes']
+                self.assertEqual([row['id'] for row in changes['animals']], [data['animal'].pk])
+                self.assertEqual([row['id'] for row in changes['tasks']], [data['task'].pk])
+                self.assertEqual({row['id'] for row in changes['employees']}, {data['manager'].pk, data['worker'].pk})
+
+    def test_feed_and_autocomplete_return_only_callers_zoo(self):
+        feed = self.api(self.b['worker']).get('/api/me/feed/').json()
+        self.assertEqual([task['id'] for task in feed['tasks']], [self.b['task'].pk])
+        self.assertEqual([animal['id'] for animal in feed['animals']], [self.b['animal'].pk])
+        self.assertEqual([enclosure['id'] for enclosure in feed['enclosures']], [self.b['enclosure'].pk])
+
+        client = self.api(self.b['manager'])
+        results = client.get('/api/autocomplete/enclosures/?q=Wybieg').json()['results']
+        self.assertEqual([row['id'] for row in results], [self.b['enclosure'].pk])
+        results = client.get('/api/autocomplete/employees/?q=Anna').json()['results']
+        self.assertEqual([row['id'] for row in results], [self.b['manager'].pk])
+
+    def test_fast_patch_of_other_zoo_row_is_not_found(self):
+        client = self.api(self.b['manager'])
+        response = client.patch(f"/api/animals/{self.a['animal'].pk}/", {'health': False}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = client.patch(f"/api/tasks/{self.a['task'].pk}/", {'is_completed': True}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Animal.objects.get(pk=self.a['animal'].pk).health)  # type: ignore
+        self.assertFalse(Task.objects.get(pk=self.a['task'].pk).is_completed)  # type: ignore
+
+    def test_token_is_rejected_on_other_zoo_host(self):
+        self.assertEqual(self.api(self.a['manager'], 'a.zoo.test').get('/api/animals/').status_code, 200)
+        self.assertEqual(self.api(self.a['manager'], 'b.zoo.test').get('/api/animals/').status_code, 401)
+
+    def test_session_user_is_anonymous_on_other_zoo_host(self):
+        for host, authenticated in (('b.zoo.test', True), ('a.zoo.test', False)):
+            with self.subTest(host=host):
+                client = APIClient(HTTP_HOST=host)
+                self.assertTrue(client.login(username='manager-B', password='pass'))
+                response = client.get('/api/me/feed/')
+                if authenticated:
+                    self.assertEqual(response.json()['employee'], self.b['manager'].pk)
+                else:
+                    self.assertIn(response.status_code, (401, 403))
+
+
+class TenantJobTests(TransactionTestCase):
+    """Worker ``run_jobs --zoo`` obsługuje tylko kolejkę swojego zoo"""
+
+    def test_run_jobs_for_one_zoo(self):
+        # TransactionTestCase czyści tabele - także zoo dodane przez migrację
+        zoo_a, _ = Zoo.objects.get_or_create(pk=settings.DEFAULT_ZOO_ID, defaults={'name': 'Zoo A', 'slug': 'zoo-a'})  # type: ignore
+        zoo_b = Zoo.objects.create(name='Zoo B', slug='zoo-b')  # type: ignore
+        queued = {}
+        for zoo in (zoo_a, zoo_b):
+            with use_zoo(zoo):
+                queued[zoo.pk] = enqueue('refresh_task_reports').pk
+
+        call_command('run_jobs', zoo='zoo-b', once=True, workers=1, poll=0.01, stdout=io.StringIO())
+
+        status = dict(Job.objects.values_list('pk', 'status'))  # type: ignore
+        self.assertEqual(status[queued[zoo_b.pk]], 'succeeded')
+        self.assertEqual(status[queued[settings.DEFAULT_ZOO_ID]], 'queued')
+
+
+class FeedTests(TestCase):
+    """Przyrostowe utrzymanie kanałów pracowników (zoo_manager/feed.py)"""
+
+    def setUp(self):
+        self.workers = [
+            Employee.objects.create_user(f'worker-{i}', 'pass', imie='Jan', nazwisko=str(i))  # type: ignore
+            for i in range(3)
+        ]
+        self.enclosures = [Enclosure.objects.create(name=f'Wybieg {i}') for i in range(2)]  # type: ignore
+        w0, w1, _ = self.workers
+        e0, e1 = self.enclosures
+        w0.enclosures.add(e0)
+        w1.enclosures.add(e0, e1)
+        self.animals = [
+            Animal.objects.create(species='Lew', name=f'Lew {i}', gender='male', enclosure=enclosure)  # type: ignore
+            for i, enclosure in enumerate(self.enclosures)
+        ]
+        task_type = TaskType.objects.for_name('karmienie')  # type: ignore
+        self.tasks = [
+            Task.objects.create(task_timestamp=timezone.now(), enclosure=enclosure, employee=worker, task_type=task_type)  # type: ignore
+            for enclosure, worker in ((e0, w0), (e1, w1), (e0, w1))
+        ]
+
+    def feeds(self):
+        return {worker.pk: feed.read_feed(worker.pk) for worker in self.workers}
+
+    def assertMatchesRebuild(self):
+        incremental = self.feeds()
+        feed.rebuild()
+        self.assertEqual(incremental, self.feeds())
+
+    def save(self, obj, **values):
+        for name, value in values.items():
+            setattr(obj, name, value)
+        obj.save()
+
+    def test_incremental_feed_matches_rebuild(self):
+        w0, w1, w2 = self.workers
+        e0, e1 = self.enclosures
+        a0, a1 = self.animals
+        t0, t1, t2 = self.tasks
+        mutations = [
+            ('przypisanie od strony pracownika', lambda: w0.enclosures.add(e1)),
+            ('przypisanie od strony wybiegu', lambda: e1.employees.add(w2)),
+            ('odpięcie od strony wybiegu', lambda: e0.employees.remove(w1)),
+            ('odpięcie od strony pracownika', lambda: w0.enclosures.remove(e1)),
+            ('przeniesienie zwierzęcia', lambda: self.save(a0, enclosure=e1)),
+            ('zwierzę bez wybiegu', lambda: self.save(a1, enclosure=None)),
+            ('zmiana nazwy wybiegu', lambda: self.save(e1, name='Wybieg nowy')),
+            ('zmiana pracownika zadania', lambda: self.save(t1, employee=w2)),
+            ('szybkie ukończenie zadania', lambda: fast_updates.update_fields(Task, t0.pk, {'is_completed': True})),
+            ('szybka zmiana stanu zdrowia', lambda: fast_updates.update_fields(Animal, a0.pk, {'health': False})),
+            ('clear() od strony pracownika', lambda: w1.enclosures.clear()),
+            ('clear() od strony wybiegu', lambda: e1.employees.clear()),
+            ('ponowne przypisanie', lambda: w1.enclosures.set([e0, e1])),
+            ('usunięcie wybiegu z zadaniami', lambda: e0.delete()),
+            ('usunięcie zwierzęcia', lambda: a0.delete()),
+            ('usunięcie zadania', lambda: t1.delete()),
+        ]
+        for name, mutate in mutations:
+            with self.subTest(name):
+                mutate()
+                self.assertMatchesRebuild()
+        # Zadanie t2 straciło wybieg razem z usuniętym e0, ale nadal jest w kanale
+        self.assertEqual([task['enclosure'] for task in feed.read_feed(w1.pk)['tasks']], [None])
+
+    def test_endpoint_is_one_query(self):
+        client = APIClient()
+        client.force_authenticate(self.workers[1])
+        client.get('/api/me/feed/')  # Rejestr zoo (nazwa hosta) trafia do pamięci procesu
+        with self.assertNumQueries(1):
+            response = client.get('/api/me/feed/')
+        self.assertEqual({len(response.json()[key]) for key in ('tasks', 'enclosures', 'animals')}, {2})
+
+
+class IdempotencyTestMixin:
+    KEY = 'tablet-1-zapis-7'
+
+    def setUp(self):
+        idempotency.idempotency_cache().clear()
+        zoo, _ = Zoo.objects.get_or_create(pk=settings.DEFAULT_ZOO_ID, defaults={'name': 'Zoo A', 'slug': 'zoo-a'})  # type: ignore
+        with use_zoo(zoo):
+            self.manager = Employee.objects.create_user(  # type: ignore
+                'manager', 'pass', imie='Anna', nazwisko='Nowak', role='manager', is_staff=True
+            )
+        self.token = f'Bearer {token_for_user(self.manager).access_token}'
+
+    def body(self, comments='pierwsze'):
+        return json.dumps({'task_type': 'karmienie', 'task_timestamp': '2026-10-19T10:00:00Z', 'comments': comments})
+
+    def post(self, body=None, key=KEY):
+        return APIClient().post(
+            '/api/tasks/', body or self.body(), content_type='application/json',
+            HTTP_AUTHORIZATION=self.token, HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+
+class IdempotencyTests(IdempotencyTestMixin, TestCase):
+    """Nagłówek Idempotency-Key (zoo_manager/idempotency.py)"""
+
+    def test_repeat_is_replayed(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((second.status_code, second.json()), (201, first.json()))
+        self.assertEqual(second[idempotency.REPLAY_HEADER], 'true')
+        self.assertEqual(Task.objects.count(), 1)  # type: ignore
+
+    def test_key_reused_for_other_request(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.post(self.body('drugie')).status_code, 422)
+        self.assertEqual(Task.objects.count(), 1)  # type: ignore
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_pending_execution_gives_conflict(self):
+        request = mock.Mock(method='POST', body=self.body().encode(), get_full_path=lambda: '/api/tasks/')
+        idempotency.idempotency_cache().add(
+            idempotency.store_key(self.manager, self.KEY), (idempotency.PENDING, idempotency.request_fingerprint(request))
+        )
+        response = self.post()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Task.objects.exists())  # type: ignore
+
+    def test_server_error_releases_key(self):
+        failure = mock.Mock(return_value=Response(status=500))
+        with mock.patch.object(TaskViewSet, 'create', failure):
+            self.assertEqual(self.post().status_code, 500)
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(idempotency.REPLAY_HEADER, response)
+
+
+class IdempotencyConcurrencyTests(IdempotencyTestMixin, TransactionTestCase):
+    def test_concurrent_duplicate_executes_once(self):
+        create = TaskViewSet.create
+
+        def slow_create(view, request, *args, **kwargs):
+            # Drugie żądanie przychodzi, zanim pierwsze się zakończy
+            time.sleep(0.3)
+            return create(view, request, *args, **kwargs)
+
+        responses = []
+        failures = []
+        barrier = threading.Barrier(2)
+
+        def send():
+            barrier.wait()
+            try:
+                responses.append(self.post())
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        with mock.patch.object(TaskViewSet, 'create', slow_create):
+            threads = [threading.Thread(target=send) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(sorted(idempotency.REPLAY_HEADER in response for response in responses), [False, True])
+        self.assertEqual(Task.objects.count(), 1)  # type: ignore
@@ -5,7 +5,9 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test, permission_required
 from .models import Task, Enclosure, Animal, Employee
 from .forms import EmployeeCreationForm, EnclosureForm, AnimalForm, TaskForm, TaskCompletionForm, EmployeeChangeForm
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe
+from django.http import Http404
+from .staticfiles import frontend_index
 
 # Funkcja pomocnicza do sprawdzania roli managera
 def is_manager(user):
@@ -45,7 +47,7 @@ def logout_view(request):
 @login_required
 def task_list_view(request):
     # Pobierz dane z bazy danych
-    tasks = Task.objects.all().order_by('-task_timestamp')  # type: ignore
+    tasks = Task.objects.select_related('task_type').order_by('-task_timestamp')  # type: ignore
     context = {
         'tasks': tasks
     }
@@ -247,3 +249,15 @@ def edit_employee_view(request, employee_id):
         form = EmployeeChangeForm(instance=employee)
     
     return render(request, 'zoo_manager/edit_employee.html', {'form': form, 'employee': employee})
+
+
+@require_safe
+def frontend_view(request, path=''):
+    """Aplikacja React (tryb SERVE_FRONTEND) - każda ścieżka pod /app/ dostaje index.html, trasy obsługuje router"""
+    content = frontend_index()
+    if content is None:
+        raise Http404('Brak zbudowanego frontendu - uruchom npm run build:django i collectstatic')
+    response = HttpResponse(content, content_type='text/html; charset=utf-8')
+    # index.html wskazuje aktualne nazwy zasobów - zawsze sprawdzany przy wdrożeniu nowej wersji
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,118 @@
+"""
+Rozgrzewka procesu serwera przed przyjęciem ruchu.
+
+Pierwsze żądanie w świeżym procesie płaci za rzeczy, które Django i DRF
+robią leniwie: import modułów widoków i budowę resolvera URL, kompilację
+szablonów, zbudowanie pól serializerów (metadane modeli), projekcje list
+(zoo_manager/projections.py), katalogi tłumaczeń i połączenie z bazą.
+``warm_up()`` wykonuje te kroki od razu - wywołuje ją BAW/wsgi.py i
+BAW/asgi.py, zanim serwer zacznie przyjmować żądania (``WARMUP_ON_STARTUP``).
+
+Połączenia z bazą otwarte w rozgrzewce zostają w procesie dzięki
+``CONN_MAX_AGE``. Jeśli serwer ładuje aplikację przed fork() (np.
+``gunicorn --preload``), procesy potomne nie używają odziedziczonych
+połączeń - otwierają własne.
+
+Zysk można zmierzyć poleceniem ``manage.py startup_profile``.
+"""
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Surowe połączenia odziedziczone po procesie nadrzędnym; trzymane, żeby ich
+# zamknięcie przez odśmiecanie nie zakończyło sesji procesu nadrzędnego
+_inherited = []
+
+
+def warm_urls():
+    """Importuje moduły widoków i buduje słowniki resolvera (także przestrzeni nazw)"""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        namespace_resolver.reverse_dict
+
+
+def warm_serializers():
+    """Buduje pola serializerów i projekcje list dla ViewSetów API"""
+    from .api_urls import router
+    from .projections import compile_projection, supports_projection
+
+    for _, viewset, _ in router.registry:
+        serializer_class = viewset.serializer_class
+        serializer_class().fields
+        if supports_projection(serializer_class):
+            compile_projection(serializer_class)
+
+
+def template_names(directory):
+    return [path.relative_to(directory).as_posix() for path in sorted(Path(directory).rglob('*.html'))]
+
+
+def warm_templates():
+    """Kompiluje szablony projektu (katalogi spod BASE_DIR) do pamięci podręcznej loadera"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            if not Path(directory).resolve().is_relative_to(base_dir):
+                continue
+            for name in template_names(directory):
+                engine.get_template(name)
+
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+
+
+def warm_database():
+    """Otwiera połączenia ze wszystkimi bazami (główną, replikami i bazami zoo)"""
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+STEPS = (
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+    ('templates', warm_templates),
+    ('translations', warm_translations),
+    ('database', warm_database),
+)
+
+
+def _discard_inherited_connections():
+    for alias in connections:
+        connection = connections[alias]
+        if connection.connection is not None:
+            _inherited.append(connection.connection)
+            connection.connection = None
+
+
+def warm_up(force=False):
+    """Wykonuje kroki rozgrzewki; zwraca czasy kroków w milisekundach"""
+    if not (force or settings.WARMUP_ON_STARTUP):
+        return {}
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            # Rozgrzewka nie może zatrzymać startu - krok wykona się przy pierwszym żądaniu
+            logger.exception('Krok rozgrzewki %s nie powiódł się', name)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info('Rozgrzewka procesu: %s', timings)
+    return timings
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_discard_inherited_connections)
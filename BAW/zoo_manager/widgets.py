@@ -0,0 +1,46 @@
+"""
+Widżety wyboru z podpowiedziami (zoo_manager/autocomplete.py).
+
+Renderują tylko aktualnie wybrane opcje; pozostałe skrypt
+``zoo_manager/autocomplete.js`` pobiera z ``/api/autocomplete/<źródło>/``
+w trakcie pisania.
+"""
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteMixin:
+    def __init__(self, source, attrs=None, choices=()):
+        super().__init__(attrs, choices)
+        self.source = source
+
+    class Media:
+        js = ('zoo_manager/autocomplete.js',)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse('api_autocomplete', args=[self.source])
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Tylko wybrane opcje - bez wczytywania całej tabeli"""
+        selected = {str(v) for v in value if v not in (None, '')}
+        field = self.choices.field
+        options = []
+        if not self.allow_multiple_selected and field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, not selected, 0))
+        if selected:
+            for obj in self.choices.queryset.filter(pk__in=selected):
+                index = len(options)
+                options.append(self.create_option(
+                    name, field.prepare_value(obj), field.label_from_instance(obj), True, index, attrs=attrs,
+                ))
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
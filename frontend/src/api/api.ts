@@ -1,12 +1,43 @@
 import axios from 'axios';
+import type { AxiosResponseHeaders } from 'axios';
+import { decode } from './msgpack';
 
-const API_URL = 'http://localhost:8000/api';
+// Built with "npm run build:django" the app is served by Django itself
+// (.env.django): same-origin API and routes under /app/
+const API_URL = import.meta.env.VITE_API_URL ?? 'http://localhost:8000/api';
+const ROUTER_BASENAME = import.meta.env.VITE_ROUTER_BASENAME ?? '';
+
+// Opt-in binary responses: build with VITE_API_MSGPACK=true to ask the API
+// for application/msgpack instead of JSON
+const USE_MSGPACK = import.meta.env.VITE_API_MSGPACK === 'true';
+
+const decodeResponse = (data: unknown, headers: AxiosResponseHeaders) => {
+  if (!(data instanceof ArrayBuffer)) return data;
+  if (data.byteLength === 0) return '';
+  if (String(headers['content-type'] ?? '').includes('application/msgpack')) {
+    return decode(data);
+  }
+  const text = new TextDecoder().decode(data);
+  try {
+    return JSON.parse(text);
+  } catch {
+    return text;
+  }
+};
+
+const msgpackConfig = USE_MSGPACK
+  ? { responseType: 'arraybuffer' as const, transformResponse: decodeResponse }
+  : {};
 
 const api = axios.create({
   baseURL: API_URL,
   headers: {
     'Content-Type': 'application/json',
+    ...(USE_MSGPACK ? { Accept: 'application/msgpack, application/json;q=0.9' } : {}),
   },
+  // Send the primary-pin cookie so reads after a write see our own changes
+  withCredentials: true,
+  ...msgpackConfig,
 });
 
 // Add a request interceptor to add the auth token to requests
@@ -49,7 +80,7 @@ api.interceptors.response.use(
         // If refresh token fails, redirect to login
         localStorage.removeItem('token');
         localStorage.removeItem('refreshToken');
-        window.location.href = '/login';
+        window.location.href = `${ROUTER_BASENAME}/login`;
         return Promise.reject(error);
       }
     }
@@ -38,6 +38,20 @@ export const getTask = (id: number) => api.get(`/tasks/${id}/`);
 export const createTask = (data: any) => api.post('/tasks/', data);
 export const updateTask = (id: number, data: any) => api.put(`/tasks/${id}/`, data);
 export const deleteTask = (id: number) => api.delete(`/tasks/${id}/`);
+export const claimTask = () => api.post('/tasks/claim/');
 
 // Dashboard endpoints
-export const getDashboardStats = () => api.get('/dashboard/'); 
\ No newline at end of file
+export const getDashboardStats = () => api.get('/dashboard/'); 
+
+// Batch endpoint: several API calls in one round trip (paths relative to /api/)
+export interface BatchRequest {
+  method?: 'GET' | 'POST' | 'PUT' | 'PATCH' | 'DELETE';
+  path: string;
+  body?: unknown;
+}
+export interface BatchResponse<T = any> {
+  status: number;
+  body: T;
+}
+export const batch = (requests: BatchRequest[]) =>
+  api.post<{ responses: BatchResponse[] }>('/batch/', { requests });
@@ -0,0 +1,113 @@
+// Minimal MessagePack decoder for API responses (application/msgpack).
+// Supports every type the Django renderer emits: nil, booleans, integers,
+// floats, strings, binary, arrays and maps.
+
+const textDecoder = new TextDecoder();
+
+class Reader {
+  private view: DataView;
+  private bytes: Uint8Array;
+  private offset = 0;
+
+  constructor(buffer: ArrayBuffer) {
+    this.view = new DataView(buffer);
+    this.bytes = new Uint8Array(buffer);
+  }
+
+  read(): unknown {
+    const type = this.view.getUint8(this.offset++);
+
+    if (type <= 0x7f) return type;
+    if (type >= 0xe0) return type - 0x100;
+    if (type >= 0x80 && type <= 0x8f) return this.map(type & 0x0f);
+    if (type >= 0x90 && type <= 0x9f) return this.array(type & 0x0f);
+    if (type >= 0xa0 && type <= 0xbf) return this.str(type & 0x1f);
+
+    switch (type) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: return this.bin(this.uint(1));
+      case 0xc5: return this.bin(this.uint(2));
+      case 0xc6: return this.bin(this.uint(4));
+      case 0xca: return this.float(4);
+      case 0xcb: return this.float(8);
+      case 0xcc: return this.uint(1);
+      case 0xcd: return this.uint(2);
+      case 0xce: return this.uint(4);
+      case 0xcf: return this.uint(8);
+      case 0xd0: return this.int(1);
+      case 0xd1: return this.int(2);
+      case 0xd2: return this.int(4);
+      case 0xd3: return this.int(8);
+      case 0xd9: return this.str(this.uint(1));
+      case 0xda: return this.str(this.uint(2));
+      case 0xdb: return this.str(this.uint(4));
+      case 0xdc: return this.array(this.uint(2));
+      case 0xdd: return this.array(this.uint(4));
+      case 0xde: return this.map(this.uint(2));
+      case 0xdf: return this.map(this.uint(4));
+      default:
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+  }
+
+  private uint(size: 1 | 2 | 4 | 8): number {
+    const offset = this.offset;
+    this.offset += size;
+    switch (size) {
+      case 1: return this.view.getUint8(offset);
+      case 2: return this.view.getUint16(offset);
+      case 4: return this.view.getUint32(offset);
+      default: return Number(this.view.getBigUint64(offset));
+    }
+  }
+
+  private int(size: 1 | 2 | 4 | 8): number {
+    const offset = this.offset;
+    this.offset += size;
+    switch (size) {
+      case 1: return this.view.getInt8(offset);
+      case 2: return this.view.getInt16(offset);
+      case 4: return this.view.getInt32(offset);
+      default: return Number(this.view.getBigInt64(offset));
+    }
+  }
+
+  private float(size: 4 | 8): number {
+    const offset = this.offset;
+    this.offset += size;
+    return size === 4 ? this.view.getFloat32(offset) : this.view.getFloat64(offset);
+  }
+
+  private str(length: number): string {
+    const value = textDecoder.decode(this.bytes.subarray(this.offset, this.offset + length));
+    this.offset += length;
+    return value;
+  }
+
+  private bin(length: number): Uint8Array {
+    const value = this.bytes.slice(this.offset, this.offset + length);
+    this.offset += length;
+    return value;
+  }
+
+  private array(length: number): unknown[] {
+    const items = new Array(length);
+    for (let i = 0; i < length; i++) items[i] = this.read();
+    return items;
+  }
+
+  private map(length: number): Record<string, unknown> {
+    const result: Record<string, unknown> = {};
+    for (let i = 0; i < length; i++) {
+      const key = this.read();
+      result[String(key)] = this.read();
+    }
+    return result;
+  }
+}
+
+export function decode(buffer: ArrayBuffer): unknown {
+  return new Reader(buffer).read();
+}
@@ -31,7 +31,7 @@ import {
   Sick as SickIcon,
   HealthAndSafety as HealthyIcon,
 } from '@mui/icons-material';
-import { getAnimals, createAnimal, updateAnimal, updateAnimalHealth, deleteAnimal, getEnclosures } from '../api/endpoints';
+import { getAnimals, createAnimal, updateAnimal, updateAnimalHealth, deleteAnimal, batch } from '../api/endpoints';
 
 interface Animal {
   id: number;
@@ -54,7 +54,7 @@ interface AnimalFormData {
 const initialFormData: AnimalFormData = {
   name: '',
   species: '',
-  gender: 'M',
+  gender: 'male',
   enclosure: null,
   health: true,
 };
@@ -71,11 +71,14 @@ const species = [
   'Makak',
 ];
 
+// API zwraca płeć w postaci kanonicznej ('male'/'female'); 'M'/'F' są akceptowane tylko przy zapisie
 const genders = [
-  { value: 'M', label: 'Samiec' },
-  { value: 'F', label: 'Samica' },
+  { value: 'male', label: 'Samiec' },
+  { value: 'female', label: 'Samica' },
 ];
 
+const genderLabel = (gender: string) => genders.find((g) => g.value === gender)?.label ?? gender;
+
 export default function Animals() {
   const [animals, setAnimals] = useState<Animal[]>([]);
   const [loading, setLoading] = useState(true);
@@ -105,18 +108,26 @@ export default function Animals() {
     }
   };
 
-  const fetchEnclosures = async () => {
+  // Dane startowe strony pobierane jednym żądaniem /api/batch/
+  const fetchPageData = async () => {
     try {
-      const response = await getEnclosures();
-      setEnclosures(response.data);
+      setLoading(true);
+      const response = await batch([{ path: '/animals/' }, { path: '/enclosures/' }]);
+      const [animalsResult, enclosuresResult] = response.data.responses;
+      if (animalsResult.status !== 200) throw new Error(`animals: ${animalsResult.status}`);
+      setAnimals(animalsResult.body);
+      if (enclosuresResult.status === 200) setEnclosures(enclosuresResult.body);
+      else console.error('Błąd podczas pobierania wybiegów:', enclosuresResult.body);
     } catch (err) {
-      console.error('Błąd podczas pobierania wybiegów:', err);
+      setError('Nie udało się pobrać listy zwierząt');
+      setSnackbar({ open: true, message: 'Błąd podczas pobierania danych', severity: 'error' });
+    } finally {
+      setLoading(false);
     }
   };
 
   useEffect(() => {
-    fetchAnimals();
-    fetchEnclosures();
+    fetchPageData();
   }, []);
 
   useEffect(() => {
@@ -288,7 +299,7 @@ export default function Animals() {
               <TableRow key={animal.id}>
                 <TableCell>{animal.species}</TableCell>
                 <TableCell>{animal.name}</TableCell>
-                <TableCell>{animal.gender}</TableCell>
+                <TableCell>{genderLabel(animal.gender)}</TableCell>
                 <TableCell>{animal.enclosure_name || 'Nie przypisano'}</TableCell>
                 <TableCell>
                   <Chip
@@ -358,8 +369,11 @@ export default function Animals() {
                   margin="normal"
                   required
                 >
-                  <MenuItem value="male">Samiec</MenuItem>
-                  <MenuItem value="female">Samica</MenuItem>
+                  {genders.map((gender) => (
+                    <MenuItem key={gender.value} value={gender.value}>
+                      {gender.label}
+                    </MenuItem>
+                  ))}
                 </TextField>
                 <TextField
                   select
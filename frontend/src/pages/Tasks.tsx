@@ -26,12 +26,13 @@ import {
 } from '@mui/material';
 import {
   Add as AddIcon,
+  PanTool as PanToolIcon,
   Edit as EditIcon,
   Delete as DeleteIcon,
   CheckCircle as CheckCircleIcon,
   Schedule as ScheduleIcon,
 } from '@mui/icons-material';
-import { getTasks, createTask, updateTask, deleteTask, getEmployees, getEnclosures } from '../api/endpoints';
+import { getTasks, createTask, updateTask, deleteTask, claimTask, batch } from '../api/endpoints';
 
 interface Task {
   id: number;
@@ -100,29 +101,31 @@ export default function Tasks() {
     return canEdit;
   };
 
-  const fetchEmployees = async () => {
-    try {
-      const response = await getEmployees();
-      setEmployees(response.data);
-    } catch (err) {
-      console.error('Błąd podczas pobierania pracowników:', err);
-    }
-  };
-
-  const fetchEnclosures = async () => {
+  const fetchTasks = async () => {
     try {
-      const response = await getEnclosures();
-      setEnclosures(response.data);
+      setLoading(true);
+      const response = await getTasks();
+      setTasks(response.data);
     } catch (err) {
-      console.error('Błąd podczas pobierania wybiegów:', err);
+      setError('Nie udało się pobrać listy zadań');
+      setSnackbar({ open: true, message: 'Błąd podczas pobierania danych', severity: 'error' });
+    } finally {
+      setLoading(false);
     }
   };
 
-  const fetchTasks = async () => {
+  // Dane startowe strony pobierane jednym żądaniem /api/batch/
+  const fetchPageData = async () => {
     try {
       setLoading(true);
-      const response = await getTasks();
-      setTasks(response.data);
+      const response = await batch([{ path: '/tasks/' }, { path: '/employees/' }, { path: '/enclosures/' }]);
+      const [tasksResult, employeesResult, enclosuresResult] = response.data.responses;
+      if (tasksResult.status !== 200) throw new Error(`tasks: ${tasksResult.status}`);
+      setTasks(tasksResult.body);
+      if (employeesResult.status === 200) setEmployees(employeesResult.body);
+      else console.error('Błąd podczas pobierania pracowników:', employeesResult.body);
+      if (enclosuresResult.status === 200) setEnclosures(enclosuresResult.body);
+      else console.error('Błąd podczas pobierania wybiegów:', enclosuresResult.body);
     } catch (err) {
       setError('Nie udało się pobrać listy zadań');
       setSnackbar({ open: true, message: 'Błąd podczas pobierania danych', severity: 'error' });
@@ -132,9 +135,7 @@ export default function Tasks() {
   };
 
   useEffect(() => {
-    fetchTasks();
-    fetchEmployees();
-    fetchEnclosures();
+    fetchPageData();
   }, []);
 
   const handleSubmit = async (e: React.FormEvent) => {
@@ -211,6 +212,24 @@ export default function Tasks() {
     }
   };
 
+  const handleClaim = async () => {
+    try {
+      const response = await claimTask();
+      setSnackbar({
+        open: true,
+        message: `Przypisano zadanie: ${response.data.task_type}`,
+        severity: 'success',
+      });
+      fetchTasks();
+    } catch (err: any) {
+      setSnackbar({
+        open: true,
+        message: err.response?.status === 404 ? 'Brak wolnych zadań na Twoich wybiegach' : 'Nie udało się pobrać zadania',
+        severity: 'error',
+      });
+    }
+  };
+
   const handleEdit = (task: Task) => {
     setFormData({
       task_timestamp: task.task_timestamp.slice(0, 16),
@@ -270,6 +289,16 @@ export default function Tasks() {
             Dodaj zadanie
           </Button>
         )}
+        {userRole === 'worker' && (
+          <Button
+            variant="contained"
+            startIcon={<PanToolIcon />}
+            sx={{ bgcolor: '#41522d', '&:hover': { bgcolor: '#2d3a1f' } }}
+            onClick={handleClaim}
+          >
+            Weź zadanie
+          </Button>
+        )}
       </Box>
 
       {error && (